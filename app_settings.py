@@ -0,0 +1,342 @@
+"""Cấu hình hiệu năng lưu trên đĩa, áp dụng trực tiếp cho các thành phần đang chạy.
+
+Mỗi field của AppSettings khai báo trong metadata:
+  - label, group: hiển thị trong hộp thoại cài đặt
+  - min/max hoặc choices: ràng buộc giá trị
+  - apply: khi nào thay đổi có hiệu lực
+      "live"            áp dụng ngay trong app
+      "backend_live"    đẩy sang backend đang chạy qua POST /v1/config
+      "backend_restart" cần khởi động lại backend (truyền qua biến môi trường)
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from dataclasses import dataclass, field, fields, asdict, replace
+from pathlib import Path
+from typing import Callable, Optional
+
+from const import DOWNLOAD_AI_SERVICE_PACKAGE
+
+logger = logging.getLogger(__name__)
+
+SETTINGS_VERSION = 1
+LOG_LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR")
+# auto: bản cài dùng chung của máy (shared_install.py) nếu có, user: luôn cài riêng
+INSTALL_MODES = ("auto", "user")
+# extract: giải nén toàn bộ gói; lazy: chạy thẳng từ gói zip (package_runtime.py)
+PACKAGE_MODES = ("extract", "lazy")
+
+
+def _setting(default, label, group, apply="live", **limits):
+    return field(
+        default=default,
+        metadata={"label": label, "group": group, "apply": apply, **limits},
+    )
+
+
+@dataclass(frozen=True)
+class AppSettings:
+    # --- Tải và cài đặt ---
+    package_url: str = _setting(
+        DOWNLOAD_AI_SERVICE_PACKAGE, "URL gói backend", "Tải và cài đặt"
+    )
+    install_mode: str = _setting(
+        "auto",
+        "Bản cài backend (auto: dùng bản chung của máy nếu có)",
+        "Tải và cài đặt",
+        choices=INSTALL_MODES,
+    )
+    package_mode: str = _setting(
+        "extract",
+        "Cách cài gói (lazy: chạy thẳng từ gói, giải nén dần)",
+        "Tải và cài đặt",
+        choices=PACKAGE_MODES,
+    )
+    package_mirrors: str = _setting(
+        "",
+        "Nguồn dự phòng: mirror, thư mục LAN/USB (phân cách bằng ;)",
+        "Tải và cài đặt",
+    )
+    download_connections: int = _setting(
+        1,
+        "Số kết nối tải song song (chia cho các nguồn)",
+        "Tải và cài đặt",
+        min=1,
+        max=16,
+    )
+    extract_threads: int = _setting(
+        0, "Số thread giải nén (0 = tự động)", "Tải và cài đặt", min=0, max=64
+    )
+    update_bandwidth_kbps: int = _setting(
+        2048,
+        "Băng thông tải cập nhật nền (KB/s, 0 = không giới hạn)",
+        "Tải và cài đặt",
+        min=0,
+        max=1024 * 1024,
+    )
+    update_check_hours: float = _setting(
+        6.0, "Chu kỳ kiểm tra cập nhật (giờ)", "Tải và cài đặt", min=0.25, max=168.0
+    )
+    deep_verify_days: float = _setting(
+        7.0,
+        "Chu kỳ kiểm tra CRC32 toàn bộ bản cài (ngày, 0 = tắt)",
+        "Tải và cài đặt",
+        min=0.0,
+        max=365.0,
+    )
+    deep_verify_mb_per_s: int = _setting(
+        50,
+        "Tốc độ đọc khi kiểm tra CRC32 (MB/s, 0 = không giới hạn)",
+        "Tải và cài đặt",
+        min=0,
+        max=10000,
+    )
+
+    # --- Backend ---
+    backend_port: int = _setting(
+        17199, "Cổng backend", "Backend", apply="backend_restart", min=1024, max=65535
+    )
+    backend_workers: int = _setting(
+        1, "Số worker backend", "Backend", apply="backend_restart", min=1, max=32
+    )
+    cpu_threads: int = _setting(
+        0,
+        "Số CPU thread cho model (0 = mặc định)",
+        "Backend",
+        apply="backend_restart",
+        min=0,
+        max=256,
+    )
+    max_startup_retries: int = _setting(
+        3, "Số lần thử khởi động", "Backend", min=1, max=10
+    )
+    startup_delay: float = _setting(
+        5.0, "Chờ giữa các lần thử (giây)", "Backend", min=0.0, max=120.0
+    )
+    ready_checks: int = _setting(
+        30, "Số lần kiểm tra sẵn sàng", "Backend", min=1, max=600
+    )
+    ready_poll_interval: float = _setting(
+        1.0, "Chu kỳ kiểm tra sẵn sàng (giây)", "Backend", min=0.05, max=30.0
+    )
+    shutdown_timeout: float = _setting(
+        15.0, "Thời gian chờ dừng backend (giây)", "Backend", min=1.0, max=300.0
+    )
+
+    # --- Bộ nhớ đệm ---
+    backend_cache_mb: int = _setting(
+        2048,
+        "Bộ nhớ đệm backend (MB)",
+        "Bộ nhớ đệm",
+        apply="backend_live",
+        min=0,
+        max=256 * 1024,
+    )
+    web_cache_mb: int = _setting(
+        256, "HTTP cache của web view (MB)", "Bộ nhớ đệm", min=16, max=16 * 1024
+    )
+    max_web_views: int = _setting(4, "Số web view giữ sẵn", "Bộ nhớ đệm", min=1, max=16)
+    web_memory_budget_mb: int = _setting(
+        1024, "Giới hạn RAM web view (MB)", "Bộ nhớ đệm", min=128, max=64 * 1024
+    )
+
+    # --- Log và giám sát ---
+    log_level: str = _setting("INFO", "Mức log ứng dụng", "Log", choices=LOG_LEVELS)
+    backend_log_level: str = _setting(
+        "INFO", "Mức log backend", "Log", apply="backend_live", choices=LOG_LEVELS
+    )
+    monitor_interval: float = _setting(
+        2.0, "Chu kỳ giám sát tài nguyên (giây)", "Log", min=0.2, max=60.0
+    )
+    profiler_rate_hz: int = _setting(
+        100, "Tần số lấy mẫu của profiler (Hz)", "Log", min=1, max=1000
+    )
+
+
+SETTINGS_FIELDS = {f.name: f for f in fields(AppSettings)}
+
+
+def setting_meta(name: str) -> dict:
+    return SETTINGS_FIELDS[name].metadata
+
+
+def coerce_value(name: str, value):
+    """Chuyển value về đúng kiểu của field và kiểm tra ràng buộc
+
+    Ném ValueError với message hiển thị được cho người dùng.
+    """
+    f = SETTINGS_FIELDS.get(name)
+    if f is None:
+        raise ValueError(f"Không có cấu hình '{name}'")
+    meta = f.metadata
+    try:
+        if f.type in (int, "int"):
+            if isinstance(value, float) and not value.is_integer():
+                raise ValueError
+            value = int(value)
+        elif f.type in (float, "float"):
+            value = float(value)
+        else:
+            value = str(value).strip()
+    except (TypeError, ValueError):
+        raise ValueError(f"{meta['label']}: giá trị không hợp lệ ({value!r})")
+
+    if "choices" in meta and value not in meta["choices"]:
+        raise ValueError(f"{meta['label']}: phải là một trong {meta['choices']}")
+    if "min" in meta and value < meta["min"]:
+        raise ValueError(f"{meta['label']}: tối thiểu {meta['min']}")
+    if "max" in meta and value > meta["max"]:
+        raise ValueError(f"{meta['label']}: tối đa {meta['max']}")
+    if name == "package_url" and not value:
+        raise ValueError(f"{meta['label']}: không được để trống")
+    return value
+
+
+def changes_requiring(changed, apply: str) -> set:
+    """Các key trong changed có kiểu áp dụng apply"""
+    return {name for name in changed if setting_meta(name)["apply"] == apply}
+
+
+class SettingsStore:
+    """Đọc/ghi settings.json và báo cho các thành phần khi cấu hình đổi.
+
+    - Ghi atomic (file tạm + os.replace)
+    - Giá trị sai kiểu/ngoài giới hạn trong file bị bỏ qua, dùng mặc định
+    - Thread nền theo dõi mtime để áp dụng cả khi file được sửa tay
+    - Listener nhận (settings, changed_keys); có thể được gọi từ thread nền
+    """
+
+    def __init__(self, path: Path, watch_interval: float = 2.0):
+        self.path = Path(path)
+        self.watch_interval = watch_interval
+        self._lock = threading.Lock()
+        self._listeners = []
+        self._mtime_ns = None
+        self._stop_event = threading.Event()
+        self._thread = None
+        self.settings = self._read()
+
+    def _read(self) -> AppSettings:
+        try:
+            self._mtime_ns = self.path.stat().st_mtime_ns
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return AppSettings()
+        except (OSError, ValueError) as e:
+            logger.warning(f"Không đọc được {self.path}, dùng cấu hình mặc định: {e}")
+            return AppSettings()
+
+        stored = data.get("settings") if isinstance(data, dict) else None
+        values = {}
+        for name, value in (stored or {}).items():
+            if name not in SETTINGS_FIELDS:
+                continue
+            try:
+                values[name] = coerce_value(name, value)
+            except ValueError as e:
+                logger.warning(f"Bỏ qua cấu hình không hợp lệ: {e}")
+        return replace(AppSettings(), **values)
+
+    def _write(self, settings: AppSettings):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": SETTINGS_VERSION,
+            "saved_at": time.time(),
+            "settings": asdict(settings),
+        }
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+        self._mtime_ns = self.path.stat().st_mtime_ns
+
+    def subscribe(self, callback: Callable):
+        """callback(settings, changed_keys) được gọi sau mỗi lần cấu hình đổi"""
+        self._listeners.append(callback)
+
+    def update(self, **changes) -> set:
+        """Kiểm tra, lưu và áp dụng thay đổi; trả về tập key thực sự đổi"""
+        values = {name: coerce_value(name, value) for name, value in changes.items()}
+        with self._lock:
+            old = self.settings
+            new = replace(old, **values)
+            changed = {n for n in values if getattr(old, n) != getattr(new, n)}
+            if not changed:
+                return changed
+            self._write(new)
+            self.settings = new
+        logger.info(f"Đã cập nhật cấu hình: {', '.join(sorted(changed))}")
+        self._notify(new, changed)
+        return changed
+
+    def reset(self) -> set:
+        """Khôi phục toàn bộ cấu hình mặc định"""
+        return self.update(**asdict(AppSettings()))
+
+    def reload_if_changed(self) -> set:
+        """Đọc lại file nếu bị sửa từ bên ngoài"""
+        try:
+            mtime_ns = self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            mtime_ns = None
+        if mtime_ns == self._mtime_ns:
+            return set()
+
+        with self._lock:
+            old = self.settings
+            new = self._read()
+            self._mtime_ns = mtime_ns
+            changed = {
+                name
+                for name in SETTINGS_FIELDS
+                if getattr(old, name) != getattr(new, name)
+            }
+            self.settings = new
+        if changed:
+            logger.info(f"Đã tải lại cấu hình từ file: {', '.join(sorted(changed))}")
+            self._notify(new, changed)
+        return changed
+
+    def _notify(self, settings: AppSettings, changed: set):
+        for callback in list(self._listeners):
+            try:
+                callback(settings, changed)
+            except Exception as e:
+                logger.error(f"Lỗi khi áp dụng cấu hình ({callback}): {e}")
+
+    def start_watching(self):
+        """Theo dõi file cấu hình trên thread nền"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._watch, name="SettingsWatcher", daemon=True
+        )
+        self._thread.start()
+
+    def stop_watching(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _watch(self):
+        while not self._stop_event.wait(self.watch_interval):
+            try:
+                self.reload_if_changed()
+            except Exception as e:
+                logger.error(f"Lỗi khi tải lại cấu hình: {e}")
+
+
+def apply_log_level(settings: AppSettings, changed: Optional[set] = None):
+    """Đổi mức log của root logger"""
+    if changed is None or "log_level" in changed:
+        logging.getLogger().setLevel(settings.log_level)
+
+
+# Singleton instance (cùng thư mục app data với BackendManager)
+settings_store = SettingsStore(
+    Path(os.getenv("APPDATA", ".")) / "ai_dubbing" / "settings.json"
+)
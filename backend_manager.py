@@ -9,59 +9,290 @@ import time
 import logging
 from typing import Optional
 import shutil
+import threading
+
+from app_settings import AppSettings, settings_store, changes_requiring
+import install_manifest
+import package_format
+import package_mirrors
+import package_runtime
+import shared_install
+from trash_reaper import TrashReaper
 
 logger = logging.getLogger(__name__)
 
 
+def _cancellable_sleep(seconds: float, cancel_event: Optional[threading.Event]) -> bool:
+    """Ngủ seconds giây; trả về True nếu bị hủy giữa chừng"""
+    if cancel_event is None:
+        time.sleep(seconds)
+        return False
+    return cancel_event.wait(seconds)
+
+
 class BackendManager:
     def __init__(self):
-        self.app_data_dir = Path(os.getenv("APPDATA")) / "ai_dubbing"
-        self.backend_dir = self.app_data_dir / "client_backend"
+        self.app_data_dir = Path(os.getenv("APPDATA", ".")) / "ai_dubbing"
+        # Bản cài riêng của user; backend_dir trỏ sang bản dùng chung của máy
+        # nếu có (xem select_install)
+        self.user_backend_dir = self.app_data_dir / shared_install.BACKEND_DIR_NAME
+        self.backend_dir = self.user_backend_dir
+        self.shared_mode = False
+        # Thư mục làm việc ghi được khi chạy từ bản dùng chung (chỉ đọc)
+        self.overlay_dir = self.app_data_dir / "backend_overlay"
         self.backend_zip_path = self.app_data_dir / "python_client_backend.zip"
+        # Thư mục chứa video/audio đã lồng tiếng (phục vụ qua app:// scheme)
+        self.output_dir = self.app_data_dir / "output"
         self.process = None
-        self.max_startup_retries = 3
-        self.startup_delay = 5  # seconds
+        self.backend_host = "127.0.0.1"
         # self.main_file_to_run = "main.py"
         self.main_file_to_run = "run.py"
+        # Kết quả kiểm tra bản cài, cache trong suốt một lần chạy app
+        self._install_valid = None
+        self._deep_verify_thread = None
+        self._deep_verify_stop = threading.Event()
+        self.last_download_info = None
+        # Thư mục cũ được đổi tên vào trash rồi xóa dần ở chế độ nền
+        self.trash_reaper = TrashReaper(self.app_data_dir / "trash")
+        # Port, số lần thử, timeout, số thread giải nén... lấy từ settings.json
+        self.settings = None
+        self.apply_settings(settings_store.settings)
+        settings_store.subscribe(self.apply_settings)
+
+    def apply_settings(self, settings: AppSettings, changed: set = None):
+        """Áp dụng cấu hình mới
+
+        Cổng chỉ đổi khi backend không chạy; nếu đang chạy, cổng mới có hiệu
+        lực ở restart_backend().
+        """
+        self.settings = settings
+        self.max_startup_retries = settings.max_startup_retries
+        self.startup_delay = settings.startup_delay  # chờ giữa các lần thử
+        self.ready_checks = settings.ready_checks  # số lần kiểm tra mỗi lần thử
+        self.ready_poll_interval = settings.ready_poll_interval
+        self.shutdown_timeout = settings.shutdown_timeout
+        # Số thread giải nén gói .tar.zst (0 = tự chọn theo số CPU)
+        self.extract_threads = settings.extract_threads
+        if not self.is_backend_running():
+            self.backend_port = settings.backend_port
+            if changed and "install_mode" in changed:
+                self.invalidate_install_cache()
+
+    @property
+    def base_url(self) -> str:
+        """URL gốc của backend service"""
+        return f"http://{self.backend_host}:{self.backend_port}"
 
     def ensure_app_data_dir(self):
         """Tạo thư mục app data nếu chưa tồn tại"""
         self.app_data_dir.mkdir(parents=True, exist_ok=True)
         logger.info(f"App data directory: {self.app_data_dir}")
 
+    def remove_backend_dir(self):
+        """Bỏ bản cài hiện tại: đổi tên vào trash, fallback xóa trực tiếp"""
+        self.invalidate_install_cache()
+        if not self.user_backend_dir.exists():
+            return
+        if self.trash_reaper.move_to_trash(self.user_backend_dir) is None:
+            shutil.rmtree(self.user_backend_dir)
+
+    def clean_leftovers(self):
+        """Chuyển thư mục backend cũ còn sót (do crash giữa chừng) vào trash"""
+        for leftover in self.app_data_dir.glob(f"{self.user_backend_dir.name}.old-*"):
+            self.trash_reaper.move_to_trash(leftover)
+
     def is_backend_installed(self) -> bool:
-        """Kiểm tra xem backend đã được cài đặt chưa"""
-        python_exe_exists = self.get_python_executable()
-        run_py = self.backend_dir / self.main_file_to_run
+        """Kiểm tra xem backend đã được cài đặt chưa (cache theo lần chạy)"""
+        if self._install_valid is None:
+            self._install_valid = self.select_install()
+        return self._install_valid
+
+    def select_install(self) -> bool:
+        """Chọn bản cài dùng chung của máy nếu có và hợp lệ, ngược lại bản của user
+
+        Bản cài riêng (nếu có) được giữ nguyên làm dự phòng khi bản chung bị gỡ,
+        hỏng hoặc không khởi động được (xem start_backend).
+        """
+        if self.settings.install_mode == "auto":
+            shared_dir = shared_install.shared_backend_dir()
+            if shared_dir.exists() and self.validate_install(shared_dir):
+                if not self.shared_mode:
+                    logger.info(f"Dùng bản cài backend dùng chung: {shared_dir}")
+                    if self.user_backend_dir.exists():
+                        logger.info(
+                            f"Giữ bản cài riêng của user làm dự phòng: "
+                            f"{self.user_backend_dir}"
+                        )
+                self.backend_dir = shared_dir
+                self.shared_mode = True
+                return True
+
+        self.backend_dir = self.user_backend_dir
+        self.shared_mode = False
+        return self.validate_install()
 
-        run_py_exists = run_py.exists()
+    def invalidate_install_cache(self):
+        """Bỏ kết quả kiểm tra đã cache (sau khi cài lại/xóa bản cài)"""
+        self._install_valid = None
+
+    def validate_install(self, backend_dir: Path = None) -> bool:
+        """Kiểm tra nhanh bản cài bằng cách so stat của mọi file với manifest"""
+        backend_dir = backend_dir or self.backend_dir
+        python_exe = self._python_executable_path(backend_dir)
+        run_py = backend_dir / self.main_file_to_run
+        if not (python_exe.exists() and run_py.exists()):
+            return False
 
-        return python_exe_exists and run_py_exists
+        if install_manifest.is_marked_invalid(backend_dir):
+            logger.warning("Bản cài backend đã bị đánh dấu hỏng")
+            return False
+
+        if not package_runtime.validate_package(backend_dir):
+            logger.warning("Gói backend (chế độ chạy thẳng từ gói) đã thay đổi")
+            return False
+
+        started = time.perf_counter()
+        manifest = install_manifest.load_manifest(backend_dir)
+        if manifest is None:
+            # Bản cài cũ (trước khi có manifest): chỉ kiểm tra được file chính
+            logger.info("Bản cài backend không có manifest, bỏ qua kiểm tra chi tiết")
+            return True
+        if not manifest:
+            return False
+
+        mismatches = install_manifest.fast_validate(backend_dir, manifest)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if mismatches:
+            logger.warning(
+                f"Bản cài backend không toàn vẹn: {len(mismatches)} file sai lệch "
+                f"(ví dụ: {mismatches[:5]})"
+            )
+            return False
 
-    def download_backend(self, download_url: str, progress_callback=None) -> bool:
-        """Tải backend zip từ URL với progress tracking"""
+        logger.info(
+            f"Bản cài backend hợp lệ ({len(manifest['files'])} files, "
+            f"{elapsed_ms:.0f} ms)"
+        )
+        return True
+
+    def start_deep_verification(self):
+        """Kiểm tra CRC32 toàn bộ file trên thread nền (theo chu kỳ deep_verify_days)
+
+        Nếu phát hiện sai lệch, bản cài bị đánh dấu hỏng và sẽ được cài lại
+        ở lần khởi động sau (không làm gián đoạn phiên đang chạy).
+        """
+        if self._deep_verify_thread and self._deep_verify_thread.is_alive():
+            return
+        if self.shared_mode:
+            # Bản dùng chung chỉ đọc, do quản trị viên cài và kiểm tra
+            return
+        interval_s = self.settings.deep_verify_days * 86400
+        if not interval_s:
+            return
+        if time.time() - install_manifest.last_verified(self.backend_dir) < interval_s:
+            return
+
+        backend_dir = self.backend_dir
+        throttle_mb_per_s = self.settings.deep_verify_mb_per_s
+        stop_event = self._deep_verify_stop
+        stop_event.clear()
+
+        def verify():
+            manifest = install_manifest.load_manifest(backend_dir)
+            if not manifest:
+                return
+            started = time.perf_counter()
+            mismatches = install_manifest.deep_verify(
+                backend_dir,
+                manifest,
+                stop_event=stop_event,
+                throttle_mb_per_s=throttle_mb_per_s,
+            )
+            if mismatches:
+                logger.error(
+                    f"Deep verification: {len(mismatches)} file sai CRC32, "
+                    f"sẽ cài lại backend ở lần khởi động sau"
+                )
+                install_manifest.mark_invalid(backend_dir, "\n".join(mismatches[:100]))
+            elif stop_event.is_set():
+                logger.info("Đã dừng deep verification, kiểm tra lại ở lần chạy sau")
+            else:
+                install_manifest.record_verified(backend_dir)
+                logger.info(
+                    f"Deep verification OK sau {time.perf_counter() - started:.1f}s"
+                )
+
+        self._deep_verify_thread = threading.Thread(
+            target=verify, name="DeepVerify", daemon=True
+        )
+        self._deep_verify_thread.start()
+
+    def stop_deep_verification(self, timeout: float = 5):
+        """Dừng deep verification đang chạy (gọi khi đóng app)"""
+        self._deep_verify_stop.set()
+        if self._deep_verify_thread:
+            self._deep_verify_thread.join(timeout=timeout)
+            self._deep_verify_thread = None
+
+    def probe_package_sources(
+        self, download_url: str, cancel_event: Optional[threading.Event] = None
+    ) -> list:
+        """Đo song song download_url và các mirror đã cấu hình, nhanh nhất trước"""
+        sources = package_mirrors.parse_sources(
+            download_url, self.settings.package_mirrors
+        )
+        return package_mirrors.probe_sources(sources, cancel_event=cancel_event)
+
+    def download_backend(
+        self,
+        download_url: str,
+        progress_callback=None,
+        sources: list = None,
+        cancel_event: Optional[threading.Event] = None,
+    ) -> bool:
+        """Tải gói backend từ nguồn nhanh nhất (download_url hoặc mirror)
+
+        sources: kết quả probe_package_sources() nếu đã đo trước đó.
+        Nguồn lỗi giữa chừng được thay bằng nguồn khác, không tải lại phần đã có.
+        cancel_event: đặt để dừng tải (kể cả khi đang chờ mạng).
+        """
         try:
-            logger.info(f"Đang tải backend từ: {download_url}")
+            if sources is None:
+                sources = self.probe_package_sources(download_url, cancel_event)
+            if not sources:
+                logger.error(
+                    "Không có nguồn gói backend nào: kiểm tra URL gói và danh sách mirror"
+                )
+                return False
+            logger.info(
+                f"Đang tải backend từ: {sources[0].location} "
+                f"({len(sources)} nguồn khả dụng)"
+            )
 
             # Tạo thư mục nếu chưa có
             self.backend_zip_path.parent.mkdir(parents=True, exist_ok=True)
 
-            response = requests.get(download_url, stream=True, timeout=600)
-            response.raise_for_status()
-
-            total_size = int(response.headers.get("content-length", 0))
-            downloaded_size = 0
+            started = time.perf_counter()
+            downloader = package_mirrors.MirrorDownloader(
+                sources,
+                self.backend_zip_path,
+                connections=self.settings.download_connections,
+                progress_callback=progress_callback,
+                cancel_event=cancel_event,
+            )
+            downloaded_size = downloader.run()
 
-            with open(self.backend_zip_path, "wb") as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-                        downloaded_size += len(chunk)
-                        if total_size > 0 and progress_callback:
-                            progress = (downloaded_size / total_size) * 100
-                            progress_callback(int(progress))
+            # Phiên bản của gói (theo URL chính nếu có), dùng để kiểm tra cập nhật
+            reference = next(
+                (s for s in sources if s.location == download_url), sources[0]
+            )
+            self.last_download_info = reference.info()
 
-            logger.info(f"Đã tải backend thành công: {self.backend_zip_path}")
+            elapsed = time.perf_counter() - started
+            logger.info(
+                f"Đã tải backend thành công: {self.backend_zip_path} "
+                f"({downloaded_size / (1024 * 1024) / max(elapsed, 1e-6):.1f} MB/s)"
+            )
             return True
 
         except Exception as e:
@@ -73,20 +304,22 @@ class BackendManager:
         try:
             logger.info(f"Đang giải nén backend từ: {self.backend_zip_path}")
 
-            # Xóa thư mục backend cũ nếu tồn tại
-            if self.backend_dir.exists():
-                shutil.rmtree(self.backend_dir)
+            # Chuyển thư mục backend cũ vào trash (xóa nền), chỉ xóa trực tiếp
+            # khi không đổi tên được (ví dụ file đang bị khóa)
+            self.remove_backend_dir()
+
+            self.invalidate_install_cache()
+
+            if self.settings.package_mode == "lazy" and self.install_lazy_package(
+                self.backend_zip_path, progress_callback
+            ):
+                logger.info("Đã cài backend ở chế độ chạy thẳng từ gói")
+                return True
 
             # Giải nén
-            with zipfile.ZipFile(self.backend_zip_path, "r") as zip_ref:
-                file_list = zip_ref.namelist()
-                total_files = len(file_list)
-
-                for i, file_info in enumerate(file_list):
-                    zip_ref.extract(file_info, self.app_data_dir)
-                    if progress_callback and total_files > 0:
-                        progress = int((i + 1) / total_files * 100)
-                        progress_callback(progress)
+            self.extract_package(
+                self.backend_zip_path, self.app_data_dir, progress_callback
+            )
 
             # Xóa file zip sau khi giải nén
             self.backend_zip_path.unlink(missing_ok=True)
@@ -101,12 +334,139 @@ class BackendManager:
             traceback.print_exc()
             return False
 
-    def get_python_executable(self) -> Optional[Path]:
-        """Lấy đường dẫn tới python.exe trong Python portable"""
+    def extract_package(
+        self, package_path: Path, extract_root: Path, progress_callback=None
+    ) -> Path:
+        """Giải nén gói (.zip hoặc .tar.zst) vào extract_root và ghi install manifest
+
+        Trả về thư mục backend đã giải nén (extract_root / client_backend).
+        """
+        backend_dir = Path(extract_root) / self.backend_dir.name
+        backend_prefix = self.backend_dir.name + "/"
+        package_type = package_format.detect_format(package_path)
+        logger.info(f"Định dạng gói backend: {package_type}")
+
+        if package_type == package_format.FORMAT_TAR_ZSTD:
+            crcs = package_format.extract_tar_zstd(
+                package_path, extract_root, self.extract_threads, progress_callback
+            )
+        else:
+            crcs = self._extract_zip(package_path, extract_root, progress_callback)
+
+        manifest_entries = {}
+        for name, crc in crcs.items():
+            if name.startswith(backend_prefix):
+                rel = name[len(backend_prefix) :]
+                if install_manifest.is_tracked(rel):
+                    manifest_entries[rel] = crc
+
+        install_manifest.write_manifest(backend_dir, manifest_entries)
+        return backend_dir
+
+    def install_lazy_package(self, package_path: Path, progress_callback=None) -> bool:
+        """Cài ở chế độ chạy thẳng từ gói zip (xem package_runtime.py)
+
+        Chỉ giải nén phần interpreter cần lúc khởi động; gói được giữ lại trong
+        client_backend/.package kèm index central directory. Trả về False
+        (chưa thay đổi gì) nếu gói không dùng được ở chế độ này, khi đó gọi
+        extract_package như bình thường.
+        """
+        if package_format.detect_format(package_path) != package_format.FORMAT_ZIP:
+            logger.info("Chế độ chạy thẳng từ gói chỉ hỗ trợ zip, giải nén toàn bộ")
+            return False
+
+        backend_dir = self.user_backend_dir
+        prefix = backend_dir.name + "/"
+        pkg_dir = backend_dir / package_runtime.PACKAGE_DIR_NAME
+        pkg_dir.mkdir(parents=True, exist_ok=True)
+        index_path = pkg_dir / package_runtime.INDEX_NAME
+        with zipfile.ZipFile(package_path, "r") as zip_ref:
+            try:
+                count = package_runtime.build_index(zip_ref, str(index_path), prefix)
+            except ValueError as e:
+                logger.info(f"{e}, giải nén toàn bộ")
+                shutil.rmtree(backend_dir, ignore_errors=True)
+                return False
+
+            eager = [
+                info
+                for info in zip_ref.infolist()
+                if info.filename.startswith(prefix)
+                and not info.is_dir()
+                and package_runtime.is_eager(info.filename[len(prefix) :])
+            ]
+            crcs = {}
+            last_progress = -1
+            for i, info in enumerate(eager):
+                zip_ref.extract(info, self.app_data_dir)
+                crcs[info.filename[len(prefix) :]] = info.CRC
+                if progress_callback:
+                    progress = int((i + 1) / len(eager) * 100)
+                    if progress != last_progress:
+                        last_progress = progress
+                        progress_callback(progress)
+            site_dirs = {
+                name[: name.lower().index("site-packages/") + len("site-packages")]
+                for name in zip_ref.namelist()
+                if name.startswith(prefix) and "site-packages/" in name.lower()
+            }
+
+        # Process con của backend (worker) kích hoạt runtime qua .pth trong
+        # site-packages; process chính được chạy qua package_runtime.py
+        runtime_source = Path(package_runtime.__file__).with_suffix(".py")
+        shutil.copy2(runtime_source, pkg_dir / package_runtime.RUNTIME_NAME)
+        for site_dir in site_dirs:
+            site_path = self.app_data_dir / site_dir
+            site_path.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(runtime_source, site_path / package_runtime.RUNTIME_NAME)
+            (site_path / package_runtime.PTH_NAME).write_text(
+                "import package_runtime; package_runtime.activate_from_env()\n",
+                encoding="utf-8",
+            )
+
+        os.replace(package_path, pkg_dir / package_runtime.PACKAGE_NAME)
+        package_runtime.write_marker(str(backend_dir))
+        install_manifest.write_manifest(
+            backend_dir,
+            {rel: crc for rel, crc in crcs.items() if install_manifest.is_tracked(rel)},
+        )
+        logger.info(
+            f"Đã giải nén {len(eager)}/{count} file cần cho khởi động, "
+            f"phần còn lại giải nén theo nhu cầu"
+        )
+        return True
+
+    def _extract_zip(
+        self, zip_path: Path, extract_root: Path, progress_callback=None
+    ) -> dict:
+        """Giải nén gói zip, trả về {tên file: crc32} lấy từ central directory"""
+        crcs = {}
+        with zipfile.ZipFile(zip_path, "r") as zip_ref:
+            file_list = zip_ref.infolist()
+            total_files = len(file_list)
+            last_progress = -1
+
+            for i, file_info in enumerate(file_list):
+                zip_ref.extract(file_info, extract_root)
+                if not file_info.is_dir():
+                    crcs[file_info.filename] = file_info.CRC
+                if progress_callback and total_files > 0:
+                    progress = int((i + 1) / total_files * 100)
+                    if progress != last_progress:
+                        last_progress = progress
+                        progress_callback(progress)
+        return crcs
+
+    def _python_executable_path(self, backend_dir: Path = None) -> Path:
+        backend_dir = backend_dir or self.backend_dir
         if os.name == "nt":  # Windows
-            python_exe = self.backend_dir / "python_portable" / "python.exe"
+            return backend_dir / "python_portable" / "python.exe"
         else:  # Linux/Mac
-            python_exe = self.backend_dir / "python_portable" / "bin" / "python"
+            return backend_dir / "python_portable" / "bin" / "python"
+
+    def get_python_executable(self) -> Optional[Path]:
+        """Lấy đường dẫn tới python.exe trong Python portable"""
+        python_exe = self._python_executable_path()
 
         if python_exe.exists():
             return python_exe
@@ -114,8 +474,13 @@ class BackendManager:
             logger.error(f"Không tìm thấy Python executable: {python_exe}")
             return False
 
-    def start_backend(self, status_callback=None) -> bool:
-        """Khởi động backend service với retry mechanism"""
+    def start_backend(
+        self, status_callback=None, cancel_event: Optional[threading.Event] = None
+    ) -> bool:
+        """Khởi động backend service với retry mechanism
+
+        cancel_event: đặt để bỏ các lần chờ/thử lại còn lại (trả về False).
+        """
         for attempt in range(self.max_startup_retries):
             if status_callback:
                 status_callback(
@@ -124,7 +489,7 @@ class BackendManager:
 
             if self._start_backend_once():
                 # Kiểm tra backend sẵn sàng
-                if self._wait_for_backend_ready(status_callback):
+                if self._wait_for_backend_ready(status_callback, cancel_event):
                     logger.info("Backend đã khởi động và sẵn sàng")
                     return True
                 else:
@@ -139,8 +504,22 @@ class BackendManager:
 
             if attempt < self.max_startup_retries - 1:
                 if status_callback:
-                    status_callback(f"Thử lại sau 5 giây...")
-                time.sleep(5)
+                    status_callback(f"Thử lại sau {self.startup_delay} giây...")
+                if _cancellable_sleep(self.startup_delay, cancel_event):
+                    logger.info("Đã hủy khởi động backend")
+                    return False
+
+        if cancel_event is not None and cancel_event.is_set():
+            return False
+        if self.shared_mode and self.validate_install(self.user_backend_dir):
+            logger.warning(
+                "Bản cài dùng chung không khởi động được, chuyển sang bản cài riêng "
+                "của user"
+            )
+            self.backend_dir = self.user_backend_dir
+            self.shared_mode = False
+            self._install_valid = True
+            return self.start_backend(status_callback, cancel_event)
 
         logger.error("Backend khởi động thất bại sau tất cả các lần thử")
         return False
@@ -166,15 +545,33 @@ class BackendManager:
                 logger.info("Backend đã đang chạy")
                 return True
 
+            # Bản dùng chung chỉ đọc: chạy trong overlay ghi được của user
+            work_dir = self.backend_dir
+            if self.shared_mode:
+                work_dir = shared_install.prepare_overlay(
+                    self.backend_dir, self.overlay_dir
+                )
+
             # Khởi động backend
             logger.info("Đang khởi động backend service...")
             logger.info(f"Python: {python_exe}")
             logger.info(f"Script: {run_py}")
 
             # Sử dụng shell=True để đảm bảo môi trường chạy đúng
+            command = [str(python_exe), str(run_py)]
+            if package_runtime.is_lazy_install(self.backend_dir):
+                # Cài finder đọc module từ gói trước khi chạy run.py
+                runtime_py = (
+                    self.backend_dir
+                    / package_runtime.PACKAGE_DIR_NAME
+                    / package_runtime.RUNTIME_NAME
+                )
+                command = [str(python_exe), str(runtime_py), str(run_py)]
+
             self.process = subprocess.Popen(
-                [str(python_exe), str(run_py)],
-                cwd=str(self.backend_dir),
+                command,
+                cwd=str(work_dir),
+                env=self.backend_env(),
                 # stdout=subprocess.PIPE,
                 # stderr=subprocess.PIPE,
                 # text=True,
@@ -193,18 +590,26 @@ class BackendManager:
             traceback.print_exc()
             return False
 
-    def _wait_for_backend_ready(self, status_callback=None) -> bool:
+    def _wait_for_backend_ready(
+        self, status_callback=None, cancel_event: Optional[threading.Event] = None
+    ) -> bool:
         """Chờ backend sẵn sàng"""
         import requests
 
-        for i in range(30):  # Chờ tối đa 30 giây
+        # Thread khác (resource monitor, settings watcher) có thể đặt
+        # self.process = None trong lúc probe: chỉ đọc một lần
+        process = self.process
+        total = self.ready_checks
+        for i in range(total):
+            # Kiểm tra trước khi probe: chỉ bỏ cuộc khi probe thất bại sau khi
+            # process đã thoát (process mới có thể thoát ngay vì cổng đang do
+            # một backend khỏe mạnh khác giữ)
+            exited = process is not None and process.poll() is not None
             try:
                 if status_callback:
-                    status_callback(f"Đang kiểm tra trạng thái AI... ({i+1}/30)")
+                    status_callback(f"Đang kiểm tra trạng thái AI... ({i+1}/{total})")
 
-                response = requests.get(
-                    "http://127.0.0.1:17199/v1/check/status", timeout=5
-                )
+                response = requests.get(f"{self.base_url}/v1/check/status", timeout=5)
                 if response.status_code == 200:
                     try:
                         data = response.json()
@@ -224,11 +629,74 @@ class BackendManager:
             except requests.exceptions.RequestException as e:
                 logger.debug(f"Cannot connect to backend: {e}")
 
-            time.sleep(1)
+            # Process đã thoát thì không cần chờ hết thời gian
+            if exited:
+                logger.error(
+                    f"Backend đã thoát với mã {process.returncode} trước khi sẵn sàng"
+                )
+                return False
+
+            if _cancellable_sleep(self.ready_poll_interval, cancel_event):
+                return False
 
         logger.error("Backend không sẵn sàng trong thời gian quy định")
         return False
 
+    def backend_env(self) -> dict:
+        """Biến môi trường truyền cấu hình cho process backend"""
+        env = os.environ.copy()
+        env.update(
+            {
+                "AI_DUBBING_PORT": str(self.backend_port),
+                "AI_DUBBING_WORKERS": str(self.settings.backend_workers),
+                "AI_DUBBING_CACHE_MB": str(self.settings.backend_cache_mb),
+                "AI_DUBBING_LOG_LEVEL": self.settings.backend_log_level,
+            }
+        )
+        if self.shared_mode:
+            env.update(shared_install.overlay_env(self.overlay_dir, self.output_dir))
+        if self.settings.cpu_threads:
+            # Giới hạn thread của các thư viện tính toán (PyTorch, MKL, OpenBLAS)
+            for name in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+                env[name] = str(self.settings.cpu_threads)
+        return env
+
+    def push_backend_config(self) -> bool:
+        """Đẩy cấu hình áp dụng được ngay sang backend đang chạy"""
+        payload = {
+            "cache_mb": self.settings.backend_cache_mb,
+            "log_level": self.settings.backend_log_level,
+        }
+        try:
+            response = requests.post(
+                f"{self.base_url}/v1/config", json=payload, timeout=5
+            )
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            logger.info(f"Backend không nhận cấu hình trực tiếp: {e}")
+            return False
+        logger.info(f"Đã cập nhật cấu hình backend: {payload}")
+        return True
+
+    def restart_backend(self, status_callback=None) -> bool:
+        """Dừng backend rồi khởi động lại với cấu hình hiện tại"""
+        self.stop_backend()
+        self.apply_settings(self.settings)
+        return self.start_backend(status_callback)
+
+    def reconfigure_backend(self, changed: set, status_callback=None) -> bool:
+        """Áp dụng thay đổi cấu hình cho backend đang chạy, chỉ restart khi cần"""
+        if not self.is_backend_running():
+            return True
+        needs_restart = bool(changes_requiring(changed, "backend_restart"))
+        if not needs_restart and changes_requiring(changed, "backend_live"):
+            # Backend cũ không có /v1/config thì phải restart để nhận cấu hình
+            needs_restart = not self.push_backend_config()
+        if not needs_restart:
+            return True
+        logger.info("Khởi động lại backend để áp dụng cấu hình mới")
+        return self.restart_backend(status_callback)
+
     def is_backend_running(self) -> bool:
         """Kiểm tra backend có đang chạy không"""
         if self.process is None:
@@ -258,7 +726,7 @@ class BackendManager:
                     self.process.terminate()
 
                 try:
-                    self.process.wait(timeout=15)  # Tăng timeout lên 15 giây
+                    self.process.wait(timeout=self.shutdown_timeout)
                 except subprocess.TimeoutExpired:
                     logger.warning("Backend không phản hồi, buộc dừng...")
                     self.process.kill()
@@ -0,0 +1,302 @@
+import os
+import json
+import shutil
+import threading
+import time
+import logging
+from typing import Optional
+
+import requests
+
+from backend_manager import backend_manager
+from app_settings import AppSettings, settings_store
+from const import DOWNLOAD_AI_SERVICE_PACKAGE
+import install_manifest
+
+logger = logging.getLogger(__name__)
+
+
+class BackendUpdater:
+    """Tải trước bản cập nhật backend ở chế độ nền và kích hoạt ở lần chạy sau.
+
+    - Phát hiện gói mới bằng HEAD có If-None-Match / If-Modified-Since,
+      không phải tải gói.
+    - Tải gói mới với băng thông giới hạn (có thể tiếp tục khi bị ngắt),
+      giải nén vào thư mục staging và đánh dấu sẵn sàng.
+    - Lần khởi động sau, apply_staged_update() đổi tên thư mục (atomic)
+      trước khi backend chạy, nên cập nhật không nằm trên đường khởi động.
+    """
+
+    def __init__(
+        self,
+        package_url: str = DOWNLOAD_AI_SERVICE_PACKAGE,
+        bandwidth_limit_kbps: int = 2048,
+        initial_delay: float = 120,
+        check_interval: float = 6 * 3600,
+    ):
+        self.package_url = package_url
+        self.bandwidth_limit_kbps = bandwidth_limit_kbps
+        self.initial_delay = initial_delay
+        self.check_interval = check_interval
+        self.state_path = backend_manager.app_data_dir / "update_state.json"
+        self.staging_dir = backend_manager.app_data_dir / "update_staging"
+        self.staged_zip_path = self.staging_dir / "package.zip.part"
+        # ETag của phiên bản đang tải dở trong staged_zip_path
+        self.staged_meta_path = self.staging_dir / "package.zip.part.json"
+        self.staged_root = self.staging_dir / "extract"
+        self.ready_path = self.staging_dir / "ready.json"
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def apply_settings(self, settings: AppSettings, changed: set = None):
+        """URL/băng thông/chu kỳ mới có hiệu lực từ lần kiểm tra kế tiếp"""
+        self.package_url = settings.package_url
+        self.bandwidth_limit_kbps = settings.update_bandwidth_kbps
+        self.check_interval = settings.update_check_hours * 3600
+
+    # --- Trạng thái phiên bản ---
+
+    def _load_state(self) -> dict:
+        try:
+            return json.loads(self.state_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self, state: dict):
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.state_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(state, indent=2), encoding="utf-8")
+        os.replace(tmp_path, self.state_path)
+
+    def record_installed(self, info: Optional[dict]):
+        """Ghi nhận phiên bản gói vừa được cài (ETag/Last-Modified/size)"""
+        if not info:
+            return
+        state = self._load_state()
+        state["installed"] = {**info, "installed_at": time.time()}
+        self._save_state(state)
+
+    # --- Kích hoạt khi khởi động ---
+
+    def has_staged_update(self) -> bool:
+        return self.ready_path.exists()
+
+    def apply_staged_update(self) -> bool:
+        """Thay bản cài hiện tại bằng bản đã staging (gọi trước khi khởi động backend)"""
+        if not self.has_staged_update():
+            return False
+        if backend_manager.is_backend_running():
+            logger.warning("Backend đang chạy, hoãn kích hoạt bản cập nhật")
+            return False
+
+        try:
+            info = json.loads(self.ready_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            logger.error(f"Thông tin bản cập nhật bị hỏng, bỏ qua: {e}")
+            self.discard_staged_update()
+            return False
+
+        staged_backend = self.staged_root / backend_manager.backend_dir.name
+        manifest = install_manifest.load_manifest(staged_backend)
+        if not manifest or install_manifest.fast_validate(staged_backend, manifest):
+            logger.error("Bản cập nhật đã staging không toàn vẹn, bỏ qua")
+            self.discard_staged_update()
+            return False
+
+        backend_dir = backend_manager.user_backend_dir
+        trash_reaper = backend_manager.trash_reaper
+        old_dir = None
+        try:
+            if backend_dir.exists():
+                # Bản cũ được đổi tên thẳng vào trash và xóa nền
+                old_dir = trash_reaper.move_to_trash(backend_dir)
+                if old_dir is None:
+                    raise OSError(f"Không thể chuyển {backend_dir} vào trash")
+            try:
+                os.replace(staged_backend, backend_dir)
+            except OSError:
+                # Khôi phục bản cũ nếu không thể đưa bản mới vào
+                if old_dir is not None:
+                    os.replace(old_dir, backend_dir)
+                raise
+        except OSError as e:
+            logger.error(f"Không thể kích hoạt bản cập nhật: {e}")
+            return False
+
+        backend_manager.invalidate_install_cache()
+        self.record_installed(info)
+        self.discard_staged_update()
+        logger.info(f"Đã kích hoạt bản cập nhật backend (etag={info.get('etag')})")
+        return True
+
+    def discard_staged_update(self):
+        if backend_manager.trash_reaper.move_to_trash(self.staging_dir) is None:
+            shutil.rmtree(self.staging_dir, ignore_errors=True)
+
+    # --- Kiểm tra và tải nền ---
+
+    def check_for_update(self) -> Optional[dict]:
+        """HEAD có điều kiện; trả về thông tin gói mới hoặc None"""
+        installed = self._load_state().get("installed") or {}
+        headers = {}
+        if installed.get("etag"):
+            headers["If-None-Match"] = installed["etag"]
+        if installed.get("last_modified"):
+            headers["If-Modified-Since"] = installed["last_modified"]
+
+        response = requests.head(
+            self.package_url, headers=headers, timeout=10, allow_redirects=True
+        )
+        if response.status_code == 304:
+            return None
+        response.raise_for_status()
+
+        remote = {
+            "url": self.package_url,
+            "etag": response.headers.get("etag"),
+            "last_modified": response.headers.get("last-modified"),
+            "size": int(response.headers.get("content-length", 0)),
+        }
+
+        if not installed:
+            # Bản cài có từ trước khi có updater: lấy phiên bản hiện tại làm mốc
+            logger.info("Chưa có thông tin phiên bản backend, ghi nhận bản hiện tại")
+            self.record_installed(remote)
+            return None
+
+        same_etag = remote["etag"] and remote["etag"] == installed.get("etag")
+        same_date = (
+            not remote["etag"]
+            and remote["last_modified"] == installed.get("last_modified")
+            and remote["size"] == installed.get("size")
+        )
+        if same_etag or same_date:
+            return None
+        return remote
+
+    def _partial_etag(self) -> Optional[str]:
+        try:
+            meta = json.loads(self.staged_meta_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        return meta.get("etag")
+
+    def _discard_partial(self):
+        self.staged_zip_path.unlink(missing_ok=True)
+        self.staged_meta_path.unlink(missing_ok=True)
+
+    def fetch_update(self, remote: dict) -> bool:
+        """Tải gói mới với băng thông giới hạn rồi giải nén vào staging"""
+        self.staging_dir.mkdir(parents=True, exist_ok=True)
+        offset = (
+            self.staged_zip_path.stat().st_size if self.staged_zip_path.exists() else 0
+        )
+        partial_etag = self._partial_etag()
+        if offset and (not partial_etag or partial_etag != remote.get("etag")):
+            # Phần đang tải dở thuộc phiên bản khác (hoặc không rõ phiên bản)
+            logger.info("Gói trên server đã đổi, tải lại bản cập nhật từ đầu")
+            self._discard_partial()
+            offset = 0
+        headers = {}
+        if offset:
+            # Server chỉ trả phần còn lại nếu gói vẫn là phiên bản đang tải dở
+            headers["Range"] = f"bytes={offset}-"
+            headers["If-Range"] = partial_etag
+
+        limit_bps = self.bandwidth_limit_kbps * 1024
+        with requests.get(
+            self.package_url, headers=headers, stream=True, timeout=60
+        ) as response:
+            if response.status_code == 416 and offset:
+                # Phần tải dở không khớp kích thước gói: tải lại từ đầu
+                logger.info("Server từ chối Range của bản tải dở, tải lại từ đầu")
+                self._discard_partial()
+                return self.fetch_update(remote)
+            response.raise_for_status()
+            mode = "ab" if response.status_code == 206 else "wb"
+            if mode == "wb":
+                meta_tmp = self.staged_meta_path.with_suffix(".tmp")
+                meta_tmp.write_text(
+                    json.dumps({"etag": remote.get("etag")}), encoding="utf-8"
+                )
+                os.replace(meta_tmp, self.staged_meta_path)
+
+            started = time.monotonic()
+            received = 0
+            with open(self.staged_zip_path, mode) as f:
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    if self._stop_event.is_set():
+                        logger.info("Dừng tải bản cập nhật, sẽ tiếp tục lần sau")
+                        return False
+                    f.write(chunk)
+                    received += len(chunk)
+                    if limit_bps:
+                        delay = received / limit_bps - (time.monotonic() - started)
+                        if delay > 0:
+                            self._stop_event.wait(delay)
+
+        if remote.get("size") and self.staged_zip_path.stat().st_size != remote["size"]:
+            logger.warning("Bản cập nhật tải về không đủ dung lượng, tải lại sau")
+            self._discard_partial()
+            return False
+
+        shutil.rmtree(self.staged_root, ignore_errors=True)
+        try:
+            backend_manager.extract_package(self.staged_zip_path, self.staged_root)
+        except Exception:
+            # Gói hỏng: lần sau tải lại từ đầu thay vì gửi Range của gói đã đủ
+            self._discard_partial()
+            shutil.rmtree(self.staged_root, ignore_errors=True)
+            raise
+        self._discard_partial()
+
+        tmp_path = self.ready_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(remote), encoding="utf-8")
+        os.replace(tmp_path, self.ready_path)
+        logger.info(
+            "Bản cập nhật backend đã sẵn sàng, sẽ kích hoạt ở lần khởi động sau"
+        )
+        return True
+
+    def start(self):
+        """Chạy kiểm tra cập nhật định kỳ trên thread nền"""
+        if self._thread and self._thread.is_alive():
+            return
+        if backend_manager.shared_mode:
+            logger.info(
+                "Đang dùng bản cài dùng chung, cập nhật do quản trị viên thực hiện"
+            )
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="BackendUpdater", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        if self._stop_event.wait(self.initial_delay):
+            return
+        while not self._stop_event.is_set():
+            if not self.has_staged_update():
+                try:
+                    remote = self.check_for_update()
+                    if remote:
+                        logger.info(f"Có bản cập nhật backend mới: {remote}")
+                        self.fetch_update(remote)
+                except requests.exceptions.RequestException as e:
+                    logger.info(f"Không kiểm tra được cập nhật backend: {e}")
+                except Exception as e:
+                    logger.error(f"Lỗi khi tải bản cập nhật backend: {e}")
+            self._stop_event.wait(self.check_interval)
+
+
+# Singleton instance
+backend_updater = BackendUpdater()
+backend_updater.apply_settings(settings_store.settings)
+settings_store.subscribe(backend_updater.apply_settings)
@@ -0,0 +1,171 @@
+"""Microbenchmark vòng lặp tải: iter_content(8192) so với readinto + buffer thích nghi.
+
+Server HTTP chạy ở process riêng (python -m http.server) để CPU của server
+không lẫn vào số đo. Đo CPU của riêng thread tải (time.thread_time), quy ra
+CPU giây / GB và MB/s:
+
+    python benchmarks/bench_download.py --size-mb 1024 --runs 3
+"""
+
+import argparse
+import json
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import requests
+
+BENCH_DIR = Path(__file__).parent.resolve()
+REPO_DIR = BENCH_DIR.parent
+sys.path.insert(0, str(REPO_DIR))
+
+from bench_install import git_commit  # noqa: E402
+import download_stream  # noqa: E402
+
+PACKAGE_NAME = "package.bin"
+
+
+def legacy_download(url: str, out_path: Path) -> int:
+    """Vòng lặp cũ của BackendManager.download_backend"""
+    received = 0
+    response = requests.get(url, stream=True, timeout=600)
+    response.raise_for_status()
+    total_size = int(response.headers.get("content-length", 0))
+    with open(out_path, "wb") as f:
+        for chunk in response.iter_content(chunk_size=8192):
+            if chunk:
+                f.write(chunk)
+                received += len(chunk)
+                if total_size > 0:
+                    int(received / total_size * 100)  # progress_callback cũ
+    return received
+
+
+def readinto_download(url: str, out_path: Path) -> int:
+    with requests.get(url, stream=True, timeout=600) as response:
+        response.raise_for_status()
+        total_size = int(response.headers.get("content-length", 0))
+        with open(out_path, "wb") as f:
+            return download_stream.copy_response(
+                response, f, total_size, progress_callback=lambda p: None
+            )
+
+
+VARIANTS = {
+    "iter_content_8k": legacy_download,
+    "readinto_adaptive": readinto_download,
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port: int, timeout: float = 10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket() as sock:
+            if sock.connect_ex(("127.0.0.1", port)) == 0:
+                return
+        time.sleep(0.05)
+    raise RuntimeError("http.server không khởi động được")
+
+
+def write_package(path: Path, size_mb: int):
+    block = os.urandom(8 * 1024 * 1024)
+    remaining = size_mb * 1024 * 1024
+    with open(path, "wb") as f:
+        while remaining > 0:
+            f.write(block[:remaining])
+            remaining -= len(block)
+
+
+def measure(func, url: str, out_path: Path) -> dict:
+    out_path.unlink(missing_ok=True)
+    wall_start = time.perf_counter()
+    cpu_start = time.thread_time()
+    received = func(url, out_path)
+    cpu = time.thread_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+    gb = received / 1024**3
+    return {
+        "bytes": received,
+        "wall_s": round(wall, 3),
+        "cpu_s": round(cpu, 3),
+        "cpu_s_per_gb": round(cpu / gb, 3),
+        "mb_per_s": round(received / (1024 * 1024) / wall, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=512)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--output", type=Path, default=BENCH_DIR / "results")
+    args = parser.parse_args()
+
+    work_dir = Path(tempfile.mkdtemp(prefix="ai_dubbing_dl_"))
+    server = None
+    try:
+        serve_dir = work_dir / "serve"
+        serve_dir.mkdir()
+        print(f"Đang tạo file {args.size_mb} MB...")
+        write_package(serve_dir / PACKAGE_NAME, args.size_mb)
+
+        port = free_port()
+        server = subprocess.Popen(
+            [sys.executable, "-m", "http.server", str(port), "--bind", "127.0.0.1"],
+            cwd=serve_dir,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        wait_for_port(port)
+        url = f"http://127.0.0.1:{port}/{PACKAGE_NAME}"
+
+        runs = []
+        for i in range(args.runs):
+            run = {
+                name: measure(func, url, work_dir / f"{name}.bin")
+                for name, func in VARIANTS.items()
+            }
+            runs.append(run)
+            print(f"Run {i + 1}/{args.runs}: {json.dumps(run)}")
+
+        summary = {
+            name: {
+                key: round(statistics.median(run[name][key] for run in runs), 3)
+                for key in ("wall_s", "cpu_s", "cpu_s_per_gb", "mb_per_s")
+            }
+            for name in VARIANTS
+        }
+        report = {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "platform": sys.platform,
+            "params": {"size_mb": args.size_mb, "runs": args.runs},
+            "runs": runs,
+            "summary": summary,
+        }
+
+        args.output.mkdir(parents=True, exist_ok=True)
+        out_file = args.output / f"download-{report['commit']}-{int(time.time())}.json"
+        out_file.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(json.dumps(summary, indent=2))
+        print(f"Đã ghi kết quả: {out_file}")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+"""Benchmark pipeline cài đặt backend: download -> extract -> validate -> worker.
+
+Chạy từ thư mục gốc của repo:
+
+    python benchmarks/bench_install.py --size-mb 256 --files 20000 --bandwidth-mbps 100
+    python benchmarks/bench_install.py --compare results/old.json results/new.json
+
+Kết quả (MB/s, files/s, peak RSS, CPU) được ghi ra JSON kèm commit hiện tại
+để so sánh giữa các commit.
+"""
+
+import argparse
+import dataclasses
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import psutil
+
+BENCH_DIR = Path(__file__).parent.resolve()
+REPO_DIR = BENCH_DIR.parent
+sys.path.insert(0, str(REPO_DIR))
+
+from package_server import PackageServer, build_synthetic_package  # noqa: E402
+
+PACKAGE_NAME = "ai_service_package.zip"
+
+
+class PhaseMeter:
+    """Đo wall time, CPU time và peak RSS của process trong một phase"""
+
+    def __init__(self, name: str, sample_interval: float = 0.02):
+        self.name = name
+        self.sample_interval = sample_interval
+        self.process = psutil.Process(os.getpid())
+        self.result = {}
+        self._stop = threading.Event()
+        self._peak_rss = 0
+
+    def _sample_rss(self):
+        while not self._stop.is_set():
+            self._peak_rss = max(self._peak_rss, self.process.memory_info().rss)
+            self._stop.wait(self.sample_interval)
+
+    def __enter__(self):
+        self._peak_rss = self.process.memory_info().rss
+        self._cpu_start = self.process.cpu_times()
+        self._sampler = threading.Thread(target=self._sample_rss, daemon=True)
+        self._sampler.start()
+        self._wall_start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter() - self._wall_start
+        self._stop.set()
+        self._sampler.join()
+        cpu_end = self.process.cpu_times()
+        cpu = (cpu_end.user - self._cpu_start.user) + (
+            cpu_end.system - self._cpu_start.system
+        )
+        self.result = {
+            "wall_s": round(wall, 4),
+            "cpu_s": round(cpu, 4),
+            "cpu_percent": round(cpu / wall * 100, 1) if wall > 0 else 0.0,
+            "peak_rss_mb": round(self._peak_rss / (1024 * 1024), 1),
+        }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def count_files(path: Path) -> int:
+    return sum(len(files) for _, _, files in os.walk(path))
+
+
+def run_once(manager, url: str, package_size: int, validate_rounds: int) -> dict:
+    """Chạy download, extract, validate một lần trên thư mục app data trống"""
+    shutil.rmtree(manager.app_data_dir, ignore_errors=True)
+    manager.ensure_app_data_dir()
+    result = {}
+
+    with PhaseMeter("download") as meter:
+        ok = manager.download_backend(url)
+    result["download"] = dict(meter.result, ok=ok)
+    if ok:
+        result["download"]["mb_per_s"] = round(
+            package_size / (1024 * 1024) / meter.result["wall_s"], 2
+        )
+    else:
+        return result
+
+    with PhaseMeter("extract") as meter:
+        ok = manager.extract_backend()
+    files = count_files(manager.backend_dir) if ok else 0
+    extracted_mb = (
+        sum(p.stat().st_size for p in manager.backend_dir.rglob("*") if p.is_file())
+        / (1024 * 1024)
+        if ok
+        else 0
+    )
+    result["extract"] = dict(
+        meter.result,
+        ok=ok,
+        files=files,
+        files_per_s=round(files / meter.result["wall_s"], 1),
+        mb_per_s=round(extracted_mb / meter.result["wall_s"], 2),
+    )
+
+    with PhaseMeter("validate") as meter:
+        # validate_install() không dùng cache, đo đúng chi phí một lần khởi động
+        valid = all(manager.validate_install() for _ in range(validate_rounds))
+    result["validate"] = dict(
+        meter.result,
+        ok=valid,
+        ms_per_check=round(meter.result["wall_s"] * 1000 / validate_rounds, 3),
+    )
+    return result
+
+
+def run_worker_once(url: str) -> dict:
+    """Chạy BackendSetupWorker headless, không khởi động backend thật
+
+    start_backend được thay bằng hàm trả về True ngay, nên phase này chỉ
+    đo phần cài đặt của worker (gồm cả chi phí signal/progress).
+    """
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtCore import QCoreApplication
+    from backend_manager import backend_manager
+    import ui.main_window as main_window
+
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv[:1])
+
+    shutil.rmtree(backend_manager.app_data_dir, ignore_errors=True)
+    original_start = backend_manager.start_backend
+    backend_manager.start_backend = lambda status_callback=None: True
+
+    progress_events = []
+    outcome = {}
+    try:
+        worker = main_window.BackendSetupWorker()
+        worker.download_url = url
+        worker.progress.connect(lambda message, p: progress_events.append(p))
+        worker.finished.connect(lambda ok, message: outcome.update(ok=ok))
+        with PhaseMeter("worker") as meter:
+            # Gọi run() trực tiếp: signal được xử lý đồng bộ trên cùng thread
+            worker.run()
+        app.processEvents()
+    finally:
+        backend_manager.start_backend = original_start
+
+    return dict(
+        meter.result,
+        ok=outcome.get("ok", False),
+        progress_events=len(progress_events),
+    )
+
+
+def summarize(runs: list) -> dict:
+    """Trung vị từng metric số của từng phase"""
+    summary = {}
+    for run in runs:
+        for phase, metrics in run.items():
+            for key, value in metrics.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    summary.setdefault(phase, {}).setdefault(key, []).append(value)
+    return {
+        phase: {key: round(statistics.median(v), 4) for key, v in metrics.items()}
+        for phase, metrics in summary.items()
+    }
+
+
+def compare(old_path: Path, new_path: Path):
+    old = json.loads(Path(old_path).read_text(encoding="utf-8"))
+    new = json.loads(Path(new_path).read_text(encoding="utf-8"))
+    print(f"{'phase.metric':40} {old['commit']:>12} {new['commit']:>12} {'change':>9}")
+    for phase, metrics in new["summary"].items():
+        for key, value in metrics.items():
+            before = old["summary"].get(phase, {}).get(key)
+            if before is None:
+                continue
+            change = f"{(value - before) / before * 100:+.1f}%" if before else "n/a"
+            print(f"{phase + '.' + key:40} {before:>12} {value:>12} {change:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=64)
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--compressible", type=float, default=0.5)
+    parser.add_argument(
+        "--bandwidth-mbps", type=float, default=0, help="0 = không giới hạn"
+    )
+    parser.add_argument("--drop-probability", type=float, default=0.0)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--validate-rounds", type=int, default=100)
+    parser.add_argument("--no-worker", action="store_true")
+    parser.add_argument(
+        "--package-mode",
+        choices=["extract", "lazy"],
+        default="extract",
+        help="lazy = chạy thẳng từ gói (chỉ giải nén phần cần cho khởi động)",
+    )
+    parser.add_argument("--output", type=Path, default=BENCH_DIR / "results")
+    parser.add_argument("--compare", nargs=2, type=Path, metavar=("OLD", "NEW"))
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    work_dir = Path(tempfile.mkdtemp(prefix="ai_dubbing_bench_"))
+    # BackendManager đọc APPDATA lúc import nên phải đặt trước
+    os.environ["APPDATA"] = str(work_dir / "appdata")
+    from backend_manager import BackendManager
+
+    try:
+        print(f"Đang tạo package {args.size_mb} MB / {args.files} files...")
+        package = build_synthetic_package(
+            work_dir / "server" / PACKAGE_NAME,
+            total_size_mb=args.size_mb,
+            file_count=args.files,
+            compressible_ratio=args.compressible,
+        )
+        package_size = package.stat().st_size
+
+        runs = []
+        with PackageServer(
+            package.parent,
+            bandwidth_mbps=args.bandwidth_mbps,
+            drop_probability=args.drop_probability,
+        ) as server:
+            url = server.url_for(PACKAGE_NAME)
+            for i in range(args.runs):
+                manager = BackendManager()
+                manager.settings = dataclasses.replace(
+                    manager.settings, package_mode=args.package_mode
+                )
+                run = run_once(manager, url, package_size, args.validate_rounds)
+                if not args.no_worker:
+                    run["worker"] = run_worker_once(url)
+                runs.append(run)
+                print(f"Run {i + 1}/{args.runs}: {json.dumps(run)}")
+
+        report = {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "platform": sys.platform,
+            "params": {
+                "size_mb": args.size_mb,
+                "files": args.files,
+                "package_bytes": package_size,
+                "compressible": args.compressible,
+                "bandwidth_mbps": args.bandwidth_mbps,
+                "drop_probability": args.drop_probability,
+                "package_mode": args.package_mode,
+            },
+            "runs": runs,
+            "summary": summarize(runs),
+        }
+
+        args.output.mkdir(parents=True, exist_ok=True)
+        out_file = args.output / f"install-{report['commit']}-{int(time.time())}.json"
+        out_file.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(json.dumps(report["summary"], indent=2))
+        print(f"Đã ghi kết quả: {out_file}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""Đo thời gian khởi động desktop app (launch-to-first-paint) cho các bản build.
+
+App ghi mốc thời gian vào file marker khi vẽ frame đầu tiên (xem
+FirstPaintProbe trong main.py) rồi tự thoát. Harness đo cho mỗi bản build:
+
+  - launch_to_main_s: từ lúc spawn tới khi code Python của app bắt đầu chạy
+    (với onefile gồm cả thời gian bootloader giải nén vào thư mục tạm)
+  - launch_to_window_s: tới khi MainWindow.show() trả về
+  - launch_to_first_paint_s: tới frame đầu tiên
+
+App chạy với APPDATA tạm đã có sẵn backend giả (benchmarks/fake_backend)
+nên không tải/giải nén backend thật và không đụng dữ liệu của user; backend
+giả còn sống sau mỗi lần chạy bị dừng trước lần kế tiếp.
+
+Cold run chạy bản copy mới của build (file chưa nằm trong cache của OS;
+với --drop-caches trên Linux chạy bằng root thì xóa hẳn page cache),
+warm run chạy lại cùng vị trí nhiều lần:
+
+    python build_scripts/build_desktop.py --mode both
+    python benchmarks/bench_launch.py --runs 5
+    python benchmarks/bench_launch.py --target src="python main.py" --runs 3
+"""
+
+import argparse
+import json
+import os
+import shlex
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import psutil
+
+BENCH_DIR = Path(__file__).parent.resolve()
+REPO_DIR = BENCH_DIR.parent
+sys.path.insert(0, str(REPO_DIR))
+
+from bench_install import git_commit  # noqa: E402
+from bench_startup import free_port, layout_backend_tree, read_events  # noqa: E402
+
+EXE_NAME = "AI_Video_Dubbing.exe" if os.name == "nt" else "AI_Video_Dubbing"
+DEFAULT_TARGETS = {
+    "onefile": REPO_DIR / "dist" / EXE_NAME,
+    "onedir": REPO_DIR / "dist" / "onedir" / "AI_Video_Dubbing" / EXE_NAME,
+}
+# Backend giả sẵn sàng nhanh: setup không nằm trên đường đo
+STUB_BACKEND_CONFIG = {"boot_delay_s": 0.2, "loading_s": 0.5}
+
+
+def prepare_appdata(work_dir: Path, name: str) -> dict:
+    """Tạo APPDATA tạm đã cài sẵn backend giả, trả về biến môi trường cho app"""
+    appdata = Path(tempfile.mkdtemp(prefix=f"appdata_{name}_", dir=work_dir))
+    data_dir = appdata / "ai_dubbing"
+    layout_backend_tree(data_dir / "client_backend", STUB_BACKEND_CONFIG)
+    port = free_port()
+    settings = {
+        "version": 1,
+        # install_mode=user: không dùng bản cài dùng chung của máy (nếu có)
+        "settings": {"backend_port": port, "install_mode": "user"},
+    }
+    (data_dir / "settings.json").write_text(json.dumps(settings), encoding="utf-8")
+    return {"APPDATA": str(appdata), "AI_DUBBING_FAKE_PORT": str(port)}
+
+
+def stop_stub_backend(app_env: dict):
+    """Dừng backend giả mà app đã khởi động (app không dừng backend khi thoát)"""
+    backend_dir = Path(app_env["APPDATA"]) / "ai_dubbing" / "client_backend"
+    for event in read_events(backend_dir):
+        if event["event"] != "launch":
+            continue
+        try:
+            process = psutil.Process(event["pid"])
+            process.kill()
+            process.wait(timeout=5)
+        except (psutil.NoSuchProcess, psutil.TimeoutExpired):
+            pass
+
+
+def drop_caches() -> bool:
+    """Xóa page cache (Linux, cần root); trả về False nếu không làm được"""
+    try:
+        subprocess.run(["sync"], check=True)
+        Path("/proc/sys/vm/drop_caches").write_text("3\n")
+        return True
+    except (OSError, subprocess.CalledProcessError):
+        return False
+
+
+def fresh_copy(command: list, work_dir: Path) -> list:
+    """Copy bản build sang vị trí mới để file chưa có trong cache"""
+    exe = Path(command[0])
+    if not exe.is_file():
+        return command
+    target_dir = Path(tempfile.mkdtemp(prefix="cold_", dir=work_dir))
+    # onedir: copy cả thư mục; onefile: chỉ một file
+    if (exe.parent / "_internal").exists():
+        shutil.copytree(exe.parent, target_dir / exe.parent.name)
+        return [str(target_dir / exe.parent.name / exe.name)] + command[1:]
+    shutil.copy2(exe, target_dir / exe.name)
+    return [str(target_dir / exe.name)] + command[1:]
+
+
+def launch_once(
+    command: list, cwd: Path, marker: Path, timeout: float, app_env: dict
+) -> dict:
+    marker.unlink(missing_ok=True)
+    env = dict(
+        os.environ,
+        **app_env,
+        AI_DUBBING_STARTUP_MARKER=str(marker),
+        AI_DUBBING_EXIT_AFTER_PAINT="1",
+    )
+    started = time.time()
+    process = subprocess.Popen(command, cwd=str(cwd), env=env)
+    try:
+        process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+    exited = time.time()
+    stop_stub_backend(app_env)
+
+    if not marker.exists():
+        return {"ok": False, "exit_code": process.returncode}
+    times = json.loads(marker.read_text(encoding="utf-8"))
+    return {
+        "ok": True,
+        "launch_to_main_s": round(times["main_entered"] - started, 4),
+        "launch_to_window_s": round(times["window_shown"] - started, 4),
+        "launch_to_first_paint_s": round(times["first_paint"] - started, 4),
+        "launch_to_exit_s": round(exited - started, 4),
+    }
+
+
+def bench_target(name, command, runs, timeout, work_dir, use_drop_caches) -> dict:
+    cwd = Path(command[0]).parent if Path(command[0]).is_file() else REPO_DIR
+    marker = work_dir / f"{name}.marker.json"
+    app_env = prepare_appdata(work_dir, name)
+
+    cache_dropped = use_drop_caches and drop_caches()
+    cold_command = command if cache_dropped else fresh_copy(command, work_dir)
+    cold = launch_once(cold_command, cwd, marker, timeout, app_env)
+    print(f"{name} cold: {json.dumps(cold)}")
+
+    warm = []
+    for i in range(runs):
+        result = launch_once(command, cwd, marker, timeout, app_env)
+        warm.append(result)
+        print(f"{name} warm {i + 1}/{runs}: {json.dumps(result)}")
+
+    ok_runs = [r for r in warm if r["ok"]]
+    summary = (
+        {
+            key: round(statistics.median(r[key] for r in ok_runs), 4)
+            for key in ok_runs[0]
+            if key != "ok"
+        }
+        if ok_runs
+        else {}
+    )
+    return {
+        "command": command,
+        "cold_method": "drop_caches" if cache_dropped else "fresh_copy",
+        "cold": cold,
+        "warm": warm,
+        "warm_median": summary,
+    }
+
+
+def parse_target(value: str) -> tuple:
+    name, _, command = value.partition("=")
+    if not command:
+        raise argparse.ArgumentTypeError("Dạng đúng: name=command")
+    return name, shlex.split(command, posix=os.name != "nt")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--target",
+        type=parse_target,
+        action="append",
+        help="name=command; mặc định là dist/ (onefile) và dist/onedir/",
+    )
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--drop-caches", action="store_true")
+    parser.add_argument("--output", type=Path, default=BENCH_DIR / "results")
+    args = parser.parse_args()
+
+    targets = dict(args.target or [])
+    if not targets:
+        targets = {
+            name: [str(path)] for name, path in DEFAULT_TARGETS.items() if path.exists()
+        }
+    if not targets:
+        print("Không tìm thấy bản build, chạy build_scripts/build_desktop.py trước")
+        sys.exit(1)
+
+    work_dir = Path(tempfile.mkdtemp(prefix="ai_dubbing_launch_"))
+    try:
+        results = {
+            name: bench_target(
+                name, command, args.runs, args.timeout, work_dir, args.drop_caches
+            )
+            for name, command in targets.items()
+        }
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "platform": sys.platform,
+        "params": {"runs": args.runs, "timeout": args.timeout},
+        "targets": results,
+    }
+
+    print(f"\n{'target':12} {'cold paint':>12} {'warm paint':>12} {'warm main':>12}")
+    for name, result in results.items():
+        cold = result["cold"].get("launch_to_first_paint_s", "n/a")
+        warm = result["warm_median"].get("launch_to_first_paint_s", "n/a")
+        main_s = result["warm_median"].get("launch_to_main_s", "n/a")
+        print(f"{name:12} {cold:>12} {warm:>12} {main_s:>12}")
+
+    args.output.mkdir(parents=True, exist_ok=True)
+    out_file = args.output / f"launch-{report['commit']}-{int(time.time())}.json"
+    out_file.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Đã ghi kết quả: {out_file}")
+
+
+if __name__ == "__main__":
+    main()
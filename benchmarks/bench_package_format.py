@@ -0,0 +1,131 @@
+"""So sánh định dạng gói backend: zip (deflate) và .tar.zst (seekable, song song).
+
+Đo dung lượng gói và thời gian giải nén (extract_package, gồm cả ghi
+install manifest) cho zip, tar.zst 1 thread và tar.zst N thread:
+
+    python benchmarks/bench_package_format.py --package python_client_backend.zip
+    python benchmarks/bench_package_format.py --size-mb 256 --files 20000
+
+Không có --package thì dùng gói tổng hợp như bench_install.py.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).parent.resolve()
+REPO_DIR = BENCH_DIR.parent
+sys.path.insert(0, str(REPO_DIR))
+sys.path.insert(0, str(REPO_DIR / "build_scripts"))
+
+from bench_install import PhaseMeter, count_files, git_commit, summarize  # noqa: E402
+from build_backend_package import build_package  # noqa: E402
+from package_server import build_synthetic_package  # noqa: E402
+
+
+def extract_once(manager, package: Path, threads: int) -> dict:
+    shutil.rmtree(manager.app_data_dir, ignore_errors=True)
+    manager.ensure_app_data_dir()
+    manager.extract_threads = threads
+    with PhaseMeter("extract") as meter:
+        backend_dir = manager.extract_package(package, manager.app_data_dir)
+    files = count_files(backend_dir)
+    return dict(
+        meter.result,
+        files=files,
+        files_per_s=round(files / meter.result["wall_s"], 1),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--package", type=Path, help="Gói zip thật của backend")
+    parser.add_argument("--size-mb", type=float, default=64)
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--compressible", type=float, default=0.5)
+    parser.add_argument("--level", type=int, default=9)
+    parser.add_argument("--frame-size-mb", type=int, default=8)
+    parser.add_argument("--threads", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--output", type=Path, default=BENCH_DIR / "results")
+    args = parser.parse_args()
+
+    work_dir = Path(tempfile.mkdtemp(prefix="ai_dubbing_bench_"))
+    # BackendManager đọc APPDATA lúc import nên phải đặt trước
+    os.environ["APPDATA"] = str(work_dir / "appdata")
+    from backend_manager import BackendManager
+
+    try:
+        if args.package:
+            zip_package = args.package.resolve()
+        else:
+            print(f"Đang tạo package {args.size_mb} MB / {args.files} files...")
+            zip_package = build_synthetic_package(
+                work_dir / "package.zip",
+                total_size_mb=args.size_mb,
+                file_count=args.files,
+                compressible_ratio=args.compressible,
+            )
+
+        print("Đang chuyển sang .tar.zst...")
+        zst_package = work_dir / "package.tar.zst"
+        build_stats = build_package(
+            zip_package, zst_package, args.frame_size_mb, args.level
+        )
+
+        variants = {
+            "zip": (zip_package, 0),
+            "tar_zst_1": (zst_package, 1),
+            "tar_zst_parallel": (zst_package, args.threads),
+        }
+        runs = []
+        manager = BackendManager()
+        for i in range(args.runs):
+            run = {
+                name: extract_once(manager, package, threads)
+                for name, (package, threads) in variants.items()
+            }
+            runs.append(run)
+            print(f"Run {i + 1}/{args.runs}: {json.dumps(run)}")
+
+        report = {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "platform": sys.platform,
+            "params": {
+                "package": str(args.package) if args.package else "synthetic",
+                "size_mb": args.size_mb,
+                "files": args.files,
+                "level": args.level,
+                "frame_size_mb": args.frame_size_mb,
+                "threads": args.threads,
+            },
+            "sizes": {
+                "zip_bytes": zip_package.stat().st_size,
+                "tar_zst_bytes": zst_package.stat().st_size,
+                "uncompressed_bytes": build_stats["uncompressed_bytes"],
+                "frames": build_stats["frames"],
+                "build_s": build_stats["seconds"],
+            },
+            "runs": runs,
+            "summary": summarize(runs),
+        }
+
+        args.output.mkdir(parents=True, exist_ok=True)
+        out_file = (
+            args.output / f"package-format-{report['commit']}-{int(time.time())}.json"
+        )
+        out_file.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(json.dumps({"sizes": report["sizes"], **report["summary"]}, indent=2))
+        print(f"Đã ghi kết quả: {out_file}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
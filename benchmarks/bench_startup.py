@@ -0,0 +1,194 @@
+"""Benchmark đường khởi động backend với backend giả lập (fake_backend/run.py).
+
+Không cần GPU hay gói AI thật: harness dựng cây client_backend trong một
+APPDATA tạm, trỏ python_portable tới interpreter hiện tại, rồi đo
+
+  - spawn_to_ready_s: từ lúc gọi start_backend() tới khi trả về True
+  - detection_delay_s: từ lúc backend thực sự sẵn sàng tới lúc client phát hiện
+  - retry_overhead_s: thời gian tiêu tốn cho các lần thử thất bại
+  - shutdown_s: thời gian stop_backend()
+
+    python benchmarks/bench_startup.py --scenario all --runs 3 --poll-interval 0.25
+"""
+
+import argparse
+import json
+import os
+import shutil
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).parent.resolve()
+REPO_DIR = BENCH_DIR.parent
+sys.path.insert(0, str(REPO_DIR))
+
+from bench_install import git_commit  # noqa: E402
+
+FAKE_BACKEND = BENCH_DIR / "fake_backend" / "run.py"
+
+SCENARIOS = {
+    "fast": {"boot_delay_s": 0.2, "loading_s": 0.5},
+    "slow_models": {"boot_delay_s": 0.5, "loading_s": 5.0},
+    "crash_once": {"crash_attempts": 1, "crash_after_s": 0.3, "loading_s": 0.5},
+    "port_conflict": {"loading_s": 0.5, "_blocker_s": 2.0},
+    "partial_never_ready": {"loading_s": 0.5, "partial": {"gpu": "unavailable"}},
+    "slow_shutdown": {"loading_s": 0.5, "shutdown_delay_s": 2.0},
+    "hung_shutdown": {"loading_s": 0.5, "ignore_sigterm": True},
+}
+
+
+def free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def layout_backend_tree(backend_dir: Path, config: dict):
+    """Dựng client_backend giống gói thật nhưng dùng fake run.py"""
+    backend_dir.mkdir(parents=True, exist_ok=True)
+    shutil.copy2(FAKE_BACKEND, backend_dir / "run.py")
+    (backend_dir / "fake_backend.json").write_text(json.dumps(config), encoding="utf-8")
+
+    if os.name == "nt":
+        python_exe = backend_dir / "python_portable" / "python.exe"
+    else:
+        python_exe = backend_dir / "python_portable" / "bin" / "python"
+    python_exe.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        python_exe.symlink_to(sys.executable)
+    except OSError:
+        # Windows không có quyền tạo symlink: dùng bản sao interpreter
+        shutil.copy2(sys.executable, python_exe)
+
+
+def hold_port(port: int, seconds: float) -> threading.Thread:
+    """Chiếm cổng trong một khoảng thời gian để mô phỏng xung đột cổng"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(("127.0.0.1", port))
+    sock.listen()
+
+    def release():
+        time.sleep(seconds)
+        sock.close()
+
+    thread = threading.Thread(target=release, daemon=True)
+    thread.start()
+    return thread
+
+
+def read_events(backend_dir: Path) -> list:
+    events_file = backend_dir / "fake_backend_events.jsonl"
+    if not events_file.exists():
+        return []
+    return [
+        json.loads(line)
+        for line in events_file.read_text(encoding="utf-8").splitlines()
+        if line.strip()
+    ]
+
+
+def run_scenario(name: str, args) -> dict:
+    config = dict(SCENARIOS[name])
+    blocker_s = config.pop("_blocker_s", 0)
+
+    work_dir = Path(tempfile.mkdtemp(prefix="ai_dubbing_startup_"))
+    os.environ["APPDATA"] = str(work_dir)
+    from backend_manager import BackendManager
+
+    manager = BackendManager()
+    manager.backend_port = free_port()
+    manager.ready_poll_interval = args.poll_interval
+    manager.ready_checks = max(1, int(args.ready_timeout / args.poll_interval))
+    manager.startup_delay = args.retry_delay
+    manager.shutdown_timeout = args.shutdown_timeout
+    os.environ["AI_DUBBING_FAKE_PORT"] = str(manager.backend_port)
+
+    layout_backend_tree(manager.backend_dir, config)
+    if blocker_s:
+        hold_port(manager.backend_port, blocker_s)
+
+    try:
+        started = time.time()
+        ok = manager.start_backend()
+        detected = time.time()
+
+        stop_started = time.perf_counter()
+        manager.stop_backend()
+        shutdown_s = time.perf_counter() - stop_started
+
+        events = read_events(manager.backend_dir)
+        launches = [e["t"] for e in events if e["event"] == "launch"]
+        ready = [e["t"] for e in events if e["event"] == "ready"]
+
+        result = {
+            "ok": ok,
+            "attempts": len(launches),
+            "spawn_to_ready_s": round(detected - started, 3),
+            "shutdown_s": round(shutdown_s, 3),
+        }
+        if launches:
+            result["first_spawn_latency_s"] = round(launches[0] - started, 3)
+            result["retry_overhead_s"] = round(launches[-1] - launches[0], 3)
+        if ok and ready:
+            result["detection_delay_s"] = round(detected - ready[-1], 3)
+        return result
+    finally:
+        manager.stop_backend()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenario", default="all", choices=["all", *SCENARIOS.keys()])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    parser.add_argument("--ready-timeout", type=float, default=10.0)
+    parser.add_argument("--retry-delay", type=float, default=5.0)
+    parser.add_argument("--shutdown-timeout", type=float, default=15.0)
+    parser.add_argument("--output", type=Path, default=BENCH_DIR / "results")
+    args = parser.parse_args()
+
+    names = list(SCENARIOS) if args.scenario == "all" else [args.scenario]
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "platform": sys.platform,
+        "params": {
+            "poll_interval": args.poll_interval,
+            "ready_timeout": args.ready_timeout,
+            "retry_delay": args.retry_delay,
+            "shutdown_timeout": args.shutdown_timeout,
+        },
+        "runs": {},
+        "summary": {},
+    }
+
+    for name in names:
+        runs = []
+        for i in range(args.runs):
+            result = run_scenario(name, args)
+            runs.append(result)
+            print(f"{name} {i + 1}/{args.runs}: {json.dumps(result)}")
+        report["runs"][name] = runs
+        report["summary"][name] = {
+            key: round(statistics.median(r[key] for r in runs if key in r), 3)
+            for key in runs[0]
+            if isinstance(runs[0][key], (int, float))
+            and not isinstance(runs[0][key], bool)
+            and all(key in r for r in runs)
+        }
+
+    args.output.mkdir(parents=True, exist_ok=True)
+    out_file = args.output / f"startup-{report['commit']}-{int(time.time())}.json"
+    out_file.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(json.dumps(report["summary"], indent=2))
+    print(f"Đã ghi kết quả: {out_file}")
+
+
+if __name__ == "__main__":
+    main()
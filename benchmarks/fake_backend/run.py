@@ -0,0 +1,132 @@
+"""Backend AI giả lập cho benchmark/test đường khởi động của BackendManager.
+
+Được harness đặt vào client_backend/run.py. Hành vi đọc từ file
+fake_backend.json cùng thư mục (nếu có):
+
+    {
+        "port": 17199,              # hoặc biến môi trường AI_DUBBING_FAKE_PORT
+        "boot_delay_s": 0.5,        # thời gian trước khi mở cổng
+        "loading_s": 2.0,           # thời gian trả về trạng thái chưa sẵn sàng
+        "partial": {"gpu": "unavailable"},  # trường bị kẹt mãi ở giá trị này
+        "crash_attempts": 1,        # N lần chạy đầu tiên sẽ crash
+        "crash_after_s": 0.2,
+        "shutdown_delay_s": 0.1,    # thời gian dọn dẹp khi nhận SIGTERM
+        "ignore_sigterm": false     # mô phỏng backend treo khi dừng
+    }
+
+Mỗi sự kiện (launch, listening, ready, crash, port_conflict, shutdown)
+được ghi kèm timestamp vào fake_backend_events.jsonl để harness đo độ trễ.
+"""
+
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.resolve()
+CONFIG_FILE = BASE_DIR / "fake_backend.json"
+# Bản cài dùng chung chỉ đọc: ghi vào overlay của user (AI_DUBBING_DATA_DIR)
+DATA_DIR = Path(os.getenv("AI_DUBBING_DATA_DIR", BASE_DIR))
+EVENTS_FILE = DATA_DIR / "fake_backend_events.jsonl"
+ATTEMPTS_FILE = DATA_DIR / "fake_backend_attempts"
+
+
+def log_event(event: str, **extra):
+    record = {"event": event, "t": time.time(), "pid": os.getpid(), **extra}
+    with open(EVENTS_FILE, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+
+
+def load_config() -> dict:
+    if CONFIG_FILE.exists():
+        return json.loads(CONFIG_FILE.read_text(encoding="utf-8"))
+    return {}
+
+
+def next_attempt() -> int:
+    attempt = int(ATTEMPTS_FILE.read_text()) + 1 if ATTEMPTS_FILE.exists() else 1
+    ATTEMPTS_FILE.write_text(str(attempt))
+    return attempt
+
+
+def main():
+    config = load_config()
+    port = int(os.getenv("AI_DUBBING_FAKE_PORT", config.get("port", 17199)))
+    attempt = next_attempt()
+    log_event("launch", attempt=attempt)
+
+    if attempt <= config.get("crash_attempts", 0):
+        time.sleep(config.get("crash_after_s", 0.2))
+        log_event("crash", attempt=attempt)
+        sys.exit(1)
+
+    time.sleep(config.get("boot_delay_s", 0.0))
+
+    ready_at = time.monotonic() + config.get("loading_s", 0.0)
+    partial = config.get("partial", {})
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.startswith("/v1/check/status"):
+                loaded = time.monotonic() >= ready_at
+                body = {
+                    "status": "ready" if loaded else "loading",
+                    "gpu": "available",
+                    "models": "loaded" if loaded else "loading",
+                }
+                body.update(partial)
+            elif self.path.startswith("/v1/check/metrics"):
+                body = {"queue_depth": 0, "attempt": attempt}
+            else:
+                self.send_error(404)
+                return
+
+            data = json.dumps(body).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    try:
+        server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    except OSError as e:
+        log_event("port_conflict", port=port, error=str(e))
+        sys.exit(2)
+
+    log_event("listening", port=port)
+
+    # Thời điểm backend thực sự sẵn sàng, độc lập với chu kỳ polling của client
+    if not partial:
+        ready_timer = threading.Timer(
+            max(0.0, ready_at - time.monotonic()), log_event, args=("ready",)
+        )
+        ready_timer.daemon = True
+        ready_timer.start()
+
+    def handle_sigterm(signum, frame):
+        if config.get("ignore_sigterm"):
+            log_event("sigterm_ignored")
+            return
+        log_event("sigterm")
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, handle_sigterm)
+    if hasattr(signal, "SIGBREAK"):
+        signal.signal(signal.SIGBREAK, handle_sigterm)
+
+    server.serve_forever(poll_interval=0.05)
+    time.sleep(config.get("shutdown_delay_s", 0.0))
+    server.server_close()
+    log_event("shutdown")
+
+
+if __name__ == "__main__":
+    main()
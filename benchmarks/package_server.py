@@ -0,0 +1,254 @@
+"""Server HTTP cục bộ đóng vai trò package server cho benchmark.
+
+Tạo các file zip tổng hợp có cấu trúc giống ai_service_package.zip
+(client_backend/run.py, python_portable/...) và phục vụ chúng với
+băng thông giới hạn và khả năng ngắt kết nối giữa chừng.
+"""
+
+import os
+import random
+import threading
+import time
+import zipfile
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+
+BACKEND_DIR_NAME = "client_backend"
+
+
+def build_synthetic_package(
+    output_path: Path,
+    total_size_mb: float = 64,
+    file_count: int = 2000,
+    compressible_ratio: float = 0.5,
+    compression: int = zipfile.ZIP_DEFLATED,
+    seed: int = 1234,
+) -> Path:
+    """Tạo zip tổng hợp có tổng dung lượng và số file cho trước
+
+    compressible_ratio: tỉ lệ file có nội dung lặp (nén tốt, giống source .py);
+    phần còn lại là dữ liệu ngẫu nhiên (giống .dll/.pyd/model).
+    """
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+
+    total_bytes = int(total_size_mb * 1024 * 1024)
+    file_count = max(file_count, 2)
+    per_file = max(total_bytes // file_count, 1)
+
+    python_rel = (
+        "python_portable/python.exe"
+        if os.name == "nt"
+        else "python_portable/bin/python"
+    )
+
+    with zipfile.ZipFile(output_path, "w", compression=compression) as zf:
+        zf.writestr(f"{BACKEND_DIR_NAME}/run.py", "print('synthetic backend')\n")
+        zf.writestr(f"{BACKEND_DIR_NAME}/{python_rel}", b"\0" * 1024)
+
+        for i in range(file_count - 2):
+            folder = (
+                f"{BACKEND_DIR_NAME}/python_portable/Lib/site-packages/pkg_{i % 50}"
+            )
+            if rng.random() < compressible_ratio:
+                name = f"{folder}/module_{i}.py"
+                line = f"value_{i} = {i}  # synthetic source line\n".encode()
+                data = (line * (per_file // len(line) + 1))[:per_file]
+            else:
+                name = f"{folder}/blob_{i}.bin"
+                data = rng.randbytes(per_file)
+            zf.writestr(name, data)
+
+    return output_path
+
+
+def parse_range(header: str, size: int):
+    """Phân tích header Range một khoảng (RFC 9110)
+
+    Trả về (start, end) đã giới hạn trong file, () nếu khoảng không thỏa mãn
+    được (416) hoặc None nếu header không hợp lệ/nhiều khoảng (trả cả file).
+    """
+    if not header.startswith("bytes=") or "," in header:
+        return None
+    first, sep, last = header[6:].strip().partition("-")
+    try:
+        if not sep or (not first and not last):
+            return None
+        if not first:
+            # bytes=-N: N byte cuối file
+            suffix = int(last)
+            if suffix <= 0 or size == 0:
+                return ()
+            return max(size - suffix, 0), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if last and start > end:
+        return None
+    if start >= size:
+        return ()
+    return start, min(end, size - 1)
+
+
+class _PackageRequestHandler(BaseHTTPRequestHandler):
+    # Được gán bởi PackageServer
+    package_dir: Path = None
+    bandwidth_bytes_per_s: int = 0
+    drop_probability: float = 0.0
+    drop_after_ratio: float = 0.5
+    chunk_size: int = 64 * 1024
+
+    def log_message(self, format, *args):
+        pass
+
+    def _resolve(self):
+        name = self.path.split("?", 1)[0].rsplit("/", 1)[-1]
+        path = self.package_dir / name
+        return path if name and path.is_file() else None
+
+    def _send_validators(self, path: Path):
+        st = path.stat()
+        self.send_header("ETag", f'"{st.st_size:x}-{st.st_mtime_ns:x}"')
+        self.send_header("Last-Modified", self.date_time_string(int(st.st_mtime)))
+
+    def _not_modified(self, path: Path) -> bool:
+        st = path.stat()
+        if self.headers.get("If-None-Match") == f'"{st.st_size:x}-{st.st_mtime_ns:x}"':
+            self.send_response(304)
+            self.end_headers()
+            return True
+        return False
+
+    def do_HEAD(self):
+        path = self._resolve()
+        if path is None:
+            self.send_error(404)
+            return
+        if self._not_modified(path):
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/zip")
+        self.send_header("Content-Length", str(path.stat().st_size))
+        self.send_header("Accept-Ranges", "bytes")
+        self._send_validators(path)
+        self.end_headers()
+
+    def do_GET(self):
+        path = self._resolve()
+        if path is None:
+            self.send_error(404)
+            return
+
+        size = path.stat().st_size
+        start, end = 0, size - 1
+        range_header = self.headers.get("Range")
+        byte_range = parse_range(range_header, size) if range_header else None
+        if byte_range == ():
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{size}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if byte_range:
+            start, end = byte_range
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        else:
+            self.send_response(200)
+
+        length = end - start + 1
+        self._send_validators(path)
+        self.send_header("Content-Type", "application/zip")
+        self.send_header("Content-Length", str(length))
+        self.send_header("Accept-Ranges", "bytes")
+        self.end_headers()
+
+        drop_at = None
+        if self.drop_probability and random.random() < self.drop_probability:
+            drop_at = int(length * self.drop_after_ratio)
+
+        sent = 0
+        started = time.monotonic()
+        try:
+            with open(path, "rb") as f:
+                f.seek(start)
+                while sent < length:
+                    chunk = f.read(min(self.chunk_size, length - sent))
+                    if not chunk:
+                        break
+                    if drop_at is not None and sent + len(chunk) >= drop_at:
+                        # Mô phỏng mất kết nối: đóng socket không gửi hết dữ liệu
+                        self.wfile.write(chunk[: max(drop_at - sent, 0)])
+                        self.close_connection = True
+                        return
+                    self.wfile.write(chunk)
+                    sent += len(chunk)
+
+                    if self.bandwidth_bytes_per_s:
+                        expected = sent / self.bandwidth_bytes_per_s
+                        delay = expected - (time.monotonic() - started)
+                        if delay > 0:
+                            time.sleep(delay)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+class PackageServer:
+    """Package server chạy trên thread nền
+
+    with PackageServer(package_dir, bandwidth_mbps=50) as server:
+        url = server.url_for("ai_service_package.zip")
+    """
+
+    def __init__(
+        self,
+        package_dir: Path,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        bandwidth_mbps: float = 0,
+        drop_probability: float = 0.0,
+        drop_after_ratio: float = 0.5,
+    ):
+        handler = type(
+            "PackageRequestHandler",
+            (_PackageRequestHandler,),
+            {
+                "package_dir": Path(package_dir),
+                # Mbps = megabit/giây (như nhãn --bandwidth-mbps), đổi ra byte/giây
+                "bandwidth_bytes_per_s": int(bandwidth_mbps * 1_000_000 / 8),
+                "drop_probability": drop_probability,
+                "drop_after_ratio": drop_after_ratio,
+            },
+        )
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def port(self) -> int:
+        return self.httpd.server_address[1]
+
+    def url_for(self, name: str) -> str:
+        host = self.httpd.server_address[0]
+        return f"http://{host}:{self.port}/static/{name}"
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self.httpd.serve_forever, name="PackageServer", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,154 @@
+"""Đóng gói backend thành .tar.zst theo zstd seekable format.
+
+Nguồn có thể là gói .zip hiện tại hoặc thư mục client_backend:
+
+    python build_scripts/build_backend_package.py python_client_backend.zip -o ai_service_package.tar.zst
+    python build_scripts/build_backend_package.py dist/client_backend -o ai_service_package.tar.zst
+
+Luồng tar được cắt thành các frame zstd độc lập (mặc định 8 MB), nén song
+song, kèm seek table ở cuối file để desktop app giải nén song song từng frame
+(xem package_format.py). Gói vẫn là zstd hợp lệ nên `zstd -d | tar x` dùng được.
+"""
+
+import argparse
+import os
+import struct
+import sys
+import tarfile
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import zstandard
+
+SEEK_TABLE_SKIPPABLE_MAGIC = 0x184D2A5E
+SEEKABLE_MAGIC = 0x8F92EAB1
+
+
+class SeekableZstdWriter:
+    """File-like chỉ ghi: cắt dữ liệu thành frame, nén song song, ghi theo thứ tự"""
+
+    def __init__(self, output, frame_size: int, level: int, threads: int):
+        self.output = output
+        self.frame_size = frame_size
+        self.level = level
+        self.frames = []
+        self._buffer = bytearray()
+        self._pool = ThreadPoolExecutor(max_workers=threads)
+        self._pending = deque()
+        self._max_in_flight = threads * 2
+
+    def _compress(self, data: bytes) -> tuple:
+        compressed = zstandard.ZstdCompressor(
+            level=self.level, write_content_size=True
+        ).compress(data)
+        return compressed, len(data)
+
+    def _submit(self, data: bytes):
+        self._pending.append(self._pool.submit(self._compress, data))
+        while len(self._pending) >= self._max_in_flight:
+            self._write_done()
+
+    def _write_done(self):
+        compressed, size = self._pending.popleft().result()
+        self.output.write(compressed)
+        self.frames.append((len(compressed), size))
+
+    def write(self, data) -> int:
+        self._buffer += data
+        while len(self._buffer) >= self.frame_size:
+            self._submit(bytes(self._buffer[: self.frame_size]))
+            del self._buffer[: self.frame_size]
+        return len(data)
+
+    def close(self):
+        if self._buffer:
+            self._submit(bytes(self._buffer))
+            self._buffer.clear()
+        while self._pending:
+            self._write_done()
+        self._pool.shutdown()
+
+        entries = b"".join(struct.pack("<II", c, d) for c, d in self.frames)
+        footer = struct.pack("<IBI", len(self.frames), 0, SEEKABLE_MAGIC)
+        table = entries + footer
+        self.output.write(struct.pack("<II", SEEK_TABLE_SKIPPABLE_MAGIC, len(table)))
+        self.output.write(table)
+
+
+def _add_from_zip(tar: tarfile.TarFile, zip_path: Path):
+    with zipfile.ZipFile(zip_path, "r") as zf:
+        for info in zf.infolist():
+            member = tarfile.TarInfo(info.filename.rstrip("/"))
+            member.mtime = int(time.mktime(info.date_time + (0, 0, -1)))
+            unix_mode = info.external_attr >> 16
+            if info.is_dir():
+                member.type = tarfile.DIRTYPE
+                member.mode = 0o755
+                tar.addfile(member)
+                continue
+            member.size = info.file_size
+            member.mode = (unix_mode & 0o777) or 0o644
+            with zf.open(info) as source:
+                tar.addfile(member, source)
+
+
+def build_package(
+    source: Path,
+    output: Path,
+    frame_size_mb: int = 8,
+    level: int = 9,
+    threads: int = 0,
+) -> dict:
+    """Tạo gói .tar.zst từ zip hoặc thư mục, trả về thống kê"""
+    threads = threads or os.cpu_count() or 1
+    started = time.perf_counter()
+    tmp_output = output.with_name(output.name + ".tmp")
+
+    with open(tmp_output, "wb") as f:
+        writer = SeekableZstdWriter(f, frame_size_mb * 1024 * 1024, level, threads)
+        with tarfile.open(fileobj=writer, mode="w|", format=tarfile.PAX_FORMAT) as tar:
+            if source.is_dir():
+                tar.add(source, arcname=source.name)
+            else:
+                _add_from_zip(tar, source)
+        writer.close()
+    os.replace(tmp_output, output)
+
+    return {
+        "frames": len(writer.frames),
+        "uncompressed_bytes": sum(d for _, d in writer.frames),
+        "compressed_bytes": output.stat().st_size,
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "source", type=Path, help="Gói .zip hoặc thư mục client_backend"
+    )
+    parser.add_argument("-o", "--output", type=Path, required=True)
+    parser.add_argument("--frame-size-mb", type=int, default=8)
+    parser.add_argument("--level", type=int, default=9)
+    parser.add_argument("--threads", type=int, default=0)
+    args = parser.parse_args()
+
+    if not args.source.exists():
+        print(f"Không tìm thấy nguồn: {args.source}")
+        sys.exit(1)
+
+    stats = build_package(
+        args.source, args.output, args.frame_size_mb, args.level, args.threads
+    )
+    print(
+        f"Đã tạo {args.output}: {stats['frames']} frames, "
+        f"{stats['uncompressed_bytes'] / 1e6:.1f} MB -> "
+        f"{stats['compressed_bytes'] / 1e6:.1f} MB trong {stats['seconds']}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,51 @@
 import os
 import sys
+import argparse
 import subprocess
 from pathlib import Path
 
+APP_NAME = "AI_Video_Dubbing"
 
-def build_desktop_app():
-    """Build desktop application với PyInstaller"""
+# Module Qt/stdlib app không dùng; loại khỏi bản build để giảm số file phải
+# nạp khi khởi động (QtWebEngine vẫn kéo theo thư viện Qt nó cần)
+EXCLUDED_MODULES = [
+    "PyQt6.QtBluetooth",
+    "PyQt6.QtDesigner",
+    "PyQt6.QtHelp",
+    "PyQt6.QtMultimedia",
+    "PyQt6.QtMultimediaWidgets",
+    "PyQt6.QtNfc",
+    "PyQt6.QtQuick3D",
+    "PyQt6.QtRemoteObjects",
+    "PyQt6.QtSensors",
+    "PyQt6.QtSerialPort",
+    "PyQt6.QtSpatialAudio",
+    "PyQt6.QtSql",
+    "PyQt6.QtTest",
+    "PyQt6.QtTextToSpeech",
+    "tkinter",
+    "unittest",
+    "pydoc",
+    "doctest",
+]
+
+
+def build_desktop_app(mode: str = "onefile", optimize: int = 1):
+    """Build desktop application với PyInstaller
+
+    mode:
+      - onefile: một file exe, giải nén toàn bộ vào thư mục tạm mỗi lần chạy
+      - onedir: thư mục cài đặt (fast-launch), bytecode tối ưu sẵn, bỏ module
+        Qt không dùng; code Python thuần nằm trong archive PYZ và chỉ được
+        nạp khi import
+    """
 
     # Thư mục hiện tại
     current_dir = Path(__file__).parent
     desktop_dir = current_dir.parent / "desktop_app"
     dist_dir = current_dir.parent / "dist"
+    if mode == "onedir":
+        dist_dir = dist_dir / "onedir"
 
     # Di chuyển đến thư mục desktop_app
     os.chdir(desktop_dir)
@@ -21,24 +56,35 @@ def build_desktop_app():
         "-m",
         "PyInstaller",
         "--name",
-        "AI_Video_Dubbing",
+        APP_NAME,
         "--windowed",  # Ứng dụng GUI
-        "--onefile",  # Một file exe
+        "--onefile" if mode == "onefile" else "--onedir",
         "--clean",  # Clean build
+        "--noconfirm",
         "--distpath",
         str(dist_dir),
+        "--workpath",
+        str(current_dir.parent / "build" / mode),
+        "--add-data",
+        f"{desktop_dir / 'ui'}{os.pathsep}ui",
         "--add-data",
-        f"{desktop_dir / 'ui'};ui",
+        f"{desktop_dir / 'backend_manager.py'}{os.pathsep}.",
+        # Được copy vào bản cài backend ở chế độ chạy thẳng từ gói
         "--add-data",
-        f"{desktop_dir / 'backend_manager.py'};.",
+        f"{desktop_dir / 'package_runtime.py'}{os.pathsep}.",
         "--hidden-import",
         "PyQt6.QtWebEngineWidgets",
         "--hidden-import",
         "requests",
-        "main.py",
     ]
+    if mode == "onedir":
+        # Bytecode biên dịch sẵn với -O, không phải tối ưu lại lúc chạy
+        cmd += ["--optimize", str(optimize)]
+        for module in EXCLUDED_MODULES:
+            cmd += ["--exclude-module", module]
+    cmd.append("main.py")
 
-    print("Đang build desktop application...")
+    print(f"Đang build desktop application ({mode})...")
     print(f"Lệnh: {' '.join(cmd)}")
 
     try:
@@ -47,11 +93,15 @@ def build_desktop_app():
         print(result.stdout)
 
         # Hiển thị file exe đã tạo
-        exe_file = dist_dir / "AI_Video_Dubbing.exe"
+        exe_name = f"{APP_NAME}.exe" if os.name == "nt" else APP_NAME
+        exe_file = (
+            dist_dir / exe_name if mode == "onefile" else dist_dir / APP_NAME / exe_name
+        )
         if exe_file.exists():
             print(f"File exe tạo ra: {exe_file}")
         else:
             print("Không tìm thấy file exe!")
+        return exe_file
 
     except subprocess.CalledProcessError as e:
         print("Build thất bại!")
@@ -59,5 +109,23 @@ def build_desktop_app():
         sys.exit(1)
 
 
+def main():
+    parser = argparse.ArgumentParser(description="Build desktop application")
+    parser.add_argument(
+        "--mode",
+        choices=["onefile", "onedir", "both"],
+        default="onefile",
+        help="onedir = bản fast-launch; both = build cả hai để so sánh",
+    )
+    parser.add_argument(
+        "--optimize", type=int, choices=[0, 1, 2], default=1, help="Mức -O cho onedir"
+    )
+    args = parser.parse_args()
+
+    modes = ["onefile", "onedir"] if args.mode == "both" else [args.mode]
+    for mode in modes:
+        build_desktop_app(mode, args.optimize)
+
+
 if __name__ == "__main__":
-    build_desktop_app()
+    main()
@@ -1 +1,6 @@
 DOWNLOAD_AI_SERVICE_PACKAGE = "http://127.0.0.1:17199/static/ai_service_package.zip"
+
+# Scheme nội bộ để web view đọc media đã lồng tiếng trực tiếp từ ổ đĩa
+# Ví dụ: app://media/video_01/dubbed.mp4
+MEDIA_URL_SCHEME = "app"
+MEDIA_URL_HOST = "media"
@@ -0,0 +1,172 @@
+"""Vòng lặp tải tốc độ cao: readinto vào buffer cấp phát sẵn, ghi gộp ra file.
+
+iter_content(8192) tạo một object bytes mới cho mỗi 8 KB; ở tốc độ LAN/
+loopback vài trăm MB/s chi phí Python mỗi chunk trở thành nút cổ chai.
+Ở đây một bytearray duy nhất được cấp phát một lần, socket đọc thẳng vào
+memoryview của nó (readinto, không tạo bytes trung gian) và mỗi lần buffer
+đầy mới ghi ra file một lần. Kích thước phần buffer dùng cho mỗi lượt được
+điều chỉnh theo tốc độ đo được: mạng chậm dùng buffer nhỏ để tiến trình
+cập nhật đều, mạng nhanh dùng buffer lớn để giảm số lần gọi.
+"""
+
+import os
+import time
+import errno
+import logging
+import threading
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+MIN_FILL_BYTES = 64 * 1024
+MAX_FILL_BYTES = 8 * 1024 * 1024
+# Mỗi lượt đọc đầy buffer nên mất khoảng chừng này thời gian
+TARGET_FILL_SECONDS = 0.05
+
+
+class DownloadStopped(Exception):
+    """Tải bị dừng bởi stop_event"""
+
+
+def _body_reader(response) -> Callable:
+    """Hàm readinto(memoryview) -> int đọc body của response
+
+    Body không nén và không chunked: đọc thẳng từ socket (http.client).
+    Ngược lại đọc qua urllib3 để được giải nén/ghép chunk, rồi copy vào buffer.
+    """
+    raw = response.raw
+    fp = getattr(raw, "_fp", None)
+    plain = not response.headers.get("content-encoding") and not getattr(
+        fp, "chunked", False
+    )
+    if plain and fp is not None and hasattr(fp, "readinto"):
+        return fp.readinto
+
+    def readinto(view) -> int:
+        data = raw.read(len(view), decode_content=True)
+        view[: len(data)] = data
+        return len(data)
+
+    return readinto
+
+
+def _next_fill_size(current: int, filled: int, elapsed: float) -> int:
+    """Chọn kích thước lượt đọc kế tiếp theo tốc độ vừa đo (lũy thừa của 2)"""
+    if elapsed <= 0:
+        return min(current * 2, MAX_FILL_BYTES)
+    wanted = filled / elapsed * TARGET_FILL_SECONDS
+    size = MIN_FILL_BYTES
+    while size < wanted and size < MAX_FILL_BYTES:
+        size *= 2
+    return size
+
+
+def preallocate(out_file, offset: int, length: int):
+    """Cấp phát trước dung lượng cho file (giảm phân mảnh, báo sớm khi hết chỗ)"""
+    out_file.flush()
+    if hasattr(os, "posix_fallocate"):
+        try:
+            os.posix_fallocate(out_file.fileno(), offset, length)
+            return
+        except OSError as e:
+            # Một số filesystem không hỗ trợ fallocate, trừ trường hợp hết chỗ
+            if e.errno == errno.ENOSPC:
+                raise
+    # Windows: đặt EOF mới khiến NTFS cấp phát cluster ngay
+    out_file.truncate(offset + length)
+
+
+def copy_response(
+    response,
+    out_file,
+    total_size: int = 0,
+    progress_callback: Optional[Callable] = None,
+    stop_event: Optional[threading.Event] = None,
+    buffer: Optional[bytearray] = None,
+    reserve: bool = True,
+    on_write: Optional[Callable] = None,
+) -> int:
+    """Chép body của response (requests, stream=True) vào out_file"""
+    return copy_stream(
+        _body_reader(response),
+        out_file,
+        total_size,
+        progress_callback,
+        stop_event,
+        buffer,
+        reserve,
+        on_write,
+    )
+
+
+def copy_stream(
+    readinto: Callable,
+    out_file,
+    total_size: int = 0,
+    progress_callback: Optional[Callable] = None,
+    stop_event: Optional[threading.Event] = None,
+    buffer: Optional[bytearray] = None,
+    reserve: bool = True,
+    on_write: Optional[Callable] = None,
+) -> int:
+    """Chép dữ liệu từ readinto(memoryview) vào out_file tại vị trí hiện tại
+
+    - total_size > 0: đọc tối đa total_size bytes; nếu reserve, file được
+      cấp phát trước để hệ điều hành đặt các block liền nhau và không phải
+      nới file sau mỗi lần ghi
+    - progress_callback(percent) chỉ được gọi khi phần trăm thay đổi
+    - on_write(n) được gọi sau mỗi lần ghi (kể cả khi sau đó bị lỗi)
+    - trả về số byte đã ghi
+    """
+    if buffer is None:
+        buffer = bytearray(MAX_FILL_BYTES)
+    view = memoryview(buffer)
+
+    start_pos = out_file.tell()
+    if total_size > 0 and reserve:
+        preallocate(out_file, start_pos, total_size)
+
+    written = 0
+    fill_size = MIN_FILL_BYTES
+    last_percent = -1
+    try:
+        while True:
+            if stop_event is not None and stop_event.is_set():
+                raise DownloadStopped()
+
+            # Đọc đến khi đầy phần buffer của lượt này hoặc hết dữ liệu
+            limit = fill_size
+            if total_size > 0:
+                limit = min(limit, total_size - written)
+            started = time.perf_counter()
+            filled = 0
+            while filled < limit:
+                n = readinto(view[filled:limit])
+                if not n:
+                    break
+                filled += n
+            if not filled:
+                break
+
+            out_file.write(view[:filled])
+            written += filled
+            if on_write:
+                on_write(filled)
+            fill_size = _next_fill_size(
+                fill_size, filled, time.perf_counter() - started
+            )
+
+            if progress_callback and total_size > 0:
+                percent = int(written / total_size * 100)
+                if percent != last_percent:
+                    last_percent = percent
+                    progress_callback(percent)
+            if filled < limit:
+                break
+    finally:
+        view.release()
+        if total_size > 0 and reserve and written != total_size:
+            # Bỏ phần cấp phát trước chưa được ghi (tải dở hoặc server gửi thiếu)
+            out_file.truncate(start_pos + written)
+
+    return written
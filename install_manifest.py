@@ -0,0 +1,208 @@
+import os
+import json
+import time
+import zlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = ".install_manifest.json"
+# Đánh dấu bản cài bị hỏng (deep verification phát hiện sai lệch)
+INVALID_MARKER_NAME = ".install_invalid"
+# mtime là lần cuối CRC32 của toàn bộ bản cài được kiểm tra
+VERIFIED_MARKER_NAME = ".deep_verified"
+MANIFEST_VERSION = 1
+# Thư mục backend ghi vào khi chạy (cwd của backend là thư mục cài)
+RUNTIME_WRITABLE_DIRS = ("logs", "cache", "tmp")
+# File backend tự ghi lại khi chạy, ở bất kỳ đâu trong thư mục cài
+RUNTIME_WRITABLE_SUFFIXES = (".pyc", ".log")
+
+_STAT_CHUNK = 256
+
+
+def is_tracked(rel_path: str) -> bool:
+    """File có được đưa vào manifest không
+
+    Bytecode (.pyc), log và các thư mục logs/cache/tmp bị backend ghi lại khi
+    chạy nên không dùng để kiểm tra: nếu không bản cài sẽ bị coi là hỏng.
+    """
+    if rel_path.endswith(RUNTIME_WRITABLE_SUFFIXES) or "__pycache__/" in rel_path:
+        return False
+    return rel_path.split("/", 1)[0] not in RUNTIME_WRITABLE_DIRS
+
+
+def _tracked_files(manifest: dict) -> dict:
+    """File cần kiểm tra (manifest cũ có thể còn file nay không theo dõi nữa)"""
+    return {
+        rel: entry
+        for rel, entry in manifest.get("files", {}).items()
+        if is_tracked(rel)
+    }
+
+
+def _stat_workers() -> int:
+    return min(32, (os.cpu_count() or 1) * 4)
+
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+def _stat_chunk(base_dir: str, paths):
+    """stat một nhóm file; trả về list (size, mtime_ns) hoặc None nếu thiếu"""
+    results = []
+    join = os.path.join
+    for rel in paths:
+        try:
+            st = os.stat(join(base_dir, rel))
+            results.append((st.st_size, st.st_mtime_ns))
+        except OSError:
+            results.append(None)
+    return results
+
+
+def parallel_stat(base_dir: Path, paths: list) -> list:
+    """stat toàn bộ file song song (os.stat nhả GIL nên thread đủ hiệu quả)"""
+    base_dir = str(base_dir)
+    chunks = list(_chunks(paths, _STAT_CHUNK))
+    if len(chunks) <= 1:
+        return _stat_chunk(base_dir, paths)
+
+    results = []
+    with ThreadPoolExecutor(max_workers=_stat_workers()) as pool:
+        for chunk_result in pool.map(lambda c: _stat_chunk(base_dir, c), chunks):
+            results.extend(chunk_result)
+    return results
+
+
+def write_manifest(backend_dir: Path, entries: dict) -> Path:
+    """Ghi manifest sau khi giải nén xong
+
+    entries: {đường dẫn tương đối (posix): crc32 lấy từ zip}
+    Size và mtime lấy từ file thực tế trên đĩa để so sánh nhanh lần sau.
+    """
+    backend_dir = Path(backend_dir)
+    paths = sorted(entries)
+    stats = parallel_stat(backend_dir, paths)
+
+    files = {}
+    for rel, stat in zip(paths, stats):
+        if stat is None:
+            raise FileNotFoundError(f"File vừa giải nén không tồn tại: {rel}")
+        files[rel] = {"size": stat[0], "mtime_ns": stat[1], "crc32": entries[rel]}
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "created": time.time(),
+        "files": files,
+    }
+    manifest_path = backend_dir / MANIFEST_NAME
+    tmp_path = manifest_path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(manifest), encoding="utf-8")
+    os.replace(tmp_path, manifest_path)
+    (backend_dir / INVALID_MARKER_NAME).unlink(missing_ok=True)
+    # CRC32 vừa được kiểm tra trong lúc giải nén
+    record_verified(backend_dir)
+    logger.info(f"Đã ghi install manifest ({len(files)} files)")
+    return manifest_path
+
+
+def load_manifest(backend_dir: Path) -> Optional[dict]:
+    manifest_path = Path(backend_dir) / MANIFEST_NAME
+    try:
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"Install manifest không đọc được: {e}")
+        return {}
+    if manifest.get("version") != MANIFEST_VERSION:
+        return {}
+    return manifest
+
+
+def fast_validate(backend_dir: Path, manifest: dict) -> list:
+    """So sánh size/mtime của mọi file với manifest, trả về danh sách file sai lệch"""
+    files = _tracked_files(manifest)
+    paths = list(files)
+    stats = parallel_stat(Path(backend_dir), paths)
+
+    mismatches = []
+    for rel, stat in zip(paths, stats):
+        expected = files[rel]
+        if stat is None or stat != (expected["size"], expected["mtime_ns"]):
+            mismatches.append(rel)
+    return mismatches
+
+
+def deep_verify(
+    backend_dir: Path,
+    manifest: dict,
+    stop_event: threading.Event = None,
+    throttle_mb_per_s: float = 0,
+) -> list:
+    """Tính lại CRC32 của mọi file và so với manifest (chậm, chạy nền)"""
+    backend_dir = Path(backend_dir)
+    mismatches = []
+    started = time.monotonic()
+    read_bytes = 0
+
+    for rel, expected in _tracked_files(manifest).items():
+        if stop_event is not None and stop_event.is_set():
+            break
+        crc = 0
+        try:
+            with open(backend_dir / rel, "rb") as f:
+                while chunk := f.read(1024 * 1024):
+                    # File lớn (model) mất vài phút: kiểm tra cả giữa file
+                    if stop_event is not None and stop_event.is_set():
+                        return mismatches
+                    crc = zlib.crc32(chunk, crc)
+                    read_bytes += len(chunk)
+                    if throttle_mb_per_s:
+                        expected_time = read_bytes / (throttle_mb_per_s * 1024 * 1024)
+                        delay = expected_time - (time.monotonic() - started)
+                        if delay > 0:
+                            if stop_event is not None:
+                                stop_event.wait(delay)
+                            else:
+                                time.sleep(delay)
+        except OSError:
+            mismatches.append(rel)
+            continue
+        if crc != expected["crc32"]:
+            mismatches.append(rel)
+
+    return mismatches
+
+
+def mark_invalid(backend_dir: Path, reason: str):
+    """Đánh dấu bản cài hỏng để lần khởi động sau cài lại"""
+    try:
+        (Path(backend_dir) / INVALID_MARKER_NAME).write_text(reason, encoding="utf-8")
+    except OSError as e:
+        logger.error(f"Không thể đánh dấu bản cài hỏng: {e}")
+
+
+def is_marked_invalid(backend_dir: Path) -> bool:
+    return (Path(backend_dir) / INVALID_MARKER_NAME).exists()
+
+
+def record_verified(backend_dir: Path):
+    try:
+        (Path(backend_dir) / VERIFIED_MARKER_NAME).touch()
+    except OSError as e:
+        logger.warning(f"Không thể ghi mốc kiểm tra bản cài: {e}")
+
+
+def last_verified(backend_dir: Path) -> float:
+    """Thời điểm (epoch) kiểm tra CRC32 gần nhất, 0 nếu chưa từng"""
+    try:
+        return (Path(backend_dir) / VERIFIED_MARKER_NAME).stat().st_mtime
+    except OSError:
+        return 0.0
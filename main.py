@@ -1,12 +1,57 @@
+import time
+
+# Mốc thời gian khi interpreter bắt đầu chạy code của app (sau bootloader)
+MAIN_ENTERED = time.time()
+
 import sys
 import os
+import json
 import logging
 from pathlib import Path
 from PyQt6.QtWebEngineWidgets import QWebEngineView
 from PyQt6.QtWidgets import QApplication
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QObject, QEvent, QTimer
 from PyQt6.QtGui import QGuiApplication
 
+# benchmarks/bench_launch.py đặt biến này để đo thời gian tới frame đầu tiên
+STARTUP_MARKER_ENV = "AI_DUBBING_STARTUP_MARKER"
+STARTUP_EXIT_ENV = "AI_DUBBING_EXIT_AFTER_PAINT"
+
+
+class FirstPaintProbe(QObject):
+    """Ghi thời điểm frame đầu tiên được vẽ ra file marker rồi tự gỡ bỏ"""
+
+    def __init__(self, app: QApplication, marker_path: Path, exit_after: bool):
+        super().__init__(app)
+        self.app = app
+        self.marker_path = marker_path
+        self.exit_after = exit_after
+        self.app_created = time.time()
+        self.window_shown = None
+        app.installEventFilter(self)
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Type.Paint:
+            self.app.removeEventFilter(self)
+            # Chờ vòng lặp sự kiện xử lý xong lượt vẽ hiện tại
+            QTimer.singleShot(0, self.write_marker)
+        return False
+
+    def write_marker(self):
+        marker = {
+            "main_entered": MAIN_ENTERED,
+            "app_created": self.app_created,
+            "window_shown": self.window_shown,
+            "first_paint": time.time(),
+        }
+        tmp_path = self.marker_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(marker), encoding="utf-8")
+        os.replace(tmp_path, self.marker_path)
+        if self.exit_after:
+            for widget in self.app.topLevelWidgets():
+                widget.close()
+            self.app.quit()
+
 
 # Configure logging
 def setup_logging():
@@ -57,20 +102,44 @@ def main():
     logger = setup_logging()
     logger.info("Starting AI Video Dubbing Application")
 
+    # Mức log lấy từ settings.json, đổi trực tiếp khi cấu hình thay đổi
+    from app_settings import settings_store, apply_log_level
+
+    apply_log_level(settings_store.settings)
+    settings_store.subscribe(apply_log_level)
+
+    # AI_DUBBING_PROFILE=1: chạy sampling profiler ngay từ lúc khởi động
+    from sampling_profiler import start_from_env
+
+    start_from_env()
+
     # Đặt attribute trước khi tạo QApplication
     QGuiApplication.setAttribute(Qt.ApplicationAttribute.AA_ShareOpenGLContexts)
 
+    # Custom URL scheme phải được đăng ký trước khi tạo QApplication
+    from ui.media_scheme import register_media_scheme
+
+    register_media_scheme()
+
     # Create QApplication
     app = QApplication(sys.argv)
     app.setApplicationName("AI Video Dubbing")
     app.setApplicationVersion("1.0.0")
 
+    probe = None
+    if os.getenv(STARTUP_MARKER_ENV):
+        probe = FirstPaintProbe(
+            app, Path(os.environ[STARTUP_MARKER_ENV]), bool(os.getenv(STARTUP_EXIT_ENV))
+        )
+
     try:
         # Import and create main window
         from ui.main_window import create_main_window
 
         window = create_main_window()
         window.show()
+        if probe:
+            probe.window_shown = time.time()
 
         # Run application
         logger.info("Application started successfully")
@@ -0,0 +1,294 @@
+"""Định dạng gói backend: zip (deflate) hoặc tar nén zstd (.tar.zst).
+
+Gói .tar.zst được giải nén một lượt dạng stream (không tạo file .tar
+tạm). Nếu gói có seek table theo zstd seekable format (gói do
+build_scripts/build_backend_package.py tạo), các frame độc lập được giải
+nén song song trên nhiều thread rồi đưa tuần tự vào tarfile.
+"""
+
+import io
+import os
+import mmap
+import zlib
+import shutil
+import struct
+import tarfile
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+try:
+    import zstandard
+except ImportError:  # chỉ cần khi gói là .tar.zst
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+FORMAT_ZIP = "zip"
+FORMAT_TAR_ZSTD = "tar.zst"
+
+_ZIP_MAGIC = b"PK\x03\x04"
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+# Skippable frame: 0x184D2A50 - 0x184D2A5F (little endian)
+_SKIPPABLE_MAGIC_MIN = 0x184D2A50
+_SKIPPABLE_MAGIC_MAX = 0x184D2A5F
+_SEEK_TABLE_SKIPPABLE_MAGIC = 0x184D2A5E
+_SEEKABLE_MAGIC = 0x8F92EAB1
+_SEEK_TABLE_FOOTER_SIZE = 9
+
+_WRITE_BUFFER = 1024 * 1024
+
+
+def detect_format(path: Path) -> str:
+    """Nhận dạng định dạng gói theo magic bytes"""
+    with open(path, "rb") as f:
+        head = f.read(4)
+    if head == _ZIP_MAGIC:
+        return FORMAT_ZIP
+    if head == _ZSTD_MAGIC:
+        return FORMAT_TAR_ZSTD
+    if len(head) == 4:
+        (magic,) = struct.unpack("<I", head)
+        if _SKIPPABLE_MAGIC_MIN <= magic <= _SKIPPABLE_MAGIC_MAX:
+            return FORMAT_TAR_ZSTD
+    raise ValueError(f"Không nhận dạng được định dạng gói: {path}")
+
+
+def read_seek_table(f) -> list:
+    """Đọc seek table ở cuối file; trả về [(offset, csize, dsize)] hoặc []"""
+    f.seek(0, os.SEEK_END)
+    file_size = f.tell()
+    if file_size < _SEEK_TABLE_FOOTER_SIZE + 8:
+        return []
+
+    f.seek(file_size - _SEEK_TABLE_FOOTER_SIZE)
+    num_frames, descriptor, magic = struct.unpack("<IBI", f.read(9))
+    if magic != _SEEKABLE_MAGIC:
+        return []
+
+    entry_size = 12 if descriptor & 0x80 else 8
+    table_size = num_frames * entry_size + _SEEK_TABLE_FOOTER_SIZE
+    table_start = file_size - table_size - 8
+    if table_start < 0:
+        return []
+
+    f.seek(table_start)
+    skippable_magic, frame_size = struct.unpack("<II", f.read(8))
+    if skippable_magic != _SEEK_TABLE_SKIPPABLE_MAGIC or frame_size != table_size:
+        return []
+
+    frames = []
+    offset = 0
+    data = f.read(num_frames * entry_size)
+    for i in range(num_frames):
+        csize, dsize = struct.unpack_from("<II", data, i * entry_size)
+        frames.append((offset, csize, dsize))
+        offset += csize
+    if offset != table_start:
+        return []
+    return frames
+
+
+class _ChunkStream(io.RawIOBase):
+    """File-like chỉ đọc tuần tự, lấy dữ liệu từ một iterator các chunk bytes"""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._buffer = memoryview(b"")
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while not self._buffer:
+            try:
+                self._buffer = memoryview(next(self._chunks))
+            except StopIteration:
+                return 0
+        n = min(len(b), len(self._buffer))
+        b[:n] = self._buffer[:n]
+        self._buffer = self._buffer[n:]
+        return n
+
+
+def _iter_frames_parallel(path: Path, frames: list, threads: int, on_frame=None):
+    """Giải nén các frame độc lập song song, trả về theo đúng thứ tự"""
+    local = threading.local()
+
+    def decompress(view, dsize):
+        dctx = getattr(local, "dctx", None)
+        if dctx is None:
+            dctx = local.dctx = zstandard.ZstdDecompressor()
+        return dctx.decompress(view, max_output_size=dsize)
+
+    with open(path, "rb") as f, mmap.mmap(
+        f.fileno(), 0, access=mmap.ACCESS_READ
+    ) as mm, ThreadPoolExecutor(max_workers=threads, thread_name_prefix="zstd") as pool:
+        pending = deque()
+        # Giới hạn số frame đang giải nén để bộ nhớ không tăng theo kích thước gói
+        max_in_flight = threads + 1
+        for offset, csize, dsize in frames:
+            pending.append(pool.submit(decompress, mm[offset : offset + csize], dsize))
+            if len(pending) >= max_in_flight:
+                yield pending.popleft().result()
+                if on_frame:
+                    on_frame()
+        while pending:
+            yield pending.popleft().result()
+            if on_frame:
+                on_frame()
+
+
+def _iter_stream(f, on_read=None):
+    """Giải nén tuần tự (gói không có seek table)"""
+    reader = zstandard.ZstdDecompressor().stream_reader(f, read_across_frames=True)
+    while True:
+        chunk = reader.read(_WRITE_BUFFER)
+        if not chunk:
+            break
+        if on_read:
+            on_read()
+        yield chunk
+
+
+def _safe_target(extract_root: Path, name: str) -> Path:
+    """Đường dẫn đích của member; chặn đường dẫn tuyệt đối và '..'"""
+    parts = name.replace("\\", "/").split("/")
+    if name.startswith("/") or ".." in parts or ":" in parts[0]:
+        raise ValueError(f"Đường dẫn không hợp lệ trong gói: {name}")
+    return extract_root.joinpath(*(p for p in parts if p and p != "."))
+
+
+def _extract_hardlink(extract_root: Path, target: Path, member, crcs: dict):
+    """Hardlink tới member đã giải nén trước đó, copy nếu không tạo được link
+
+    tar.add ghi các file có nhiều hardlink trên đĩa thành member LNKTYPE.
+    """
+    if member.linkname not in crcs:
+        raise ValueError(
+            f"Hardlink tới file không có trong gói: {member.name} -> {member.linkname}"
+        )
+    source = _safe_target(extract_root, member.linkname)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.unlink(missing_ok=True)
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+    crcs[member.name] = crcs[member.linkname]
+
+
+def _extract_symlink(extract_root: Path, target: Path, member, crcs: dict):
+    """Tạo symlink; Windows không có quyền tạo symlink thì copy nội dung đích"""
+    link_target = (target.parent / member.linkname).resolve()
+    if not link_target.is_relative_to(extract_root):
+        raise ValueError(f"Symlink ra ngoài gói: {member.name}")
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.unlink(missing_ok=True)
+    try:
+        os.symlink(member.linkname, target, target_is_directory=link_target.is_dir())
+        return
+    except OSError:
+        if os.name != "nt":
+            raise
+
+    if link_target.is_dir():
+        shutil.copytree(link_target, target)
+    elif link_target.is_file():
+        shutil.copy2(link_target, target)
+        rel = link_target.relative_to(extract_root).as_posix()
+        if rel in crcs:
+            crcs[member.name] = crcs[rel]
+    else:
+        raise ValueError(
+            f"Symlink tới file không có trong gói: {member.name} -> {member.linkname}"
+        )
+
+
+def extract_tar_zstd(
+    package_path: Path,
+    extract_root: Path,
+    threads: int = 0,
+    progress_callback=None,
+) -> dict:
+    """Giải nén gói .tar.zst vào extract_root trong một lượt
+
+    Trả về {tên member: crc32} cho các file thường và hardlink, tính trong
+    lúc ghi.
+    """
+    if zstandard is None:
+        raise RuntimeError("Gói .tar.zst cần thư viện 'zstandard'")
+
+    threads = threads or min(8, os.cpu_count() or 1)
+    extract_root = Path(extract_root).resolve()
+    extract_root.mkdir(parents=True, exist_ok=True)
+    package_size = os.path.getsize(package_path)
+    crcs = {}
+    created_dirs = set()
+    # Symlink được tạo sau cùng: đích có thể nằm sau nó trong gói
+    symlinks = []
+    last_progress = -1
+
+    def report(percent):
+        nonlocal last_progress
+        if progress_callback and percent != last_progress:
+            last_progress = percent
+            progress_callback(percent)
+
+    with open(package_path, "rb") as raw:
+        frames = read_seek_table(raw)
+        raw.seek(0)
+
+        if frames and threads > 1:
+            logger.info(
+                f"Giải nén {len(frames)} frame zstd song song ({threads} threads)"
+            )
+            done = [0]
+
+            def on_frame():
+                done[0] += 1
+                report(int(done[0] / len(frames) * 100))
+
+            chunks = _iter_frames_parallel(package_path, frames, threads, on_frame)
+        else:
+            chunks = _iter_stream(
+                raw, lambda: report(int(raw.tell() / package_size * 100))
+            )
+
+        stream = io.BufferedReader(_ChunkStream(chunks), buffer_size=_WRITE_BUFFER)
+        with tarfile.open(fileobj=stream, mode="r|") as tar:
+            for member in tar:
+                target = _safe_target(extract_root, member.name)
+                if member.isdir():
+                    target.mkdir(parents=True, exist_ok=True)
+                    created_dirs.add(target)
+                elif member.isfile():
+                    if target.parent not in created_dirs:
+                        target.parent.mkdir(parents=True, exist_ok=True)
+                        created_dirs.add(target.parent)
+                    source = tar.extractfile(member)
+                    crc = 0
+                    with open(target, "wb") as out:
+                        while chunk := source.read(_WRITE_BUFFER):
+                            crc = zlib.crc32(chunk, crc)
+                            out.write(chunk)
+                    if member.mode & 0o111:
+                        os.chmod(target, member.mode & 0o777)
+                    crcs[member.name] = crc
+                elif member.islnk():
+                    _extract_hardlink(extract_root, target, member, crcs)
+                elif member.issym():
+                    symlinks.append((target, member))
+                else:
+                    # Device, fifo...: báo lỗi thay vì âm thầm thiếu file
+                    raise ValueError(
+                        f"Loại member không được hỗ trợ trong gói: {member.name}"
+                    )
+
+    for target, member in symlinks:
+        _extract_symlink(extract_root, target, member, crcs)
+
+    report(100)
+    return crcs
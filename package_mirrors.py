@@ -0,0 +1,463 @@
+"""Tải gói backend từ nhiều nguồn: HTTP mirror, thư mục chia sẻ LAN, USB/thư mục cục bộ.
+
+- probe_sources() đo song song độ trễ và tốc độ của mọi nguồn rồi xếp hạng
+  theo thời gian tải ước tính. Nguồn có kích thước gói khác nguồn tham
+  chiếu (nguồn đầu tiên truy cập được theo thứ tự cấu hình) bị loại. Nguồn
+  đo lỗi (ví dụ một lần HEAD chập chờn) vẫn được giữ làm dự phòng ở cuối
+  danh sách; kích thước của nó được kiểm tra khi tải.
+- MirrorDownloader chia gói thành các đoạn (segment). Một nguồn lỗi giữa
+  chừng thì phần còn lại của đoạn được tải tiếp từ nguồn khác bằng Range,
+  không mất phần đã tải. Với connections > 1 các đoạn được tải song song và
+  phân bổ cho nhiều nguồn cùng lúc.
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional
+from urllib.parse import urlparse, unquote
+
+import requests
+import urllib3
+
+import download_stream
+
+logger = logging.getLogger(__name__)
+
+PROBE_BYTES = 256 * 1024
+PROBE_TIMEOUT = 5
+# Đoạn nhỏ nhất khi chia gói cho nhiều kết nối
+MIN_SEGMENT_BYTES = 16 * 1024 * 1024
+# Số lần lỗi trước khi bỏ hẳn một nguồn
+MAX_SOURCE_FAILURES = 3
+# Thời gian chờ worker dừng khi tải bị hủy/lỗi
+WORKER_STOP_TIMEOUT = 1.0
+
+
+class AllSourcesFailed(Exception):
+    """Không còn nguồn nào tải được gói"""
+
+
+@dataclass
+class PackageSource:
+    location: str
+    kind: str  # "http" hoặc "file"
+    size: int = 0
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    accept_ranges: bool = False
+    latency_s: Optional[float] = None
+    throughput_bps: Optional[float] = None
+    error: Optional[str] = None
+    # Lỗi khi đo: nguồn chưa biết tốc độ/kích thước, chỉ dùng làm dự phòng
+    probe_error: Optional[str] = None
+    failures: int = 0
+    active: int = 0
+
+    @property
+    def usable(self) -> bool:
+        return self.error is None and self.failures < MAX_SOURCE_FAILURES
+
+    def estimated_seconds(self, size: int = 0) -> float:
+        """Thời gian tải ước tính, dùng để xếp hạng nguồn"""
+        if self.latency_s is None or not self.throughput_bps:
+            return float("inf")
+        return self.latency_s + (size or self.size) / self.throughput_bps
+
+    def info(self) -> dict:
+        return {
+            "url": self.location,
+            "etag": self.etag,
+            "last_modified": self.last_modified,
+            "size": self.size,
+        }
+
+
+def parse_sources(primary: str, mirrors: str = "", package_name: str = None) -> list:
+    """Danh sách nguồn theo thứ tự ưu tiên từ URL chính và chuỗi mirror (phân cách ;)
+
+    Đường dẫn tới thư mục (USB, thư mục chia sẻ) được nối với tên file gói.
+    """
+    package_name = package_name or Path(urlparse(primary).path).name
+    sources, seen = [], set()
+    for item in [primary] + mirrors.replace("\n", ";").split(";"):
+        item = item.strip()
+        if not item or item in seen:
+            continue
+        seen.add(item)
+        parsed = urlparse(item)
+        if parsed.scheme in ("http", "https"):
+            sources.append(PackageSource(item, "http"))
+            continue
+        # file:///..., \\server\share\..., D:\..., /media/usb/...
+        if parsed.scheme == "file":
+            path = Path(
+                unquote(parsed.path.lstrip("/") if os.name == "nt" else parsed.path)
+            )
+        else:
+            path = Path(item)
+        if path.is_dir() and package_name:
+            path = path / package_name
+        sources.append(PackageSource(str(path), "file"))
+    return sources
+
+
+def _probe_http(source: PackageSource, session: requests.Session):
+    started = time.perf_counter()
+    response = session.head(
+        source.location, timeout=PROBE_TIMEOUT, allow_redirects=True
+    )
+    response.raise_for_status()
+    source.latency_s = time.perf_counter() - started
+    source.size = int(response.headers.get("content-length", 0))
+    source.etag = response.headers.get("etag")
+    source.last_modified = response.headers.get("last-modified")
+    source.accept_ranges = response.headers.get("accept-ranges", "").lower() == "bytes"
+
+    started = time.perf_counter()
+    with session.get(
+        source.location,
+        headers={"Range": f"bytes=0-{PROBE_BYTES - 1}"},
+        stream=True,
+        timeout=PROBE_TIMEOUT,
+    ) as response:
+        response.raise_for_status()
+        if response.status_code == 206:
+            source.accept_ranges = True
+        received = 0
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            received += len(chunk)
+            if received >= PROBE_BYTES:
+                break
+    elapsed = time.perf_counter() - started - source.latency_s
+    source.throughput_bps = received / max(elapsed, 1e-3)
+
+
+def _probe_file(source: PackageSource):
+    started = time.perf_counter()
+    source.size = os.stat(source.location).st_size
+    source.latency_s = time.perf_counter() - started
+    source.accept_ranges = True
+
+    started = time.perf_counter()
+    with open(source.location, "rb", buffering=0) as f:
+        received = len(f.read(PROBE_BYTES))
+    source.throughput_bps = received / max(time.perf_counter() - started, 1e-3)
+
+
+def probe_sources(
+    sources: list, cancel_event: Optional[threading.Event] = None
+) -> list:
+    """Đo song song mọi nguồn, trả về các nguồn dùng được, nhanh nhất trước
+
+    Nguồn đo lỗi đứng cuối (theo thứ tự cấu hình) để vẫn được thử khi tải.
+    Đặt cancel_event thì ném DownloadStopped ngay, không chờ các lần đo đang dở.
+    """
+
+    def probe(source):
+        try:
+            if source.kind == "http":
+                with requests.Session() as session:
+                    _probe_http(source, session)
+            else:
+                _probe_file(source)
+        except (OSError, requests.exceptions.RequestException) as e:
+            source.probe_error = str(e)
+            source.latency_s = source.throughput_bps = None
+            source.size = 0
+        return source
+
+    if not sources:
+        return []
+    pool = ThreadPoolExecutor(max_workers=len(sources), thread_name_prefix="probe")
+    try:
+        futures = [pool.submit(probe, source) for source in sources]
+        while wait(futures, timeout=0.1).not_done:
+            if cancel_event is not None and cancel_event.is_set():
+                raise download_stream.DownloadStopped("Đã hủy đo nguồn gói")
+        probed = [future.result() for future in futures]
+    finally:
+        # Lần đo đang dở tự kết thúc sau tối đa PROBE_TIMEOUT trên thread nền
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    reference = next((s for s in probed if not s.probe_error), None)
+    for source in probed:
+        if source.probe_error:
+            logger.warning(
+                f"Không đo được nguồn gói {source.location} ({source.probe_error}), "
+                f"giữ làm nguồn dự phòng"
+            )
+        elif source.size != reference.size:
+            source.error = (
+                f"kích thước khác nguồn chính ({source.size} != {reference.size})"
+            )
+            logger.warning(f"Bỏ qua nguồn {source.location}: {source.error}")
+        else:
+            logger.info(
+                f"Nguồn gói {source.location}: độ trễ {source.latency_s * 1000:.0f} ms, "
+                f"{source.throughput_bps / (1024 * 1024):.1f} MB/s"
+            )
+
+    ranked = [s for s in probed if s.usable]
+    # Nguồn tham chiếu đứng đầu khi bằng điểm để thông tin phiên bản ổn định
+    ranked.sort(key=lambda s: (s.estimated_seconds(), s is not reference))
+    return ranked
+
+
+@dataclass
+class _Segment:
+    start: int
+    end: int  # không bao gồm; 0 nếu không biết kích thước
+    pos: int = 0
+
+    def __post_init__(self):
+        self.pos = self.start
+
+    @property
+    def remaining(self) -> int:
+        return self.end - self.pos
+
+
+class MirrorDownloader:
+    """Tải gói vào dest_path từ các nguồn đã xếp hạng, tự chuyển nguồn khi lỗi"""
+
+    def __init__(
+        self,
+        sources: list,
+        dest_path: Path,
+        connections: int = 1,
+        progress_callback: Optional[Callable] = None,
+        cancel_event: Optional[threading.Event] = None,
+    ):
+        if not sources:
+            raise AllSourcesFailed("Không có nguồn gói nào để tải")
+        self.sources = sources
+        self.dest_path = Path(dest_path)
+        # 0 nếu không nguồn nào đo được: tải một luồng tới hết dữ liệu
+        self.size = next((s.size for s in sources if s.size), 0)
+        self.progress_callback = progress_callback
+        # Hủy từ bên ngoài (ví dụ đóng app); stop_event là tín hiệu nội bộ cho worker
+        self.cancel_event = cancel_event
+        self.stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._sessions = []
+        self._downloaded = 0
+        self._errors = []
+
+        ranged = [s for s in sources if s.accept_ranges]
+        if self.size and ranged and connections > 1:
+            self.connections = connections
+            segment_size = max(MIN_SEGMENT_BYTES, self.size // (connections * 4))
+        else:
+            self.connections = 1
+            segment_size = self.size
+        self.segments = deque(
+            _Segment(start, min(start + segment_size, self.size))
+            for start in range(0, max(self.size, 1), max(segment_size, 1))
+        )
+
+    def run(self) -> int:
+        """Tải toàn bộ gói, trả về số byte; ném AllSourcesFailed nếu thất bại"""
+        self.dest_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.dest_path, "wb") as f:
+            if self.size:
+                download_stream.preallocate(f, 0, self.size)
+
+        workers = [
+            threading.Thread(target=self._worker, name=f"Download-{i}", daemon=True)
+            for i in range(self.connections)
+        ]
+        for worker in workers:
+            worker.start()
+
+        last_percent = -1
+        try:
+            # Tiến trình được báo trên thread gọi run() để callback có thể ném
+            # exception (ví dụ hủy setup) như với vòng lặp tải một luồng
+            while any(w.is_alive() for w in workers):
+                for worker in workers:
+                    worker.join(timeout=0.1)
+                if self.cancel_event is not None and self.cancel_event.is_set():
+                    raise download_stream.DownloadStopped("Đã hủy tải gói")
+                if self.progress_callback and self.size:
+                    percent = int(self._downloaded / self.size * 100)
+                    if percent != last_percent:
+                        last_percent = percent
+                        self.progress_callback(percent)
+        finally:
+            self.stop_event.set()
+            for worker in workers:
+                # Worker đang chờ mạng (timeout 60s) thì không chờ theo: nó là
+                # daemon và tự dừng khi đọc xong chunk hiện tại
+                worker.join(timeout=WORKER_STOP_TIMEOUT)
+            for session in self._sessions:
+                session.close()
+
+        if self.segments or (self.size and self._downloaded < self.size):
+            raise AllSourcesFailed(
+                "Không tải được gói từ nguồn nào: " + "; ".join(self._errors[-3:])
+            )
+        if not self.size:
+            self.size = self._downloaded
+            with open(self.dest_path, "r+b") as f:
+                f.truncate(self.size)
+        return self._downloaded
+
+    def _next_segment(self) -> Optional[_Segment]:
+        with self._lock:
+            return self.segments.popleft() if self.segments else None
+
+    def _pick_source(self, segment: _Segment) -> Optional[PackageSource]:
+        """Nguồn nhanh nhất tính theo số kết nối đang dùng nguồn đó"""
+        with self._lock:
+            # Nguồn chưa đo được có thể hỗ trợ Range, _fetch sẽ kiểm tra
+            candidates = [
+                s
+                for s in self.sources
+                if s.usable and (s.accept_ranges or s.probe_error or segment.pos == 0)
+            ]
+            if not candidates:
+                return None
+            source = min(
+                candidates,
+                key=lambda s: s.estimated_seconds(segment.remaining or s.size)
+                * (s.active + 1),
+            )
+            source.active += 1
+            return source
+
+    def _worker(self):
+        segment = None
+        try:
+            while not self.stop_event.is_set():
+                segment = self._next_segment()
+                if segment is None:
+                    return
+                while segment.pos < segment.end or not segment.end:
+                    if self.stop_event.is_set():
+                        with self._lock:
+                            self.segments.appendleft(segment)
+                        return
+                    source = self._pick_source(segment)
+                    if source is None:
+                        with self._lock:
+                            self.segments.appendleft(segment)
+                        self.stop_event.set()
+                        return
+                    try:
+                        self._fetch(source, segment)
+                        if not segment.end:
+                            break  # không biết kích thước: tải tới hết là xong
+                    except (
+                        OSError,
+                        requests.exceptions.RequestException,
+                        download_stream.DownloadStopped,
+                        # Body chunked/nén được đọc qua urllib3
+                        # (ProtocolError, ReadTimeoutError...)
+                        urllib3.exceptions.HTTPError,
+                    ) as e:
+                        if self.stop_event.is_set():
+                            continue
+                        with self._lock:
+                            source.failures += 1
+                            self._errors.append(f"{source.location}: {e}")
+                        logger.warning(
+                            f"Lỗi khi tải từ {source.location} tại byte {segment.pos}: {e}, "
+                            f"chuyển sang nguồn khác"
+                        )
+                        if not segment.end and segment.pos:
+                            # Không biết kích thước thì không tải tiếp được, tải lại từ đầu
+                            with self._lock:
+                                self._downloaded -= segment.pos - segment.start
+                            segment.pos = segment.start
+                    finally:
+                        with self._lock:
+                            source.active -= 1
+                segment = None
+        except Exception as e:
+            # Lỗi không lường trước: trả đoạn đang tải về hàng đợi để run() báo
+            # lỗi thay vì coi gói (không rõ kích thước) là đã tải xong
+            logger.error(f"Lỗi không mong đợi khi tải gói: {e}")
+            with self._lock:
+                self._errors.append(str(e))
+                if segment is not None:
+                    self.segments.appendleft(segment)
+            self.stop_event.set()
+
+    def _on_write(self, segment: _Segment, n: int):
+        segment.pos += n
+        with self._lock:
+            self._downloaded += n
+
+    def _session(self) -> requests.Session:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+            with self._lock:
+                self._sessions.append(session)
+        return session
+
+    def _check_size(self, source: PackageSource, size: int):
+        """Nguồn chưa đo được: loại nếu gói của nó khác kích thước đang tải"""
+        if self.size and size and size != self.size:
+            source.error = f"kích thước khác nguồn chính ({size} != {self.size})"
+            raise OSError(source.error)
+
+    def _fetch(self, source: PackageSource, segment: _Segment):
+        """Tải [segment.pos, segment.end) từ source, ghi vào đúng vị trí trong file"""
+        on_write = lambda n: self._on_write(segment, n)  # noqa: E731
+        with open(self.dest_path, "r+b") as out:
+            out.seek(segment.pos)
+            if source.kind == "file":
+                with open(source.location, "rb", buffering=0) as src:
+                    self._check_size(source, os.fstat(src.fileno()).st_size)
+                    src.seek(segment.pos)
+                    download_stream.copy_stream(
+                        src.readinto,
+                        out,
+                        segment.remaining if segment.end else 0,
+                        on_write=on_write,
+                        stop_event=self.stop_event,
+                    )
+                return
+
+            headers = {}
+            if segment.pos or (segment.end and segment.end < self.size):
+                last = f"{segment.end - 1}" if segment.end else ""
+                headers["Range"] = f"bytes={segment.pos}-{last}"
+            with self._session().get(
+                source.location, headers=headers, stream=True, timeout=60
+            ) as response:
+                if response.status_code in (206, 416):
+                    # "bytes a-b/total" hoặc "bytes */total"
+                    total = response.headers.get("content-range", "").rpartition("/")[2]
+                    self._check_size(source, int(total) if total.isdigit() else 0)
+                elif response.ok:
+                    self._check_size(
+                        source, int(response.headers.get("content-length", 0))
+                    )
+                response.raise_for_status()
+                if headers and response.status_code != 206:
+                    raise requests.exceptions.HTTPError(
+                        f"Nguồn không hỗ trợ Range (HTTP {response.status_code})"
+                    )
+                if segment.end:
+                    length = segment.remaining
+                else:
+                    length = int(response.headers.get("content-length", 0))
+                download_stream.copy_response(
+                    response,
+                    out,
+                    length,
+                    stop_event=self.stop_event,
+                    reserve=False,
+                    on_write=on_write,
+                )
+        if segment.end and segment.pos < segment.end:
+            raise OSError(f"Nguồn trả về thiếu dữ liệu ({segment.remaining} bytes)")
@@ -0,0 +1,626 @@
+"""Chạy backend thẳng từ gói zip, giải nén dần theo nhu cầu (run-from-package).
+
+Module này chỉ dùng thư viện chuẩn vì được nạp ở cả hai phía:
+
+  - desktop app: build_index() đọc central directory một lần và ghi ra file
+    index nhị phân (bản ghi cố định, sắp xếp theo tên) cạnh gói
+  - process backend (Python portable của gói): main() mmap gói và index,
+    cài finder vào sys.meta_path rồi chạy run.py
+
+Trong process backend:
+
+  - file .py được đọc thẳng từ gói (loader kiểu zipimport); bytecode vẫn
+    được cache vào __pycache__ trên đĩa như bình thường
+  - file khác (thư viện native, model, dữ liệu) được giải nén ra đúng vị trí
+    khi có người truy cập: import extension, import package (file native của
+    package và file dữ liệu nằm cạnh __init__.py), hoặc open() vào đường dẫn
+    chưa có trên đĩa
+  - thread nền giải nén trước các file đã được dùng ở lần chạy trước (theo
+    access profile), sau đó tới thư viện native và file nhỏ; file dữ liệu lớn
+    không ai dùng thì không bao giờ được giải nén
+
+Hạn chế: code chỉ kiểm tra os.path.exists()/os.stat() trên file dữ liệu lớn
+chưa được giải nén sẽ thấy file không tồn tại cho tới khi file được mở lần
+đầu hoặc có trong access profile.
+"""
+
+import io
+import os
+import sys
+import json
+import mmap
+import time
+import zlib
+import struct
+import atexit
+import builtins
+import threading
+import zipfile
+import importlib.abc
+import importlib.machinery
+
+PACKAGE_DIR_NAME = ".package"
+PACKAGE_NAME = "backend.zip"
+INDEX_NAME = "backend.idx"
+MARKER_NAME = "lazy.json"
+PROFILE_NAME = "access_profile.json"
+RUNTIME_NAME = "package_runtime.py"
+PTH_NAME = "_ai_dubbing_package.pth"
+
+# Process con (multiprocessing, worker) kích hoạt lại runtime qua file .pth
+ROOT_ENV = "AI_DUBBING_PACKAGE_ROOT"
+CHILD_ENV = "AI_DUBBING_PACKAGE_CHILD"
+
+INDEX_MAGIC = b"ADPIDX1\0"
+_HEADER = struct.Struct("<8sII")  # magic, số bản ghi, dự phòng
+# name_offset, name_len, method, crc32, mtime, local_header_offset, csize, size
+_RECORD = struct.Struct("<IHHIIQQQ")
+_LOCAL_HEADER_SIZE = 30
+
+NATIVE_SUFFIXES = (".pyd", ".so", ".dll", ".dylib")
+# Prefetch file không phải native chỉ khi nhỏ hơn ngưỡng này (hoặc có trong profile)
+PREFETCH_MAX_BYTES = 256 * 1024
+COPY_CHUNK_BYTES = 1024 * 1024
+PROFILE_SAVE_DELAY = 60
+
+
+def is_eager(rel: str) -> bool:
+    """File phải có trên đĩa trước khi interpreter khởi động
+
+    Gồm file ở cấp gốc (run.py, config), Python portable trừ site-packages,
+    và file .pth/metadata trong site-packages (site.py và importlib.metadata
+    đọc trực tiếp từ đĩa).
+    """
+    if "/" not in rel:
+        return True
+    parts = rel.lower().split("/")
+    if parts[0] != "python_portable":
+        return False
+    if "site-packages" not in parts:
+        return True
+    if rel.endswith(".pth"):
+        return True
+    return any(p.endswith((".dist-info", ".egg-info")) for p in parts)
+
+
+def _is_source(rel: str) -> bool:
+    return rel.endswith(".py")
+
+
+def _is_native(rel: str) -> bool:
+    return rel.lower().endswith(NATIVE_SUFFIXES) or ".so." in rel
+
+
+# --- Index (phía desktop app) ---
+
+
+def _zip_mtime(info: zipfile.ZipInfo) -> int:
+    return int(time.mktime(info.date_time + (0, 0, -1)))
+
+
+def build_index(zip_file: zipfile.ZipFile, index_path: str, prefix: str) -> int:
+    """Ghi index của các member dưới prefix, trả về số bản ghi
+
+    Raise ValueError nếu gói có member không đọc trực tiếp được (mã hóa hoặc
+    nén khác stored/deflate); khi đó cần giải nén toàn bộ như bình thường.
+    """
+    entries = []
+    for info in zip_file.infolist():
+        if info.is_dir() or not info.filename.startswith(prefix):
+            continue
+        if info.flag_bits & 0x1 or info.compress_type not in (
+            zipfile.ZIP_STORED,
+            zipfile.ZIP_DEFLATED,
+        ):
+            raise ValueError(f"Member không hỗ trợ chạy trực tiếp: {info.filename}")
+        name = info.filename[len(prefix) :].encode("utf-8")
+        entries.append((name, info))
+    entries.sort(key=lambda e: e[0])
+
+    names = bytearray()
+    records = bytearray()
+    for name, info in entries:
+        records += _RECORD.pack(
+            len(names),
+            len(name),
+            info.compress_type,
+            info.CRC,
+            _zip_mtime(info),
+            info.header_offset,
+            info.compress_size,
+            info.file_size,
+        )
+        names += name
+
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(INDEX_MAGIC, len(entries), 0))
+        f.write(records)
+        f.write(names)
+    os.replace(tmp_path, index_path)
+    return len(entries)
+
+
+def package_dir(root: str) -> str:
+    return os.path.join(root, PACKAGE_DIR_NAME)
+
+
+def is_lazy_install(root) -> bool:
+    return os.path.exists(os.path.join(package_dir(str(root)), MARKER_NAME))
+
+
+def write_marker(root: str):
+    """Ghi dấu hiệu bản cài chạy từ gói (kèm stat của gói để kiểm tra nhanh)"""
+    stat = os.stat(os.path.join(package_dir(root), PACKAGE_NAME))
+    marker_path = os.path.join(package_dir(root), MARKER_NAME)
+    with open(marker_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}, f)
+    os.replace(marker_path + ".tmp", marker_path)
+
+
+def validate_package(root) -> bool:
+    """Gói và index còn nguyên như lúc cài (không phải bản cài lazy thì luôn True)"""
+    pkg_dir = package_dir(str(root))
+    try:
+        with open(os.path.join(pkg_dir, MARKER_NAME), encoding="utf-8") as f:
+            marker = json.load(f)
+    except FileNotFoundError:
+        return True
+    except (OSError, ValueError):
+        return False
+    try:
+        stat = os.stat(os.path.join(pkg_dir, PACKAGE_NAME))
+        with open(os.path.join(pkg_dir, INDEX_NAME), "rb") as f:
+            magic = f.read(len(INDEX_MAGIC))
+    except OSError:
+        return False
+    return (
+        magic == INDEX_MAGIC
+        and stat.st_size == marker["size"]
+        and stat.st_mtime_ns == marker["mtime_ns"]
+    )
+
+
+# --- Runtime (phía process backend) ---
+
+
+class PackageIndex:
+    """Tra cứu member theo tên bằng binary search trên index đã mmap"""
+
+    def __init__(self, index_path: str):
+        with open(index_path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, _ = _HEADER.unpack_from(self._map, 0)
+        if magic != INDEX_MAGIC:
+            raise ValueError(f"Index không hợp lệ: {index_path}")
+        self._names_start = _HEADER.size + self.count * _RECORD.size
+
+    def record(self, i: int) -> tuple:
+        return _RECORD.unpack_from(self._map, _HEADER.size + i * _RECORD.size)
+
+    def name(self, i: int) -> bytes:
+        name_offset, name_len = struct.unpack_from(
+            "<IH", self._map, _HEADER.size + i * _RECORD.size
+        )
+        start = self._names_start + name_offset
+        return self._map[start : start + name_len]
+
+    def _bisect(self, key: bytes) -> int:
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.name(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def lookup(self, rel: str):
+        key = rel.encode("utf-8")
+        i = self._bisect(key)
+        if i < self.count and self.name(i) == key:
+            return self.record(i)
+        return None
+
+    def names_with_prefix(self, prefix: str):
+        key = prefix.encode("utf-8")
+        i = self._bisect(key)
+        while i < self.count:
+            name = self.name(i)
+            if not name.startswith(key):
+                break
+            yield name.decode("utf-8")
+            i += 1
+
+
+class PackageRuntime:
+    def __init__(self, root: str, is_child: bool = False):
+        self.root = os.path.abspath(root)
+        # Chỉ dùng để so khớp (Windows không phân biệt hoa/thường); đường dẫn
+        # tương đối vẫn giữ nguyên hoa/thường vì index phân biệt
+        self._root_prefix = os.path.normcase(self.root + os.sep)
+        pkg_dir = package_dir(self.root)
+        self.index = PackageIndex(os.path.join(pkg_dir, INDEX_NAME))
+        with open(os.path.join(pkg_dir, PACKAGE_NAME), "rb") as f:
+            self._package = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.profile_path = os.path.join(pkg_dir, PROFILE_NAME)
+        self.is_child = is_child
+        self._lock = threading.Lock()
+        self._materialized = set()
+        # rel -> Event của member đang được giải nén bởi một thread khác
+        self._in_flight = {}
+        # Thứ tự truy cập theo nhu cầu trong lần chạy này (ghi vào access profile;
+        # dict dùng như tập có thứ tự)
+        self._accessed = {}
+        self._dir_cache = {}
+        self._orig_open = builtins.open
+
+    # --- Đường dẫn ---
+
+    def _strip_root(self, path: str):
+        """Phần sau root của path (dạng posix, giữ hoa/thường), None nếu ngoài root"""
+        path = os.path.abspath(path)
+        cut = len(self._root_prefix)
+        if os.path.normcase(path + os.sep) == self._root_prefix:
+            return ""
+        if os.path.normcase(path[:cut]) != self._root_prefix:
+            return None
+        return path[cut:].replace(os.sep, "/")
+
+    def rel_path(self, path: str):
+        """Đường dẫn tương đối (dạng posix) trong gói, None nếu nằm ngoài root"""
+        return self._strip_root(path) or None
+
+    def rel_dir(self, entry: str):
+        try:
+            return self._dir_cache[entry]
+        except KeyError:
+            pass
+        rel = self._strip_root(entry or os.getcwd())
+        self._dir_cache[entry] = rel
+        return rel
+
+    def disk_path(self, rel: str) -> str:
+        return os.path.join(self.root, *rel.split("/"))
+
+    # --- Đọc member ---
+
+    def _data_range(self, record) -> tuple:
+        offset = record[5]
+        if self._package[offset : offset + 4] != b"PK\x03\x04":
+            raise OSError("Local header trong gói không hợp lệ")
+        name_len, extra_len = struct.unpack_from("<HH", self._package, offset + 26)
+        start = offset + _LOCAL_HEADER_SIZE + name_len + extra_len
+        return start, start + record[6]
+
+    def _chunks(self, record):
+        """Sinh dữ liệu đã giải nén của member theo từng đoạn"""
+        start, end = self._data_range(record)
+        decompressor = zlib.decompressobj(-15) if record[2] == 8 else None
+        for pos in range(start, end, COPY_CHUNK_BYTES):
+            chunk = self._package[pos : min(pos + COPY_CHUNK_BYTES, end)]
+            yield decompressor.decompress(chunk) if decompressor else chunk
+        if decompressor:
+            yield decompressor.flush()
+
+    def read(self, rel: str) -> bytes:
+        record = self.index.lookup(rel)
+        if record is None:
+            raise FileNotFoundError(rel)
+        data = b"".join(self._chunks(record))
+        if zlib.crc32(data) != record[3]:
+            raise OSError(f"Sai CRC32 khi đọc {rel} từ gói")
+        return data
+
+    # --- Giải nén theo nhu cầu ---
+
+    def materialize(self, rel: str, on_demand: bool = True) -> bool:
+        """Giải nén member ra vị trí của nó trên đĩa (nếu chưa có)
+
+        Mỗi member chỉ do một thread giải nén; thread khác cần cùng member chờ
+        tới khi xong (nếu lần đó lỗi thì tự thử lại) nên khi hàm trả về True
+        file chắc chắn đã có trên đĩa.
+        """
+        while True:
+            with self._lock:
+                if rel in self._materialized:
+                    return True
+                if on_demand:
+                    self._accessed.setdefault(rel)
+                event = self._in_flight.get(rel)
+                if event is None:
+                    event = self._in_flight[rel] = threading.Event()
+                    break
+            event.wait()
+
+        done = False
+        try:
+            done = self._extract(rel)
+        finally:
+            with self._lock:
+                if done:
+                    self._materialized.add(rel)
+                del self._in_flight[rel]
+            event.set()
+        return done
+
+    def _extract(self, rel: str) -> bool:
+        target = self.disk_path(rel)
+        if os.path.exists(target):
+            return True
+        record = self.index.lookup(rel)
+        if record is None:
+            return False
+
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp_path = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+        crc = 0
+        try:
+            with self._orig_open(tmp_path, "wb") as f:
+                for chunk in self._chunks(record):
+                    f.write(chunk)
+                    crc = zlib.crc32(chunk, crc)
+            if crc != record[3]:
+                raise OSError(f"Sai CRC32 khi giải nén {rel}")
+            os.utime(tmp_path, (record[4], record[4]))
+            os.replace(tmp_path, target)
+        except OSError:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+        return True
+
+    def ensure_path(self, path):
+        """Giải nén file nếu path nằm trong root và chưa có trên đĩa"""
+        try:
+            path = os.fspath(path)
+        except TypeError:
+            return
+        if not isinstance(path, str):
+            return
+        if os.path.isabs(path) and not os.path.normcase(path).startswith(
+            self._root_prefix
+        ):
+            return
+        rel = self.rel_path(path)
+        if rel is None or os.path.exists(path):
+            return
+        if self.index.lookup(rel) is not None:
+            try:
+                self.materialize(rel)
+            except OSError:
+                pass
+
+    def materialize_package(self, rel_dir: str, top_level: bool):
+        """Chuẩn bị file không phải .py cho package vừa được import
+
+        File nằm cạnh __init__.py (dữ liệu đọc theo __file__) và, với package
+        cấp cao nhất, mọi thư viện native bên dưới (được nạp qua ctypes/DLL
+        search path mà không đi qua open()).
+        """
+        prefix = rel_dir + "/"
+        for rel in self.index.names_with_prefix(prefix):
+            if _is_source(rel):
+                continue
+            direct = "/" not in rel[len(prefix) :]
+            if direct or (top_level and _is_native(rel)):
+                self.materialize(rel)
+
+    # --- Access profile và prefetch ---
+
+    def load_profile(self) -> list:
+        try:
+            with self._orig_open(self.profile_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return []
+
+    def save_profile(self):
+        """Gộp thứ tự truy cập lần này với profile cũ rồi ghi lại"""
+        if self.is_child:
+            return
+        with self._lock:
+            accessed = list(self._accessed)
+        if not accessed:
+            return
+        seen = set(accessed)
+        profile = accessed + [r for r in self.load_profile() if r not in seen]
+        tmp_path = f"{self.profile_path}.{os.getpid()}.tmp"
+        try:
+            with self._orig_open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(profile, f)
+            os.replace(tmp_path, self.profile_path)
+        except OSError:
+            pass
+
+    def prefetch_order(self) -> list:
+        """Profile trước, rồi thư viện native, rồi file nhỏ"""
+        profile = [r for r in self.load_profile() if not _is_source(r)]
+        seen = set(profile)
+        native, small = [], []
+        for i in range(self.index.count):
+            rel = self.index.name(i).decode("utf-8")
+            if rel in seen or _is_source(rel) or is_eager(rel):
+                continue
+            if _is_native(rel):
+                native.append(rel)
+            elif self.index.record(i)[7] <= PREFETCH_MAX_BYTES:
+                small.append(rel)
+        return profile + native + small
+
+    def _prefetch(self):
+        started = time.monotonic()
+        saved = False
+        for rel in self.prefetch_order():
+            try:
+                self.materialize(rel, on_demand=False)
+            except OSError:
+                pass
+            if not saved and time.monotonic() - started > PROFILE_SAVE_DELAY:
+                self.save_profile()
+                saved = True
+
+    def start_prefetch(self):
+        threading.Thread(
+            target=self._prefetch, name="PackagePrefetch", daemon=True
+        ).start()
+
+    # --- Cài vào interpreter ---
+
+    def install(self):
+        finder = _ArchiveFinder(self)
+        # Trước PathFinder để không bị thư mục rỗng trên đĩa nhận là namespace package
+        position = len(sys.meta_path)
+        for i, entry in enumerate(sys.meta_path):
+            if getattr(entry, "__name__", "") == "PathFinder":
+                position = i
+                break
+        sys.meta_path.insert(position, finder)
+
+        orig_open = self._orig_open
+
+        def open_hook(file, *args, **kwargs):
+            if isinstance(file, (str, os.PathLike)):
+                self.ensure_path(file)
+            return orig_open(file, *args, **kwargs)
+
+        builtins.open = open_hook
+        io.open = open_hook
+        atexit.register(self.save_profile)
+
+
+class _ArchiveFinder:
+    """Tìm module .py/extension trong gói cho các thư mục nằm dưới root"""
+
+    def __init__(self, runtime: PackageRuntime):
+        self.runtime = runtime
+
+    def find_spec(self, fullname, path=None, target=None):
+        runtime = self.runtime
+        name = fullname.rpartition(".")[2]
+        for entry in path if path is not None else sys.path:
+            if not isinstance(entry, str):
+                continue
+            rel_dir = runtime.rel_dir(entry)
+            if rel_dir is None:
+                continue
+            base = f"{rel_dir}/{name}" if rel_dir else name
+            init_rel = base + "/__init__.py"
+            if is_eager(init_rel):
+                # Python portable: đã có đầy đủ trên đĩa
+                continue
+
+            if runtime.index.lookup(init_rel) is not None:
+                return self._spec(fullname, init_rel, package=True)
+
+            for suffix in importlib.machinery.EXTENSION_SUFFIXES:
+                if runtime.index.lookup(base + suffix) is not None:
+                    # Extension phải là file thật: giải nén rồi để PathFinder nạp
+                    runtime.materialize(base + suffix)
+                    return None
+
+            if runtime.index.lookup(base + ".py") is not None:
+                return self._spec(fullname, base + ".py", package=False)
+        return None
+
+    def _spec(self, fullname, rel, package):
+        path = self.runtime.disk_path(rel)
+        loader = _ArchiveLoader(self.runtime, fullname, path, rel)
+        spec = importlib.machinery.ModuleSpec(fullname, loader, origin=path)
+        spec.has_location = True
+        if package:
+            spec.submodule_search_locations = [os.path.dirname(path)]
+        return spec
+
+
+class _ArchiveLoader(importlib.abc.SourceLoader):
+    """Loader kiểu zipimport: nguồn đọc từ gói, bytecode cache trên đĩa"""
+
+    def __init__(self, runtime: PackageRuntime, fullname, path, rel):
+        self.runtime = runtime
+        self.name = fullname
+        self.path = path
+        self.rel = rel
+
+    def get_filename(self, fullname=None):
+        return self.path
+
+    def is_package(self, fullname):
+        return self.rel.endswith("/__init__.py")
+
+    def path_stats(self, path):
+        record = self.runtime.index.lookup(self.rel)
+        return {"mtime": record[4], "size": record[7]}
+
+    def get_data(self, path):
+        try:
+            with self.runtime._orig_open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            rel = self.runtime.rel_path(path)
+            if rel is None:
+                raise
+            return self.runtime.read(rel)
+
+    def set_data(self, path, data):
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with self.runtime._orig_open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+
+    def exec_module(self, module):
+        if self.is_package(self.name):
+            self.runtime.materialize_package(
+                self.rel.rpartition("/")[0], top_level="." not in self.name
+            )
+        super().exec_module(module)
+
+
+_runtime = None
+
+
+def activate(root: str) -> PackageRuntime:
+    """Cài runtime vào interpreter hiện tại (idempotent)"""
+    global _runtime
+    if _runtime is not None:
+        return _runtime
+    is_child = bool(os.getenv(CHILD_ENV))
+    _runtime = PackageRuntime(root, is_child=is_child)
+    _runtime.install()
+    if not is_child:
+        _runtime.start_prefetch()
+    # Process con kế thừa: kích hoạt lại qua .pth, không prefetch/ghi profile
+    os.environ[ROOT_ENV] = root
+    os.environ[CHILD_ENV] = "1"
+    return _runtime
+
+
+def activate_from_env():
+    """Gọi từ file .pth trong site-packages; không làm gì nếu biến môi trường chưa đặt"""
+    root = os.getenv(ROOT_ENV)
+    if root and os.path.isdir(root):
+        activate(root)
+
+
+def main():
+    """python package_runtime.py <root>/run.py [args...]"""
+    import runpy
+
+    script = os.path.abspath(sys.argv[1])
+    root = os.path.dirname(script)
+    # Lần khởi động đầu của backend không phải process con
+    os.environ.pop(CHILD_ENV, None)
+    activate(root)
+    sys.argv = [script] + sys.argv[2:]
+    sys.path[0] = root
+    runpy.run_path(script, run_name="__main__")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+import os
+import threading
+import time
+import logging
+from collections import deque
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Optional
+
+import psutil
+import requests
+
+from app_settings import settings_store
+from backend_manager import backend_manager
+
+logger = logging.getLogger(__name__)
+
+CHROMIUM_PROCESS_NAME = "QtWebEngineProcess"
+
+
+@dataclass
+class ProcessSample:
+    """Số liệu của một nhóm process tại một thời điểm"""
+
+    pids: list = field(default_factory=list)
+    cpu_percent: float = 0.0
+    rss_bytes: int = 0
+    threads: int = 0
+    handles: int = 0
+
+
+@dataclass
+class MonitorSnapshot:
+    """Một lần lấy mẫu của ResourceMonitor"""
+
+    timestamp: float
+    ui: ProcessSample
+    backend: ProcessSample
+    chromium: ProcessSample
+    # Số liệu backend tự báo cáo (queue depth, latency...), có thể rỗng
+    backend_stats: dict = field(default_factory=dict)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class ResourceMonitor:
+    """Lấy mẫu CPU, RSS, thread, handle của UI, backend và Chromium theo chu kỳ.
+
+    Chạy trên một thread nền; mỗi lần lấy mẫu cũng ghi file metrics dạng
+    Prometheus text format để có thể gom bằng node_exporter textfile collector.
+    """
+
+    def __init__(
+        self,
+        interval: float = 2.0,
+        history_size: int = 300,
+        metrics_path: Optional[Path] = None,
+    ):
+        self.interval = interval
+        self.metrics_path = metrics_path or (
+            backend_manager.app_data_dir / "metrics.prom"
+        )
+        self.history = deque(maxlen=history_size)
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        # Giữ lại psutil.Process để cpu_percent() tính được chênh lệch giữa hai lần
+        self._processes = {}
+
+    def start(self):
+        """Bắt đầu lấy mẫu trên thread nền"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="ResourceMonitor", daemon=True
+        )
+        self._thread.start()
+        logger.info(f"Resource monitor started (interval {self.interval}s)")
+
+    def stop(self):
+        """Dừng lấy mẫu"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval + 5)
+            self._thread = None
+
+    def set_interval(self, interval: float):
+        """Đổi chu kỳ lấy mẫu, áp dụng từ lần lấy mẫu kế tiếp"""
+        self.interval = max(0.2, float(interval))
+
+    def latest(self) -> Optional[MonitorSnapshot]:
+        """Mẫu gần nhất (None nếu chưa có)"""
+        with self._lock:
+            return self.history[-1] if self.history else None
+
+    def rss_trend(self, group: str = "backend") -> float:
+        """Độ dốc RSS (byte/giây) của nhóm process trên toàn bộ lịch sử
+
+        Giá trị dương kéo dài trong phiên dài là dấu hiệu rò rỉ bộ nhớ.
+        """
+        with self._lock:
+            points = [(s.timestamp, getattr(s, group).rss_bytes) for s in self.history]
+        if len(points) < 2:
+            return 0.0
+
+        n = len(points)
+        mean_t = sum(t for t, _ in points) / n
+        mean_v = sum(v for _, v in points) / n
+        denom = sum((t - mean_t) ** 2 for t, _ in points)
+        if denom == 0:
+            return 0.0
+        return sum((t - mean_t) * (v - mean_v) for t, v in points) / denom
+
+    def sample(self) -> MonitorSnapshot:
+        """Lấy một mẫu ngay lập tức"""
+        ui_process = psutil.Process(os.getpid())
+
+        chromium_pids = []
+        try:
+            for child in ui_process.children(recursive=True):
+                if child.name().startswith(CHROMIUM_PROCESS_NAME):
+                    chromium_pids.append(child.pid)
+        except psutil.Error:
+            pass
+
+        backend_pids = []
+        # Chỉ đọc trạng thái của backend_manager, không gọi is_backend_running()
+        # (hàm đó đặt process = None) từ thread này
+        process = backend_manager.process
+        if process is not None and process.poll() is None:
+            backend_pid = process.pid
+            backend_pids.append(backend_pid)
+            try:
+                backend_pids.extend(
+                    p.pid for p in psutil.Process(backend_pid).children(recursive=True)
+                )
+            except psutil.Error:
+                pass
+
+        snapshot = MonitorSnapshot(
+            timestamp=time.time(),
+            ui=self._sample_group([ui_process.pid]),
+            backend=self._sample_group(backend_pids),
+            chromium=self._sample_group(chromium_pids),
+            backend_stats=self._fetch_backend_stats() if backend_pids else {},
+        )
+
+        alive = set(backend_pids) | set(chromium_pids) | {ui_process.pid}
+        for pid in list(self._processes):
+            if pid not in alive:
+                del self._processes[pid]
+
+        return snapshot
+
+    def _sample_group(self, pids) -> ProcessSample:
+        result = ProcessSample()
+        for pid in pids:
+            process = self._processes.get(pid)
+            try:
+                if process is None:
+                    process = psutil.Process(pid)
+                    self._processes[pid] = process
+                with process.oneshot():
+                    result.cpu_percent += process.cpu_percent(interval=None)
+                    result.rss_bytes += process.memory_info().rss
+                    result.threads += process.num_threads()
+                    if os.name == "nt":
+                        result.handles += process.num_handles()
+                    else:
+                        result.handles += process.num_fds()
+                result.pids.append(pid)
+            except psutil.Error:
+                self._processes.pop(pid, None)
+        return result
+
+    def _fetch_backend_stats(self) -> dict:
+        """Đọc số liệu queue/latency do backend tự báo cáo"""
+        try:
+            response = requests.get(
+                f"{backend_manager.base_url}/v1/check/metrics", timeout=1
+            )
+            if response.status_code != 200:
+                return {}
+            data = response.json()
+        except (requests.exceptions.RequestException, ValueError):
+            return {}
+
+        if not isinstance(data, dict):
+            return {}
+        return {
+            key: value
+            for key, value in data.items()
+            if isinstance(value, (int, float)) and not isinstance(value, bool)
+        }
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            started = time.monotonic()
+            try:
+                snapshot = self.sample()
+                with self._lock:
+                    self.history.append(snapshot)
+                self.write_metrics(snapshot)
+            except Exception as e:
+                logger.error(f"Lỗi khi lấy mẫu tài nguyên: {e}")
+
+            elapsed = time.monotonic() - started
+            self._stop_event.wait(max(0.0, self.interval - elapsed))
+
+    def write_metrics(self, snapshot: MonitorSnapshot):
+        """Ghi snapshot ra file Prometheus text format (ghi đè nguyên tử)"""
+        lines = []
+
+        def gauge(name, help_text, values):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            for labels, value in values:
+                if labels:
+                    lines.append(f"{name}{{{labels}}} {value}")
+                else:
+                    lines.append(f"{name} {value}")
+
+        groups = [
+            ("ui", snapshot.ui),
+            ("backend", snapshot.backend),
+            ("chromium", snapshot.chromium),
+        ]
+        gauge(
+            "ai_dubbing_process_cpu_percent",
+            "CPU usage of the process group in percent of one core.",
+            [(f'group="{g}"', s.cpu_percent) for g, s in groups],
+        )
+        gauge(
+            "ai_dubbing_process_resident_memory_bytes",
+            "Resident set size of the process group.",
+            [(f'group="{g}"', s.rss_bytes) for g, s in groups],
+        )
+        gauge(
+            "ai_dubbing_process_threads",
+            "Number of OS threads in the process group.",
+            [(f'group="{g}"', s.threads) for g, s in groups],
+        )
+        gauge(
+            "ai_dubbing_process_open_handles",
+            "Open handles (Windows) or file descriptors in the process group.",
+            [(f'group="{g}"', s.handles) for g, s in groups],
+        )
+        gauge(
+            "ai_dubbing_process_count",
+            "Number of live processes in the group.",
+            [(f'group="{g}"', len(s.pids)) for g, s in groups],
+        )
+        for key, value in sorted(snapshot.backend_stats.items()):
+            metric = "".join(c if c.isalnum() else "_" for c in key.lower())
+            gauge(
+                f"ai_dubbing_backend_{metric}",
+                f"Backend reported value '{key}'.",
+                [("", value)],
+            )
+
+        content = "\n".join(lines) + "\n"
+        try:
+            self.metrics_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.metrics_path.with_suffix(".prom.tmp")
+            tmp_path.write_text(content, encoding="utf-8")
+            os.replace(tmp_path, self.metrics_path)
+        except OSError as e:
+            logger.warning(f"Không thể ghi file metrics: {e}")
+
+
+# Singleton instance
+resource_monitor = ResourceMonitor(interval=settings_store.settings.monitor_interval)
+settings_store.subscribe(
+    lambda settings, changed: resource_monitor.set_interval(settings.monitor_interval)
+)
@@ -0,0 +1,383 @@
+"""Profiler lấy mẫu (sampling) và bộ đếm hot-path cho desktop app đang chạy.
+
+Khi bật, một thread nền đọc stack của mọi thread Python (sys._current_frames)
+với tần số cấu hình được, đồng thời đếm log record, HTTP call (tách riêng
+call tới backend) và event/signal Qt (xem ui/event_counter.py). Khi tắt,
+kết quả được ghi vào thư mục profiles/ cạnh app.log:
+
+  - profile-<thời điểm>.collapsed: định dạng collapsed stack, mở được bằng
+    flamegraph.pl, speedscope, inferno...
+  - profile-<thời điểm>.svg: flame graph (icicle) xem trực tiếp bằng trình duyệt
+  - profile-<thời điểm>.json: counter, CPU theo thread, chi phí của profiler
+
+Bật/tắt bằng Ctrl+Shift+P, nút trong hộp thoại cài đặt, hoặc đặt biến môi
+trường AI_DUBBING_PROFILE=1 (AI_DUBBING_PROFILE_HZ để đổi tần số) trước khi
+chạy app. Mẫu là wall-clock: thread đang chờ (event loop, Event.wait) cũng
+xuất hiện, CPU thực của từng thread nằm trong file .json.
+"""
+
+import os
+import sys
+import json
+import time
+import zlib
+import logging
+import threading
+from collections import Counter
+from html import escape
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlsplit
+
+import psutil
+import requests
+
+from app_settings import settings_store
+from backend_manager import backend_manager
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ENV = "AI_DUBBING_PROFILE"
+PROFILE_HZ_ENV = "AI_DUBBING_PROFILE_HZ"
+
+_SVG_WIDTH = 1200
+_SVG_ROW_HEIGHT = 16
+_SVG_MIN_WIDTH = 0.5
+
+
+class HotCounters:
+    """Bộ đếm sự kiện trên hot path; không làm gì khi profiler tắt"""
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._counts = Counter()
+
+    def add(self, name: str, value: float = 1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counts[name] += value
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            items = sorted(self._counts.items())
+        return {name: round(value, 3) for name, value in items}
+
+
+hot_counters = HotCounters()
+
+
+class _LogRecordCounter(logging.Handler):
+    """Đếm log record theo mức, gắn vào root logger khi profiler chạy"""
+
+    def emit(self, record):
+        hot_counters.add(f"log.{record.levelname}")
+
+
+class SamplingProfiler:
+    """Lấy mẫu stack của mọi thread Python trên một thread nền"""
+
+    def __init__(self, output_dir: Path, rate_hz: int = 100):
+        self.output_dir = Path(output_dir)
+        self.rate_hz = rate_hz
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stacks = Counter()
+        self._labels = {}
+        self._samples = 0
+        self._sampler_cpu = 0.0
+        self._started = 0.0
+        self._thread_cpu_start = {}
+        self._log_handler = _LogRecordCounter()
+        self._original_send = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def set_rate(self, rate_hz: int):
+        """Đổi tần số lấy mẫu, áp dụng ngay cả khi đang chạy"""
+        self.rate_hz = max(1, int(rate_hz))
+
+    def start(self) -> bool:
+        if self.is_running:
+            return False
+        with self._lock:
+            self._stacks.clear()
+            self._samples = 0
+            self._sampler_cpu = 0.0
+        hot_counters.reset()
+        hot_counters.enabled = True
+        logging.getLogger().addHandler(self._log_handler)
+        self._install_http_hook()
+        self._thread_cpu_start = self._thread_cpu_times()
+        self._started = time.time()
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="SamplingProfiler", daemon=True
+        )
+        self._thread.start()
+        logger.info(f"Sampling profiler started ({self.rate_hz} Hz)")
+        return True
+
+    def stop(self) -> Optional[Path]:
+        """Dừng lấy mẫu và ghi kết quả, trả về đường dẫn file .svg"""
+        if not self.is_running:
+            return None
+        self._stop_event.set()
+        self._thread.join(timeout=5)
+        self._thread = None
+        hot_counters.enabled = False
+        logging.getLogger().removeHandler(self._log_handler)
+        self._remove_http_hook()
+        try:
+            return self.write_results()
+        except OSError as e:
+            logger.error(f"Không thể ghi kết quả profiler: {e}")
+            return None
+
+    def toggle(self) -> Optional[Path]:
+        """Bật nếu đang tắt; tắt và trả về file kết quả nếu đang bật"""
+        if self.is_running:
+            return self.stop()
+        self.start()
+        return None
+
+    # --- Lấy mẫu ---
+
+    def _run(self):
+        own_ident = threading.get_ident()
+        cpu_start = time.thread_time()
+        names = {}
+        names_refreshed = 0.0
+        next_sample = time.perf_counter()
+        while True:
+            now = time.perf_counter()
+            if now - names_refreshed > 1.0:
+                names = {t.ident: t.name for t in threading.enumerate()}
+                names_refreshed = now
+            self._sample(own_ident, names)
+
+            # Giữ nhịp theo lịch, không tích lũy trễ khi một lần lấy mẫu chậm
+            next_sample = max(next_sample + 1.0 / self.rate_hz, now)
+            if self._stop_event.wait(max(0.0, next_sample - time.perf_counter())):
+                break
+        with self._lock:
+            self._sampler_cpu += time.thread_time() - cpu_start
+
+    def _sample(self, own_ident: int, names: dict):
+        frames = sys._current_frames()
+        stacks = []
+        for ident, frame in frames.items():
+            if ident == own_ident:
+                continue
+            codes = []
+            while frame is not None:
+                codes.append(frame.f_code)
+                frame = frame.f_back
+            codes.reverse()
+            stacks.append((names.get(ident, f"thread-{ident}"), tuple(codes)))
+        del frames
+        with self._lock:
+            for key in stacks:
+                self._stacks[key] += 1
+            self._samples += 1
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            parts = Path(code.co_filename).parts[-2:]
+            label = f"{code.co_name} ({'/'.join(parts)}:{code.co_firstlineno})"
+            self._labels[code] = label
+        return label
+
+    def _thread_cpu_times(self) -> dict:
+        """CPU (giây) của từng OS thread, theo native id"""
+        try:
+            return {
+                t.id: t.user_time + t.system_time
+                for t in psutil.Process(os.getpid()).threads()
+            }
+        except psutil.Error:
+            return {}
+
+    # --- Bộ đếm HTTP ---
+
+    def _install_http_hook(self):
+        if self._original_send is not None:
+            return
+        original_send = requests.sessions.Session.send
+        self._original_send = original_send
+
+        def send(session, request, **kwargs):
+            started = time.perf_counter()
+            try:
+                return original_send(session, request, **kwargs)
+            finally:
+                url = request.url or ""
+                target = (
+                    "backend" if url.startswith(backend_manager.base_url) else "other"
+                )
+                hot_counters.add(f"http.{target}.calls")
+                hot_counters.add(
+                    f"http.{target}.ms", (time.perf_counter() - started) * 1000
+                )
+                if target == "backend":
+                    hot_counters.add(f"http.backend {urlsplit(url).path}")
+
+        requests.sessions.Session.send = send
+
+    def _remove_http_hook(self):
+        if self._original_send is not None:
+            requests.sessions.Session.send = self._original_send
+            self._original_send = None
+
+    # --- Ghi kết quả ---
+
+    def collapsed_stacks(self) -> dict:
+        """{"thread;frame;frame": số mẫu}, frame gốc trước"""
+        with self._lock:
+            items = list(self._stacks.items())
+        stacks = Counter()
+        for (thread_name, codes), count in items:
+            frames = [thread_name] + [self._label(code) for code in codes]
+            stacks[";".join(f.replace(";", ":") for f in frames)] += count
+        return dict(stacks)
+
+    def write_results(self) -> Path:
+        duration = time.time() - self._started
+        stacks = self.collapsed_stacks()
+        with self._lock:
+            samples = self._samples
+            sampler_cpu = self._sampler_cpu
+
+        names = {t.native_id: t.name for t in threading.enumerate()}
+        cpu_end = self._thread_cpu_times()
+        thread_cpu = {
+            names.get(tid, f"native-{tid}"): round(
+                cpu - self._thread_cpu_start.get(tid, 0.0), 3
+            )
+            for tid, cpu in cpu_end.items()
+        }
+        summary = {
+            "started": self._started,
+            "duration_s": round(duration, 3),
+            "rate_hz": self.rate_hz,
+            "samples": samples,
+            "sampler_cpu_s": round(sampler_cpu, 3),
+            "sampler_overhead_percent": (
+                round(sampler_cpu / duration * 100, 2) if duration > 0 else 0.0
+            ),
+            "thread_cpu_s": dict(sorted(thread_cpu.items(), key=lambda item: -item[1])),
+            "counters": hot_counters.snapshot(),
+        }
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        base = self.output_dir / f"profile-{time.strftime('%Y%m%d-%H%M%S')}"
+        collapsed = "".join(
+            f"{stack} {count}\n" for stack, count in sorted(stacks.items())
+        )
+        _write_atomic(base.with_suffix(".collapsed"), collapsed)
+        _write_atomic(base.with_suffix(".json"), json.dumps(summary, indent=2))
+        svg_path = base.with_suffix(".svg")
+        _write_atomic(
+            svg_path,
+            render_flamegraph(
+                stacks, f"AI Video Dubbing - {samples} mẫu, {duration:.1f}s"
+            ),
+        )
+        logger.info(
+            f"Đã ghi profile: {svg_path} ({samples} mẫu, "
+            f"profiler tốn {summary['sampler_overhead_percent']}% CPU)"
+        )
+        return svg_path
+
+
+def _write_atomic(path: Path, content: str):
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    tmp_path.write_text(content, encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def render_flamegraph(stacks: dict, title: str) -> str:
+    """Vẽ flame graph dạng icicle (gốc ở trên) thành SVG độc lập"""
+    root = {"value": 0, "children": {}}
+    for stack, count in stacks.items():
+        node = root
+        node["value"] += count
+        for frame in stack.split(";"):
+            node = node["children"].setdefault(frame, {"value": 0, "children": {}})
+            node["value"] += count
+
+    total = root["value"] or 1
+    rects = []
+    max_depth = 0
+
+    def layout(node, x, depth):
+        nonlocal max_depth
+        for name, child in sorted(node["children"].items()):
+            width = child["value"] / total * _SVG_WIDTH
+            if width >= _SVG_MIN_WIDTH:
+                max_depth = max(max_depth, depth)
+                rects.append((name, child["value"], x, depth, width))
+                layout(child, x, depth + 1)
+            x += width
+
+    layout(root, 0.0, 0)
+
+    top = 2 * _SVG_ROW_HEIGHT
+    height = top + (max_depth + 1) * _SVG_ROW_HEIGHT + 4
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{_SVG_WIDTH}" '
+        f'height="{height}" font-family="monospace" font-size="11">',
+        f'<text x="4" y="{_SVG_ROW_HEIGHT}">{escape(title)}</text>',
+    ]
+    for name, value, x, depth, width in rects:
+        y = top + depth * _SVG_ROW_HEIGHT
+        # Màu cố định theo tên hàm để dễ so giữa các lần chụp
+        hue = zlib.crc32(name.encode("utf-8")) % 60
+        percent = value / total * 100
+        label = escape(name)
+        parts.append(
+            f"<g><title>{label}: {value} mẫu ({percent:.1f}%)</title>"
+            f'<rect x="{x:.2f}" y="{y}" width="{width:.2f}" '
+            f'height="{_SVG_ROW_HEIGHT - 1}" fill="hsl({hue},80%,60%)"/>'
+        )
+        chars = int(width / 7)
+        if chars >= 3:
+            text = name if len(name) <= chars else name[: chars - 2] + ".."
+            parts.append(f'<text x="{x + 2:.2f}" y="{y + 12}">{escape(text)}</text>')
+        parts.append("</g>")
+    parts.append("</svg>")
+    return "\n".join(parts)
+
+
+def start_from_env() -> bool:
+    """Bật profiler ngay khi khởi động nếu đặt AI_DUBBING_PROFILE"""
+    if os.getenv(PROFILE_ENV, "") in ("", "0"):
+        return False
+    if os.getenv(PROFILE_HZ_ENV):
+        try:
+            sampling_profiler.set_rate(int(os.environ[PROFILE_HZ_ENV]))
+        except ValueError:
+            logger.warning(
+                f"{PROFILE_HZ_ENV} không hợp lệ, dùng {sampling_profiler.rate_hz} Hz"
+            )
+    return sampling_profiler.start()
+
+
+# Singleton instance
+sampling_profiler = SamplingProfiler(
+    backend_manager.app_data_dir / "profiles",
+    rate_hz=settings_store.settings.profiler_rate_hz,
+)
+settings_store.subscribe(
+    lambda settings, changed: sampling_profiler.set_rate(settings.profiler_rate_hz)
+)
@@ -0,0 +1,245 @@
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SetupCancelled(Exception):
+    """Quá trình setup bị hủy"""
+
+
+class StepFailed(Exception):
+    """Một bước setup thất bại; message được hiển thị cho người dùng"""
+
+
+@dataclass
+class SetupStep:
+    name: str
+    func: Callable
+    deps: tuple = ()
+    # Tỉ trọng của bước trong thanh tiến trình chung
+    weight: float = 0.0
+    # Bước tùy chọn thất bại không làm hỏng cả quá trình
+    optional: bool = False
+    status: str = "pending"  # pending, running, done, failed, skipped
+    started_at: Optional[float] = None
+    duration: Optional[float] = None
+    error: Optional[str] = None
+    fraction: float = 0.0
+
+
+@dataclass
+class SetupContext:
+    """Trạng thái dùng chung giữa các bước, truyền vào mỗi hàm của bước"""
+
+    graph: "SetupGraph"
+    results: dict = field(default_factory=dict)
+
+    @property
+    def cancel_event(self) -> threading.Event:
+        """Truyền cho các lời gọi chặn lâu (mạng, sleep) để dừng ngay khi hủy"""
+        return self.graph.cancel_event
+
+    @property
+    def cancelled(self) -> bool:
+        return self.graph.cancel_event.is_set()
+
+    def check_cancelled(self):
+        """Ném SetupCancelled nếu đã bị hủy - gọi trong vòng lặp dài"""
+        if self.cancelled:
+            raise SetupCancelled()
+
+    def report(self, step_name: str, percent: int, message: str = None):
+        """Báo tiến trình (0-100) của một bước"""
+        self.graph._report(step_name, percent, message)
+
+    def status(self, message: str):
+        self.graph._emit_status(message)
+
+
+class SetupGraph:
+    """Chạy các bước setup theo đồ thị phụ thuộc trên thread pool.
+
+    Bước chỉ chạy khi mọi bước nó phụ thuộc đã xong, các bước độc lập chạy
+    song song, nên tổng thời gian bằng đường găng (critical path) thay vì
+    tổng thời gian các bước. Tiến trình của mọi bước được gộp thành một
+    luồng (message, percent) duy nhất theo weight.
+    """
+
+    def __init__(self, max_workers: int = 4):
+        self.max_workers = max_workers
+        self.steps = {}
+        self.cancel_event = threading.Event()
+        self.cancel_requested = False
+        self.progress_callback = None
+        self.status_callback = None
+        self._lock = threading.Lock()
+        self._last_percent = -1
+
+    def add(
+        self,
+        name: str,
+        func: Callable,
+        deps=(),
+        weight: float = 0.0,
+        optional: bool = False,
+    ) -> SetupStep:
+        """Thêm bước; func(ctx) trả về kết quả lưu vào ctx.results[name]"""
+        for dep in deps:
+            if dep not in self.steps:
+                raise ValueError(f"Bước '{name}' phụ thuộc bước chưa khai báo '{dep}'")
+        step = SetupStep(name, func, tuple(deps), weight, optional)
+        self.steps[name] = step
+        return step
+
+    def cancel(self):
+        """Yêu cầu hủy: không chạy thêm bước mới, bước đang chạy tự kiểm tra"""
+        self.cancel_requested = True
+        self.cancel_event.set()
+
+    def run(self, progress_callback=None, status_callback=None) -> SetupContext:
+        """Chạy toàn bộ đồ thị, ném StepFailed/SetupCancelled nếu thất bại"""
+        self.progress_callback = progress_callback
+        self.status_callback = status_callback
+        ctx = SetupContext(self)
+        failure = None
+        started = time.perf_counter()
+
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="setup"
+        ) as pool:
+            running = {}
+
+            while True:
+                if failure is None and not self.cancel_event.is_set():
+                    for step in self._ready_steps():
+                        step.status = "running"
+                        step.started_at = time.perf_counter()
+                        running[pool.submit(self._run_step, step, ctx)] = step
+
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    step = running.pop(future)
+                    step.duration = time.perf_counter() - step.started_at
+                    try:
+                        ctx.results[step.name] = future.result()
+                        step.status = "done"
+                        step.fraction = 1.0
+                    except SetupCancelled:
+                        step.status = "failed"
+                        step.error = "cancelled"
+                    except Exception as e:
+                        step.status = "failed"
+                        step.error = str(e)
+                        if step.optional:
+                            logger.warning(f"Bước tùy chọn '{step.name}' lỗi: {e}")
+                            ctx.results[step.name] = None
+                            step.status = "skipped"
+                        elif failure is None:
+                            failure = e
+                            # Báo cho các bước đang chạy dừng sớm
+                            self.cancel_event.set()
+                    self._emit_progress(None)
+
+        self._log_timings(time.perf_counter() - started)
+
+        if self.cancel_requested:
+            raise SetupCancelled()
+        if failure is not None:
+            if isinstance(failure, StepFailed):
+                raise failure
+            raise StepFailed(str(failure)) from failure
+        return ctx
+
+    def timings(self) -> dict:
+        """Thời gian (giây) của từng bước đã chạy"""
+        return {
+            name: round(step.duration, 3)
+            for name, step in self.steps.items()
+            if step.duration is not None
+        }
+
+    def critical_path(self) -> tuple:
+        """Chuỗi bước dài nhất theo thời gian thực đo và tổng thời gian của nó"""
+        best = {}
+        for name in self._topological_order():
+            step = self.steps[name]
+            duration = step.duration or 0.0
+            prev = max(
+                (best[d] for d in step.deps),
+                key=lambda item: item[0],
+                default=(0.0, []),
+            )
+            best[name] = (prev[0] + duration, prev[1] + [name])
+        if not best:
+            return [], 0.0
+        total, path = max(best.values(), key=lambda item: item[0])
+        return path, total
+
+    def _ready_steps(self):
+        return [
+            step
+            for step in self.steps.values()
+            if step.status == "pending"
+            and all(self.steps[d].status in ("done", "skipped") for d in step.deps)
+        ]
+
+    def _topological_order(self):
+        order, seen = [], set()
+
+        def visit(name):
+            if name in seen:
+                return
+            seen.add(name)
+            for dep in self.steps[name].deps:
+                visit(dep)
+            order.append(name)
+
+        for name in self.steps:
+            visit(name)
+        return order
+
+    def _run_step(self, step: SetupStep, ctx: SetupContext):
+        if self.cancel_event.is_set():
+            raise SetupCancelled()
+        return step.func(ctx)
+
+    def _report(self, step_name: str, percent: int, message: str = None):
+        step = self.steps[step_name]
+        step.fraction = max(0.0, min(percent, 100)) / 100
+        self._emit_progress(message)
+
+    def _emit_progress(self, message):
+        total_weight = sum(s.weight for s in self.steps.values())
+        if not total_weight or not self.progress_callback:
+            return
+        percent = int(
+            sum(s.weight * s.fraction for s in self.steps.values()) / total_weight * 100
+        )
+        with self._lock:
+            # Chỉ phát khi phần trăm thay đổi hoặc có message mới
+            if message is None and percent == self._last_percent:
+                return
+            self._last_percent = percent
+        self.progress_callback(message or f"Đang chuẩn bị: {percent}%", percent)
+
+    def _emit_status(self, message: str):
+        if self.status_callback:
+            self.status_callback(message)
+
+    def _log_timings(self, wall_time: float):
+        path, path_time = self.critical_path()
+        serial = sum(s.duration or 0.0 for s in self.steps.values())
+        logger.info(
+            f"Setup kết thúc sau {wall_time:.2f}s (tổng các bước {serial:.2f}s, "
+            f"đường găng {path_time:.2f}s: {' -> '.join(path)})"
+        )
+        for name, duration in self.timings().items():
+            logger.info(f"  {name}: {duration:.3f}s ({self.steps[name].status})")
@@ -0,0 +1,252 @@
+"""Bản cài backend dùng chung cho mọi user của máy (chỉ đọc).
+
+Quản trị viên cài gói một lần vào thư mục của máy:
+
+    python shared_install.py install python_client_backend.zip
+    python shared_install.py remove
+
+Mặc định là %PROGRAMDATA%/ai_dubbing (Windows) hoặc /opt/ai_dubbing, đổi
+bằng --root hoặc biến môi trường AI_DUBBING_SHARED_ROOT. Bytecode được biên
+dịch sẵn bằng chính Python portable của backend và toàn bộ cây được đặt
+chỉ đọc.
+
+Mỗi user chạy backend từ bản chung với một overlay nhỏ trong APPDATA làm
+thư mục làm việc: file ở cấp gốc được hardlink (copy nếu khác ổ đĩa), thư
+mục được symlink/junction về bản chung, riêng logs/cache/tmp là thư mục
+thật của user. Đường dẫn ghi được cũng được truyền cho backend qua biến
+môi trường AI_DUBBING_*_DIR.
+"""
+
+import os
+import stat
+import json
+import time
+import shutil
+import logging
+import argparse
+import subprocess
+from pathlib import Path
+
+import install_manifest
+
+logger = logging.getLogger(__name__)
+
+SHARED_ROOT_ENV = "AI_DUBBING_SHARED_ROOT"
+BACKEND_DIR_NAME = "client_backend"
+OVERLAY_STAMP_NAME = ".overlay.json"
+# Thư mục backend ghi vào: mỗi user có bản riêng thay vì link về bản chung
+WRITABLE_DIRS = install_manifest.RUNTIME_WRITABLE_DIRS
+
+
+def shared_root() -> Path:
+    """Thư mục dữ liệu dùng chung của máy"""
+    if os.getenv(SHARED_ROOT_ENV):
+        return Path(os.environ[SHARED_ROOT_ENV])
+    if os.name == "nt":
+        return Path(os.getenv("PROGRAMDATA", r"C:\ProgramData")) / "ai_dubbing"
+    return Path("/opt/ai_dubbing")
+
+
+def shared_backend_dir(root: Path = None) -> Path:
+    return Path(root or shared_root()) / BACKEND_DIR_NAME
+
+
+# --- Overlay của từng user ---
+
+
+def _link_file(src: Path, dst: Path):
+    """Hardlink file, copy nếu không link được (khác ổ đĩa, FAT32...)"""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def _link_dir(src: Path, dst: Path):
+    """Symlink thư mục; Windows không có quyền tạo symlink thì dùng junction"""
+    try:
+        os.symlink(src, dst, target_is_directory=True)
+    except OSError:
+        if os.name != "nt":
+            raise
+        import _winapi
+
+        _winapi.CreateJunction(str(src), str(dst))
+
+
+def _overlay_stamp(shared_dir: Path) -> dict:
+    manifest = install_manifest.load_manifest(shared_dir) or {}
+    return {"shared_dir": str(shared_dir), "created": manifest.get("created")}
+
+
+def _is_link(entry) -> bool:
+    """Symlink hoặc junction (Windows)"""
+    if entry.is_symlink():
+        return True
+    reparse_tag = getattr(entry.stat(follow_symlinks=False), "st_reparse_tag", 0)
+    return reparse_tag == getattr(stat, "IO_REPARSE_TAG_MOUNT_POINT", -1)
+
+
+def _clear_overlay(overlay_dir: Path):
+    """Gỡ link/file cũ của overlay, giữ nguyên dữ liệu trong WRITABLE_DIRS"""
+    for entry in os.scandir(overlay_dir):
+        if _is_link(entry) or entry.is_file(follow_symlinks=False):
+            # Chỉ gỡ link, không đụng tới bản chung (Windows: cả link thư mục)
+            os.unlink(entry.path)
+        elif entry.name not in WRITABLE_DIRS:
+            shutil.rmtree(entry.path)
+
+
+def prepare_overlay(shared_dir: Path, overlay_dir: Path) -> Path:
+    """Tạo (hoặc làm mới khi bản chung thay đổi) overlay của user, trả về overlay_dir"""
+    shared_dir = Path(shared_dir)
+    overlay_dir = Path(overlay_dir)
+    stamp = _overlay_stamp(shared_dir)
+    stamp_path = overlay_dir / OVERLAY_STAMP_NAME
+    try:
+        if json.loads(stamp_path.read_text(encoding="utf-8")) == stamp:
+            return overlay_dir
+    except (OSError, ValueError):
+        pass
+
+    started = time.perf_counter()
+    overlay_dir.mkdir(parents=True, exist_ok=True)
+    _clear_overlay(overlay_dir)
+
+    for entry in os.scandir(shared_dir):
+        if entry.name in WRITABLE_DIRS or entry.name == install_manifest.MANIFEST_NAME:
+            continue
+        src = Path(entry.path)
+        dst = overlay_dir / entry.name
+        if entry.is_dir():
+            _link_dir(src, dst)
+        else:
+            _link_file(src, dst)
+    for name in WRITABLE_DIRS:
+        (overlay_dir / name).mkdir(exist_ok=True)
+
+    tmp_path = stamp_path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(stamp), encoding="utf-8")
+    os.replace(tmp_path, stamp_path)
+    logger.info(
+        f"Đã tạo overlay backend: {overlay_dir} "
+        f"({(time.perf_counter() - started) * 1000:.0f} ms)"
+    )
+    return overlay_dir
+
+
+def overlay_env(overlay_dir: Path, output_dir: Path) -> dict:
+    """Biến môi trường chỉ cho backend các thư mục ghi được của user"""
+    overlay_dir = Path(overlay_dir)
+    return {
+        "AI_DUBBING_DATA_DIR": str(overlay_dir),
+        "AI_DUBBING_LOG_DIR": str(overlay_dir / "logs"),
+        "AI_DUBBING_CACHE_DIR": str(overlay_dir / "cache"),
+        "AI_DUBBING_TMP_DIR": str(overlay_dir / "tmp"),
+        "AI_DUBBING_OUTPUT_DIR": str(output_dir),
+    }
+
+
+# --- Cài đặt bởi quản trị viên ---
+
+
+def _remove_readonly(func, path, exc):
+    """Trả lại quyền ghi (cả thư mục cha) rồi xóa lại"""
+    os.chmod(os.path.dirname(path), 0o755)
+    os.chmod(path, 0o755 if os.path.isdir(path) else stat.S_IWRITE | stat.S_IREAD)
+    func(path)
+
+
+def make_read_only(root: Path):
+    """Bỏ quyền ghi của mọi file/thư mục, cho phép mọi user đọc"""
+    for dirpath, dirnames, filenames in os.walk(root):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            if os.path.islink(path):
+                continue
+            mode = os.stat(path).st_mode
+            os.chmod(path, (mode | stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH) & ~0o222)
+        if os.name != "nt":
+            os.chmod(dirpath, 0o755 & ~0o222)
+
+
+def _compile_bytecode(backend_dir: Path, python_exe: Path):
+    """Biên dịch .pyc bằng Python của backend (user không ghi được __pycache__)"""
+    try:
+        result = subprocess.run(
+            [str(python_exe), "-m", "compileall", "-q", "-j", "0", str(backend_dir)],
+            capture_output=True,
+            text=True,
+        )
+    except OSError as e:
+        logger.warning(f"Không biên dịch được bytecode: {e}")
+        return
+    if result.returncode != 0:
+        # Một số file mẫu/test trong site-packages có thể không biên dịch được
+        logger.warning(f"compileall báo lỗi: {result.stdout[-2000:]}")
+
+
+def install_shared(package_path: Path, root: Path = None) -> Path:
+    """Giải nén gói vào thư mục chung, thay bản cũ một cách nguyên tử"""
+    from backend_manager import backend_manager
+
+    root = Path(root or shared_root())
+    root.mkdir(parents=True, exist_ok=True)
+    target = shared_backend_dir(root)
+    if (root / f"{BACKEND_DIR_NAME}.new").exists():
+        shutil.rmtree(root / f"{BACKEND_DIR_NAME}.new", onerror=_remove_readonly)
+    staging_root = root / f"staging-{int(time.time())}"
+
+    logger.info(f"Đang cài backend dùng chung vào {target}")
+    staged = backend_manager.extract_package(package_path, staging_root)
+    _compile_bytecode(staged, backend_manager._python_executable_path(staged))
+    # Đưa về cùng thư mục cha trước khi khóa quyền ghi: các lần đổi tên sau
+    # chỉ đổi tên trong root (POSIX không cho chuyển thư mục chỉ đọc sang chỗ khác)
+    new_dir = root / f"{BACKEND_DIR_NAME}.new"
+    os.replace(staged, new_dir)
+    shutil.rmtree(staging_root, ignore_errors=True)
+    make_read_only(new_dir)
+
+    if target.exists():
+        os.replace(target, root / f"{BACKEND_DIR_NAME}.old-{int(time.time())}")
+    os.replace(new_dir, target)
+
+    # Gồm cả bản cũ còn sót từ lần cài trước
+    for leftover in root.glob(f"{BACKEND_DIR_NAME}.old-*"):
+        try:
+            shutil.rmtree(leftover, onerror=_remove_readonly)
+        except OSError as e:
+            # User khác còn đang chạy bản cũ (Windows khóa file): để lại lần sau
+            logger.warning(f"Chưa xóa được bản cài cũ {leftover}: {e}")
+
+    logger.info(f"Đã cài backend dùng chung: {target}")
+    return target
+
+
+def remove_shared(root: Path = None):
+    target = shared_backend_dir(root)
+    if target.exists():
+        shutil.rmtree(target, onerror=_remove_readonly)
+        logger.info(f"Đã gỡ backend dùng chung: {target}")
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(
+        description="Quản lý bản cài backend dùng chung của máy"
+    )
+    parser.add_argument("--root", type=Path, default=None)
+    commands = parser.add_subparsers(dest="command", required=True)
+    install = commands.add_parser("install", help="Cài/cập nhật từ gói .zip/.tar.zst")
+    install.add_argument("package", type=Path)
+    commands.add_parser("remove", help="Gỡ bản cài dùng chung")
+    args = parser.parse_args()
+
+    if args.command == "install":
+        install_shared(args.package, args.root)
+    else:
+        remove_shared(args.root)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+
+# Các module của app nằm ở gốc repo, package_server nằm trong benchmarks/
+sys.path.insert(0, str(REPO_DIR))
+sys.path.insert(0, str(REPO_DIR / "benchmarks"))
+
+# settings_store/backend_manager đọc APPDATA khi import: không đụng dữ liệu thật
+os.environ["APPDATA"] = tempfile.mkdtemp(prefix="ai_dubbing_tests_")
@@ -0,0 +1,140 @@
+import json
+import os
+import time
+
+import pytest
+
+from app_settings import (
+    AppSettings,
+    SettingsStore,
+    changes_requiring,
+    coerce_value,
+)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SettingsStore(tmp_path / "settings.json", watch_interval=0.05)
+
+
+def _rewrite(store, settings: dict):
+    """Sửa file như người dùng sửa tay (mtime chắc chắn đổi)"""
+    store.path.write_text(json.dumps({"version": 1, "settings": settings}))
+    st = store.path.stat()
+    os.utime(store.path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+
+def test_coerce_value_types_and_limits():
+    assert coerce_value("backend_port", "18000") == 18000
+    assert coerce_value("ready_poll_interval", 2) == 2.0
+    assert coerce_value("log_level", " DEBUG ") == "DEBUG"
+    with pytest.raises(ValueError):
+        coerce_value("backend_port", 80)
+    with pytest.raises(ValueError):
+        coerce_value("backend_port", 1.5)
+    with pytest.raises(ValueError):
+        coerce_value("log_level", "TRACE")
+    with pytest.raises(ValueError):
+        coerce_value("package_url", "  ")
+    with pytest.raises(ValueError):
+        coerce_value("no_such_setting", 1)
+
+
+def test_changes_requiring_groups_by_apply_kind():
+    changed = {"backend_port", "backend_log_level", "log_level"}
+    assert changes_requiring(changed, "backend_restart") == {"backend_port"}
+    assert changes_requiring(changed, "backend_live") == {"backend_log_level"}
+    assert changes_requiring(changed, "live") == {"log_level"}
+
+
+def test_missing_file_gives_defaults(store):
+    assert store.settings == AppSettings()
+
+
+def test_update_persists_and_notifies(store, tmp_path):
+    calls = []
+    store.subscribe(lambda settings, changed: calls.append((settings, changed)))
+
+    changed = store.update(backend_port="18000", log_level="INFO")
+    assert changed == {"backend_port"}
+    assert calls == [(store.settings, {"backend_port"})]
+    assert store.settings.backend_port == 18000
+
+    reopened = SettingsStore(tmp_path / "settings.json")
+    assert reopened.settings.backend_port == 18000
+    assert not (tmp_path / "settings.tmp").exists()
+
+
+def test_update_without_change_writes_nothing(store):
+    assert store.update(backend_port=AppSettings().backend_port) == set()
+    assert not store.path.exists()
+
+
+def test_invalid_update_changes_nothing(store):
+    calls = []
+    store.subscribe(lambda settings, changed: calls.append(changed))
+    with pytest.raises(ValueError):
+        store.update(backend_port=18000, backend_workers=0)
+    assert store.settings == AppSettings()
+    assert calls == []
+
+
+def test_listener_error_does_not_block_others(store):
+    calls = []
+
+    def broken(settings, changed):
+        raise RuntimeError("boom")
+
+    store.subscribe(broken)
+    store.subscribe(lambda settings, changed: calls.append(changed))
+    store.update(max_web_views=2)
+    assert calls == [{"max_web_views"}]
+
+
+def test_reset_restores_defaults(store):
+    store.update(backend_port=18000, log_level="DEBUG")
+    assert store.reset() == {"backend_port", "log_level"}
+    assert store.settings == AppSettings()
+
+
+def test_reload_picks_up_external_edits(store):
+    store.update(backend_port=18000)
+    assert store.reload_if_changed() == set()
+
+    _rewrite(store, {"backend_port": 18001, "log_level": "DEBUG"})
+    assert store.reload_if_changed() == {"backend_port", "log_level"}
+    assert store.settings.backend_port == 18001
+    assert store.reload_if_changed() == set()
+
+
+def test_reload_skips_invalid_and_unknown_values(store):
+    _rewrite(
+        store,
+        {"backend_port": 5, "backend_workers": "4", "removed_setting": True},
+    )
+    store.reload_if_changed()
+    assert store.settings.backend_port == AppSettings().backend_port
+    assert store.settings.backend_workers == 4
+
+
+def test_corrupt_file_falls_back_to_defaults(store):
+    store.update(backend_port=18000)
+    store.path.write_text("{broken")
+    st = store.path.stat()
+    os.utime(store.path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert "backend_port" in store.reload_if_changed()
+    assert store.settings == AppSettings()
+
+
+def test_watcher_applies_edits_in_background(store):
+    calls = []
+    store.subscribe(lambda settings, changed: calls.append(changed))
+    store.start_watching()
+    try:
+        _rewrite(store, {"max_web_views": 8})
+        deadline = time.monotonic() + 5
+        while not calls and time.monotonic() < deadline:
+            time.sleep(0.02)
+    finally:
+        store.stop_watching()
+    assert calls == [{"max_web_views"}]
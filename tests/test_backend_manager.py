@@ -0,0 +1,150 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import install_manifest
+from app_settings import AppSettings
+from backend_manager import BackendManager
+
+
+class _ReadyHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        body = json.dumps(
+            {"status": "ready", "gpu": "available", "models": "loaded"}
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def manager():
+    manager = BackendManager()
+    manager.ready_checks = 5
+    manager.ready_poll_interval = 0.01
+    # Process con đã thoát ngay (ví dụ không bind được cổng)
+    manager.process = subprocess.Popen([sys.executable, "-c", "raise SystemExit(1)"])
+    manager.process.wait()
+    return manager
+
+
+def test_ready_when_port_owned_by_healthy_backend(manager):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _ReadyHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        manager.backend_port = server.server_address[1]
+        assert manager._wait_for_backend_ready() is True
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_exited_process_gives_up_after_failed_probe(manager, monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _ReadyHandler)
+    manager.backend_port = server.server_address[1]
+    server.server_close()
+
+    probes = []
+    original_get = requests.get
+
+    def counting_get(*args, **kwargs):
+        probes.append(args)
+        return original_get(*args, **kwargs)
+
+    monkeypatch.setattr(requests, "get", counting_get)
+    assert manager._wait_for_backend_ready() is False
+    assert len(probes) == 1
+
+
+def test_process_cleared_by_another_thread_during_probe(manager, monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _ReadyHandler)
+    manager.backend_port = server.server_address[1]
+    server.server_close()
+
+    def failing_get(*args, **kwargs):
+        # Resource monitor gọi is_backend_running() trong lúc probe
+        manager.is_backend_running()
+        raise requests.exceptions.ConnectionError("refused")
+
+    monkeypatch.setattr(requests, "get", failing_get)
+    assert manager._wait_for_backend_ready() is False
+    assert manager.process is None
+
+
+def test_start_backend_stops_retrying_when_cancelled(monkeypatch):
+    manager = BackendManager()
+    manager.max_startup_retries = 3
+    manager.startup_delay = 30
+    monkeypatch.setattr(manager, "_start_backend_once", lambda: False)
+    cancel_event = threading.Event()
+    threading.Timer(0.2, cancel_event.set).start()
+
+    started = time.monotonic()
+    assert manager.start_backend(cancel_event=cancel_event) is False
+    assert time.monotonic() - started < 5
+
+
+@pytest.fixture
+def installed_manager(tmp_path, monkeypatch):
+    manager = BackendManager()
+    monkeypatch.setattr(manager, "backend_dir", tmp_path)
+    (tmp_path / "run.py").write_bytes(b"print('backend')\n")
+    install_manifest.write_manifest(tmp_path, {"run.py": 0})
+    yield manager
+    manager.stop_deep_verification()
+
+
+def _age_verification(backend_dir, days):
+    marker = backend_dir / install_manifest.VERIFIED_MARKER_NAME
+    old = time.time() - days * 86400
+    os.utime(marker, (old, old))
+
+
+def test_deep_verification_disabled_by_setting(installed_manager):
+    installed_manager.settings = AppSettings(deep_verify_days=0)
+    _age_verification(installed_manager.backend_dir, 30)
+    installed_manager.start_deep_verification()
+    assert installed_manager._deep_verify_thread is None
+
+
+def test_deep_verification_waits_for_interval(installed_manager):
+    installed_manager.settings = AppSettings(deep_verify_days=7)
+    installed_manager.start_deep_verification()
+    assert installed_manager._deep_verify_thread is None
+
+    _age_verification(installed_manager.backend_dir, 8)
+    installed_manager.start_deep_verification()
+    installed_manager._deep_verify_thread.join(timeout=5)
+    # CRC 0 trong manifest là sai: bản cài bị đánh dấu hỏng
+    assert install_manifest.is_marked_invalid(installed_manager.backend_dir)
+
+
+def test_stop_deep_verification_interrupts(installed_manager):
+    backend_dir = installed_manager.backend_dir
+    data = b"\0" * (8 * 1024 * 1024)
+    (backend_dir / "model.bin").write_bytes(data)
+    install_manifest.write_manifest(backend_dir, {"model.bin": zlib.crc32(data)})
+    _age_verification(backend_dir, 30)
+    installed_manager.settings = AppSettings(deep_verify_mb_per_s=1)
+
+    installed_manager.start_deep_verification()
+    time.sleep(0.2)
+    started = time.monotonic()
+    installed_manager.stop_deep_verification()
+    assert time.monotonic() - started < 3
+    assert installed_manager._deep_verify_thread is None
+    # Chưa kiểm tra xong: không ghi mốc, lần sau kiểm tra lại
+    assert time.time() - install_manifest.last_verified(backend_dir) > 86400
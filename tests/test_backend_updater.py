@@ -0,0 +1,170 @@
+import json
+import os
+import time
+
+import pytest
+import requests
+
+from backend_manager import backend_manager
+from backend_updater import BackendUpdater
+from package_server import PackageServer, build_synthetic_package
+
+
+@pytest.fixture
+def server(tmp_path):
+    package_dir = tmp_path / "server"
+    build_synthetic_package(package_dir / "pkg.zip", total_size_mb=0.2, file_count=20)
+    with PackageServer(package_dir) as server:
+        server.package_path = package_dir / "pkg.zip"
+        yield server
+
+
+@pytest.fixture
+def updater(server, tmp_path, monkeypatch):
+    monkeypatch.setattr(backend_manager, "app_data_dir", tmp_path / "app")
+    monkeypatch.setattr(
+        backend_manager, "user_backend_dir", tmp_path / "app" / "client_backend"
+    )
+    monkeypatch.setattr(
+        backend_manager, "backend_dir", backend_manager.user_backend_dir
+    )
+    updater = BackendUpdater(
+        package_url=server.url_for("pkg.zip"), bandwidth_limit_kbps=0
+    )
+    yield updater
+    updater.stop()
+
+
+def _record_requests(monkeypatch):
+    """Ghi lại header của các request GET mà updater gửi"""
+    requested = []
+    original_get = requests.get
+
+    def recording_get(url, headers=None, **kwargs):
+        requested.append(dict(headers or {}))
+        return original_get(url, headers=headers, **kwargs)
+
+    monkeypatch.setattr(requests, "get", recording_get)
+    return requested
+
+
+def _touch_package(server):
+    """Thay đổi gói trên server (ETag mới)"""
+    st = server.package_path.stat()
+    os.utime(server.package_path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+
+def test_first_check_records_installed_version(updater):
+    assert updater.check_for_update() is None
+    installed = updater._load_state()["installed"]
+    assert installed["etag"]
+    # Lần sau: HEAD có điều kiện trả 304
+    assert updater.check_for_update() is None
+
+
+def test_changed_package_is_reported(updater, server):
+    updater.check_for_update()
+    _touch_package(server)
+
+    remote = updater.check_for_update()
+    assert remote is not None
+    assert remote["size"] == server.package_path.stat().st_size
+
+
+def test_fetch_and_apply_staged_update(updater, server):
+    updater.check_for_update()
+    _touch_package(server)
+    remote = updater.check_for_update()
+
+    assert updater.fetch_update(remote)
+    assert updater.has_staged_update()
+    assert not backend_manager.user_backend_dir.exists()
+
+    assert updater.apply_staged_update()
+    assert (backend_manager.user_backend_dir / "run.py").exists()
+    assert not updater.has_staged_update()
+    assert updater._load_state()["installed"]["etag"] == remote["etag"]
+
+
+def test_fetch_resumes_partial_download(updater, server, monkeypatch):
+    updater.check_for_update()
+    _touch_package(server)
+    remote = updater.check_for_update()
+
+    data = server.package_path.read_bytes()
+    updater.staging_dir.mkdir(parents=True)
+    updater.staged_zip_path.write_bytes(data[: len(data) // 2])
+    updater.staged_meta_path.write_text(json.dumps({"etag": remote["etag"]}))
+    requested = _record_requests(monkeypatch)
+    assert updater.fetch_update(remote)
+    assert updater.has_staged_update()
+    assert requested[-1]["Range"] == f"bytes={len(data) // 2}-"
+    assert requested[-1]["If-Range"] == remote["etag"]
+
+
+def test_partial_download_of_other_version_is_restarted(updater, server, monkeypatch):
+    updater.check_for_update()
+    _touch_package(server)
+    remote = updater.check_for_update()
+
+    updater.staging_dir.mkdir(parents=True)
+    updater.staged_zip_path.write_bytes(b"x" * 1000)
+    updater.staged_meta_path.write_text(json.dumps({"etag": '"old-version"'}))
+    requested = _record_requests(monkeypatch)
+    assert updater.fetch_update(remote)
+
+    assert "Range" not in requested[-1]
+    assert updater.has_staged_update()
+    assert not updater.staged_zip_path.exists()
+    assert not updater.staged_meta_path.exists()
+
+
+def test_unsatisfiable_range_restarts_from_zero(updater, server, monkeypatch):
+    updater.check_for_update()
+    _touch_package(server)
+    remote = updater.check_for_update()
+
+    # Phần tải dở đã dài hơn gói: server trả 416
+    data = server.package_path.read_bytes()
+    updater.staging_dir.mkdir(parents=True)
+    updater.staged_zip_path.write_bytes(data + b"extra")
+    updater.staged_meta_path.write_text(json.dumps({"etag": remote["etag"]}))
+    requested = _record_requests(monkeypatch)
+    assert updater.fetch_update(remote)
+
+    assert len(requested) == 2
+    assert "Range" not in requested[-1]
+    assert updater.has_staged_update()
+
+
+def test_failed_extraction_removes_partial_download(updater, server, monkeypatch):
+    updater.check_for_update()
+    _touch_package(server)
+    remote = updater.check_for_update()
+
+    def broken_extract(package_path, extract_root, progress_callback=None):
+        (extract_root / "half").mkdir(parents=True)
+        raise ValueError("gói hỏng")
+
+    monkeypatch.setattr(backend_manager, "extract_package", broken_extract)
+    with pytest.raises(ValueError):
+        updater.fetch_update(remote)
+
+    assert not updater.staged_zip_path.exists()
+    assert not updater.staged_meta_path.exists()
+    assert not updater.staged_root.exists()
+    assert not updater.has_staged_update()
+
+
+def test_corrupt_staged_update_is_discarded(updater, server):
+    updater.check_for_update()
+    _touch_package(server)
+    assert updater.fetch_update(updater.check_for_update())
+
+    staged = updater.staged_root / backend_manager.backend_dir.name
+    (staged / "run.py").write_text("tampered = True  # size differs\n")
+    time.sleep(0.01)
+
+    assert not updater.apply_staged_update()
+    assert not updater.has_staged_update()
+    assert not backend_manager.user_backend_dir.exists()
@@ -0,0 +1,97 @@
+import io
+import os
+import threading
+
+import pytest
+import requests
+
+import download_stream
+from download_stream import DownloadStopped, copy_response, copy_stream
+from package_server import PackageServer
+
+
+def _reader(data: bytes, max_read: int = 7000):
+    """readinto trả về từng đoạn nhỏ như socket"""
+    source = io.BytesIO(data)
+
+    def readinto(view):
+        chunk = source.read(min(len(view), max_read))
+        view[: len(chunk)] = chunk
+        return len(chunk)
+
+    return readinto
+
+
+def test_copy_stream_copies_everything_with_progress(tmp_path):
+    data = os.urandom(1_000_003)
+    progress, writes = [], []
+    with open(tmp_path / "out", "wb") as f:
+        written = copy_stream(
+            _reader(data),
+            f,
+            total_size=len(data),
+            progress_callback=progress.append,
+            on_write=writes.append,
+        )
+    assert written == len(data) == sum(writes)
+    assert (tmp_path / "out").read_bytes() == data
+    assert progress == sorted(set(progress)) and progress[-1] == 100
+
+
+def test_copy_stream_without_size_reads_until_eof(tmp_path):
+    data = os.urandom(300_000)
+    with open(tmp_path / "out", "wb") as f:
+        assert copy_stream(_reader(data), f, buffer=bytearray(1 << 20)) == len(data)
+    assert (tmp_path / "out").read_bytes() == data
+
+
+def test_copy_stream_writes_at_current_offset(tmp_path):
+    with open(tmp_path / "out", "wb") as f:
+        f.write(b"head")
+        copy_stream(_reader(b"body"), f, total_size=4)
+    assert (tmp_path / "out").read_bytes() == b"headbody"
+
+
+def test_short_body_truncates_preallocated_space(tmp_path):
+    data = os.urandom(10_000)
+    with open(tmp_path / "out", "wb") as f:
+        written = copy_stream(_reader(data), f, total_size=50_000)
+    assert written == len(data)
+    assert (tmp_path / "out").stat().st_size == len(data)
+
+
+def test_stop_event_stops_and_truncates(tmp_path):
+    stop = threading.Event()
+    data = os.urandom(2_000_000)
+
+    def on_write(n):
+        stop.set()
+
+    with open(tmp_path / "out", "wb") as f:
+        with pytest.raises(DownloadStopped):
+            copy_stream(
+                _reader(data),
+                f,
+                total_size=len(data),
+                stop_event=stop,
+                on_write=on_write,
+            )
+    assert 0 < (tmp_path / "out").stat().st_size < len(data)
+
+
+def test_fill_size_adapts_to_speed():
+    fast = download_stream._next_fill_size(64 * 1024, 64 * 1024, 0.0001)
+    slow = download_stream._next_fill_size(1024 * 1024, 64 * 1024, 1.0)
+    assert fast == download_stream.MAX_FILL_BYTES
+    assert slow == download_stream.MIN_FILL_BYTES
+
+
+def test_copy_response_from_http(tmp_path):
+    data = os.urandom(3_000_000)
+    (tmp_path / "pkg.zip").write_bytes(data)
+    with PackageServer(tmp_path) as server:
+        with requests.get(server.url_for("pkg.zip"), stream=True, timeout=10) as r:
+            with open(tmp_path / "out", "wb") as f:
+                written = copy_response(r, f, int(r.headers["Content-Length"]))
+    assert written == len(data)
+    assert (tmp_path / "out").read_bytes() == data
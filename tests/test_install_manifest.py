@@ -0,0 +1,145 @@
+import json
+import os
+import threading
+import time
+import zlib
+
+import pytest
+
+import install_manifest
+
+
+@pytest.fixture
+def backend_dir(tmp_path):
+    files = {
+        "run.py": b"print('backend')\n",
+        "python_portable/Lib/site-packages/pkg/mod.py": b"x = 1\n",
+        "models/weights.bin": os.urandom(4096),
+    }
+    for rel, data in files.items():
+        path = tmp_path / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+    install_manifest.write_manifest(
+        tmp_path, {rel: zlib.crc32(data) for rel, data in files.items()}
+    )
+    return tmp_path
+
+
+def test_is_tracked_skips_bytecode():
+    assert install_manifest.is_tracked("pkg/mod.py")
+    assert not install_manifest.is_tracked("pkg/__pycache__/mod.cpython-311.pyc")
+    assert not install_manifest.is_tracked("pkg/mod.pyc")
+
+
+def test_is_tracked_skips_runtime_writable_paths():
+    assert not install_manifest.is_tracked("logs/backend.log")
+    assert not install_manifest.is_tracked("cache/model.idx")
+    assert not install_manifest.is_tracked("tmp/a.wav")
+    assert not install_manifest.is_tracked("server.log")
+    assert install_manifest.is_tracked("pkg/logs/__init__.py")
+
+
+def test_old_manifest_entries_for_runtime_files_are_ignored(backend_dir):
+    (backend_dir / "logs").mkdir()
+    (backend_dir / "logs" / "backend.log").write_text("start\n")
+    manifest = install_manifest.load_manifest(backend_dir)
+    manifest["files"]["logs/backend.log"] = {"size": 6, "mtime_ns": 0, "crc32": 1}
+
+    # Backend ghi tiếp log khi chạy
+    (backend_dir / "logs" / "backend.log").write_text("start\nmore\n")
+    assert install_manifest.fast_validate(backend_dir, manifest) == []
+    assert install_manifest.deep_verify(backend_dir, manifest) == []
+
+
+def test_write_manifest_records_verification(backend_dir):
+    assert time.time() - install_manifest.last_verified(backend_dir) < 60
+    assert install_manifest.last_verified(backend_dir / "missing") == 0.0
+
+
+def test_fresh_install_validates(backend_dir):
+    manifest = install_manifest.load_manifest(backend_dir)
+    assert len(manifest["files"]) == 3
+    assert install_manifest.fast_validate(backend_dir, manifest) == []
+    assert install_manifest.deep_verify(backend_dir, manifest) == []
+
+
+def test_fast_validate_detects_changed_and_missing_files(backend_dir):
+    manifest = install_manifest.load_manifest(backend_dir)
+    (backend_dir / "run.py").write_text("print('changed, longer')\n")
+    (backend_dir / "models/weights.bin").unlink()
+
+    mismatches = install_manifest.fast_validate(backend_dir, manifest)
+    assert sorted(mismatches) == ["models/weights.bin", "run.py"]
+
+
+def test_deep_verify_detects_same_size_corruption(backend_dir):
+    manifest = install_manifest.load_manifest(backend_dir)
+    path = backend_dir / "models/weights.bin"
+    st = path.stat()
+    data = bytearray(path.read_bytes())
+    data[100] ^= 0xFF
+    path.write_bytes(bytes(data))
+    # Giữ nguyên size/mtime: chỉ CRC32 phát hiện được
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+    assert install_manifest.fast_validate(backend_dir, manifest) == []
+    assert install_manifest.deep_verify(backend_dir, manifest) == ["models/weights.bin"]
+
+
+def test_deep_verify_stops_on_event(backend_dir):
+    manifest = install_manifest.load_manifest(backend_dir)
+    stop = threading.Event()
+    stop.set()
+    assert install_manifest.deep_verify(backend_dir, manifest, stop_event=stop) == []
+
+
+def test_deep_verify_stops_inside_large_file(backend_dir):
+    big = backend_dir / "models" / "big.bin"
+    big.write_bytes(b"\0" * (8 * 1024 * 1024))
+    manifest = {"files": {"models/big.bin": {"crc32": zlib.crc32(big.read_bytes())}}}
+    stop = threading.Event()
+    threading.Timer(0.2, stop.set).start()
+
+    started = time.monotonic()
+    # 1 MB/s: đọc hết file mất 8 giây nếu không dừng giữa chừng
+    install_manifest.deep_verify(
+        backend_dir, manifest, stop_event=stop, throttle_mb_per_s=1
+    )
+    assert time.monotonic() - started < 3
+
+
+def test_parallel_stat_matches_serial_order(tmp_path):
+    paths = []
+    for i in range(install_manifest._STAT_CHUNK * 3 + 7):
+        (tmp_path / f"f{i}").write_bytes(b"x" * i)
+        paths.append(f"f{i}")
+    paths.append("missing")
+
+    stats = install_manifest.parallel_stat(tmp_path, paths)
+    assert [s[0] for s in stats[:-1]] == list(range(len(paths) - 1))
+    assert stats[-1] is None
+
+
+def test_load_manifest_missing_corrupt_and_old_version(tmp_path):
+    assert install_manifest.load_manifest(tmp_path) is None
+
+    manifest_path = tmp_path / install_manifest.MANIFEST_NAME
+    manifest_path.write_text("{not json")
+    assert install_manifest.load_manifest(tmp_path) == {}
+
+    manifest_path.write_text(json.dumps({"version": 0, "files": {}}))
+    assert install_manifest.load_manifest(tmp_path) == {}
+
+
+def test_write_manifest_requires_extracted_files(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        install_manifest.write_manifest(tmp_path, {"missing.py": 0})
+
+
+def test_invalid_marker_is_cleared_by_new_manifest(backend_dir):
+    install_manifest.mark_invalid(backend_dir, "crc mismatch")
+    assert install_manifest.is_marked_invalid(backend_dir)
+
+    install_manifest.write_manifest(backend_dir, {"run.py": 0})
+    assert not install_manifest.is_marked_invalid(backend_dir)
@@ -0,0 +1,184 @@
+import pytest
+
+QtCore = pytest.importorskip("PyQt6.QtCore")
+QtWebEngineCore = pytest.importorskip("PyQt6.QtWebEngineCore")
+
+from ui.media_scheme import (  # noqa: E402
+    MappedFileDevice,
+    MediaSchemeHandler,
+    guess_mime_type,
+    parse_range,
+)
+
+Error = QtWebEngineCore.QWebEngineUrlRequestJob.Error
+CONTENT = bytes(range(256)) * 4
+
+
+class _FakeJob(QtCore.QObject):
+    """Thay QWebEngineUrlRequestJob: gọi thẳng handler, không cần QApplication"""
+
+    def __init__(self, url, method=b"GET", headers=None):
+        super().__init__()
+        self.url = QtCore.QUrl(url)
+        self.method = method
+        self.headers = headers or {}
+        self.error = None
+        self.response_headers = {}
+        self.mime_type = None
+        self.device = None
+
+    def requestUrl(self):
+        return self.url
+
+    def requestMethod(self):
+        return self.method
+
+    def requestHeaders(self):
+        return self.headers
+
+    def setAdditionalResponseHeaders(self, headers):
+        self.response_headers = headers
+
+    def fail(self, error):
+        self.error = error
+
+    def reply(self, mime_type, device):
+        self.mime_type = mime_type
+        self.device = device
+
+
+@pytest.fixture
+def media_root(tmp_path):
+    root = tmp_path / "output"
+    (root / "videos").mkdir(parents=True)
+    (root / "videos" / "clip.mp4").write_bytes(CONTENT)
+    (tmp_path / "secret.txt").write_text("bí mật", encoding="utf-8")
+    return root
+
+
+@pytest.fixture
+def handler(media_root):
+    return MediaSchemeHandler(media_root)
+
+
+def _request(handler, path, **kwargs):
+    job = _FakeJob(f"app://media/{path}", **kwargs)
+    handler.requestStarted(job)
+    return job
+
+
+def test_parse_range_open_ended_and_suffix():
+    assert parse_range("bytes=0-9", 100) == (0, 9)
+    assert parse_range("bytes=90-", 100) == (90, 99)
+    assert parse_range("bytes=-10", 100) == (90, 99)
+    assert parse_range("bytes=-500", 100) == (0, 99)
+    assert parse_range("bytes=50-1000", 100) == (50, 99)
+
+
+def test_parse_range_unsatisfiable_and_invalid():
+    assert parse_range("bytes=100-", 100) == ()
+    assert parse_range("bytes=-0", 100) == ()
+    assert parse_range("bytes=-5", 0) == ()
+    assert parse_range("bytes=5-2", 100) is None
+    assert parse_range("bytes=0-1,5-6", 100) is None
+    assert parse_range("items=0-1", 100) is None
+
+
+def test_serves_whole_file(handler):
+    job = _request(handler, "videos/clip.mp4")
+
+    assert job.error is None
+    assert job.mime_type == b"video/mp4"
+    assert job.device.size() == len(CONTENT)
+    assert not job.device.isSequential()
+    assert bytes(job.device.readAll()) == CONTENT
+    assert job.response_headers == {b"Accept-Ranges": b"bytes"}
+    # Device sống cùng job
+    assert job.device.parent() is job
+
+
+@pytest.mark.parametrize(
+    "header, start, end",
+    [("bytes=1000-", 1000, 1023), ("bytes=-24", 1000, 1023), ("bytes=10-19", 10, 19)],
+)
+def test_range_requests_are_served_by_seeking(handler, header, start, end):
+    job = _request(handler, "videos/clip.mp4", headers={b"range": header.encode()})
+
+    assert job.error is None
+    assert parse_range(header, job.device.size()) == (start, end)
+    # QtWebEngine seek() tới đầu khoảng rồi đọc end - start + 1 byte
+    assert job.device.seek(start)
+    assert bytes(job.device.read(end - start + 1)) == CONTENT[start : end + 1]
+
+
+def test_unsatisfiable_range_is_rejected(handler):
+    job = _request(handler, "videos/clip.mp4", headers={b"Range": b"bytes=5000-"})
+
+    assert job.error == Error.RequestFailed
+    assert job.device is None
+    assert job.response_headers == {
+        b"Content-Range": f"bytes */{len(CONTENT)}".encode()
+    }
+
+
+@pytest.mark.parametrize(
+    "path",
+    ["../secret.txt", "videos/../../secret.txt", "%2E%2E%2Fsecret.txt"],
+)
+def test_path_traversal_is_denied(handler, path):
+    job = _request(handler, path)
+
+    assert job.error == Error.RequestDenied
+    assert job.device is None
+
+
+def test_resolve_path_stays_inside_root(handler, media_root):
+    assert handler.resolve_path("/videos/clip.mp4") == (
+        media_root.resolve() / "videos" / "clip.mp4"
+    )
+    assert handler.resolve_path("/videos/%2e%2e/%2e%2e/secret.txt") is None
+    assert handler.resolve_path("/") is None
+
+
+def test_rejects_other_methods_hosts_and_missing_files(handler):
+    assert _request(handler, "videos/clip.mp4", method=b"POST").error == (
+        Error.RequestDenied
+    )
+    assert _request(handler, "videos/missing.mp4").error == Error.UrlNotFound
+
+    job = _FakeJob("app://other/videos/clip.mp4")
+    handler.requestStarted(job)
+    assert job.error == Error.UrlInvalid
+
+
+def test_mapped_device_random_access(media_root):
+    device = MappedFileDevice(media_root / "videos" / "clip.mp4")
+    assert device.open(QtCore.QIODevice.OpenModeFlag.ReadOnly)
+
+    assert device.seek(512)
+    assert bytes(device.read(4)) == CONTENT[512:516]
+    assert device.seek(len(CONTENT) - 2)
+    assert bytes(device.read(100)) == CONTENT[-2:]
+    assert device.seek(0)
+    assert bytes(device.read(3)) == CONTENT[:3]
+
+    device.close()
+    assert device._map is None
+    assert device._file.closed
+
+
+def test_mapped_device_empty_file(tmp_path):
+    empty = tmp_path / "empty.vtt"
+    empty.write_bytes(b"")
+    device = MappedFileDevice(empty)
+    device.open(QtCore.QIODevice.OpenModeFlag.ReadOnly)
+
+    assert device.size() == 0
+    assert bytes(device.read(10)) == b""
+    device.close()
+
+
+def test_guess_mime_type_prefers_media_table(tmp_path):
+    assert guess_mime_type(tmp_path / "a.MKV") == "video/x-matroska"
+    assert guess_mime_type(tmp_path / "a.vtt") == "text/vtt"
+    assert guess_mime_type(tmp_path / "a.unknownext") == "application/octet-stream"
@@ -0,0 +1,226 @@
+import io
+import os
+import struct
+import sys
+import tarfile
+import zlib
+from pathlib import Path
+
+import pytest
+import zstandard
+
+import package_format
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "build_scripts"))
+from build_backend_package import SeekableZstdWriter  # noqa: E402
+
+
+def _tar_bytes(add_members) -> bytes:
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w", format=tarfile.PAX_FORMAT) as tar:
+        add_members(tar)
+    return buffer.getvalue()
+
+
+def _add_file(tar, name, data: bytes, mode=0o644):
+    member = tarfile.TarInfo(name)
+    member.size = len(data)
+    member.mode = mode
+    tar.addfile(member, io.BytesIO(data))
+
+
+def _add_link(tar, name, linkname, type_):
+    member = tarfile.TarInfo(name)
+    member.type = type_
+    member.linkname = linkname
+    tar.addfile(member)
+
+
+def _write_seekable(path: Path, data: bytes, frame_size: int) -> list:
+    with open(path, "wb") as f:
+        writer = SeekableZstdWriter(f, frame_size, level=3, threads=2)
+        writer.write(data)
+        writer.close()
+    return writer.frames
+
+
+def _write_plain(path: Path, data: bytes):
+    path.write_bytes(zstandard.ZstdCompressor().compress(data))
+
+
+@pytest.fixture
+def files():
+    return {
+        "client_backend/run.py": b"print('backend')\n",
+        "client_backend/python_portable/bin/python": os.urandom(3000),
+        "client_backend/models/weights.bin": os.urandom(200_000),
+    }
+
+
+@pytest.fixture
+def tar_data(files):
+    def add(tar):
+        for name, data in files.items():
+            _add_file(tar, name, data, 0o755 if name.endswith("python") else 0o644)
+
+    return _tar_bytes(add)
+
+
+def test_detect_format(tmp_path):
+    (tmp_path / "a.zip").write_bytes(b"PK\x03\x04rest")
+    (tmp_path / "b.tar.zst").write_bytes(zstandard.ZstdCompressor().compress(b"x"))
+    (tmp_path / "c").write_bytes(struct.pack("<II", 0x184D2A5E, 0))
+    (tmp_path / "d").write_bytes(b"nope")
+
+    assert package_format.detect_format(tmp_path / "a.zip") == "zip"
+    assert package_format.detect_format(tmp_path / "b.tar.zst") == "tar.zst"
+    assert package_format.detect_format(tmp_path / "c") == "tar.zst"
+    with pytest.raises(ValueError):
+        package_format.detect_format(tmp_path / "d")
+
+
+def test_read_seek_table_matches_written_frames(tmp_path, tar_data):
+    path = tmp_path / "pkg.tar.zst"
+    written = _write_seekable(path, tar_data, frame_size=64 * 1024)
+
+    with open(path, "rb") as f:
+        frames = package_format.read_seek_table(f)
+    assert [(c, d) for _, c, d in frames] == written
+    assert len(frames) > 1
+    assert frames[0][0] == 0
+    assert all(
+        frames[i + 1][0] == frames[i][0] + frames[i][1] for i in range(len(frames) - 1)
+    )
+    # Mỗi frame giải nén độc lập ra đúng đoạn dữ liệu
+    with open(path, "rb") as f:
+        offset, csize, dsize = frames[1]
+        f.seek(offset)
+        chunk = zstandard.ZstdDecompressor().decompress(f.read(csize))
+    assert chunk == tar_data[written[0][1] : written[0][1] + dsize]
+
+
+def test_read_seek_table_without_table(tmp_path, tar_data):
+    path = tmp_path / "plain.tar.zst"
+    _write_plain(path, tar_data)
+    with open(path, "rb") as f:
+        assert package_format.read_seek_table(f) == []
+
+
+def test_read_seek_table_rejects_corrupt_footer(tmp_path, tar_data):
+    path = tmp_path / "pkg.tar.zst"
+    _write_seekable(path, tar_data, frame_size=64 * 1024)
+    data = bytearray(path.read_bytes())
+    # Số frame sai: offset tích lũy không khớp vị trí bảng
+    struct.pack_into("<I", data, len(data) - 9, 1)
+    path.write_bytes(bytes(data))
+    with open(path, "rb") as f:
+        assert package_format.read_seek_table(f) == []
+
+
+@pytest.mark.parametrize("seekable,threads", [(True, 4), (True, 1), (False, 4)])
+def test_extract_parallel_and_stream(tmp_path, files, tar_data, seekable, threads):
+    path = tmp_path / "pkg.tar.zst"
+    if seekable:
+        _write_seekable(path, tar_data, frame_size=32 * 1024)
+    else:
+        _write_plain(path, tar_data)
+    progress = []
+
+    crcs = package_format.extract_tar_zstd(
+        path, tmp_path / "out", threads=threads, progress_callback=progress.append
+    )
+
+    assert crcs == {name: zlib.crc32(data) for name, data in files.items()}
+    for name, data in files.items():
+        assert (tmp_path / "out" / name).read_bytes() == data
+    assert os.access(
+        tmp_path / "out/client_backend/python_portable/bin/python", os.X_OK
+    )
+    assert progress[-1] == 100
+    assert progress == sorted(progress)
+
+
+def test_extract_hardlinks(tmp_path):
+    data = b"shared library bytes"
+
+    def add(tar):
+        _add_file(tar, "client_backend/lib/a.so", data)
+        _add_link(
+            tar, "client_backend/lib/b.so", "client_backend/lib/a.so", tarfile.LNKTYPE
+        )
+
+    path = tmp_path / "pkg.tar.zst"
+    _write_seekable(path, _tar_bytes(add), frame_size=1024)
+    crcs = package_format.extract_tar_zstd(path, tmp_path / "out")
+
+    assert (tmp_path / "out/client_backend/lib/b.so").read_bytes() == data
+    assert crcs["client_backend/lib/b.so"] == zlib.crc32(data)
+
+
+def test_hardlinks_from_tar_add_are_extracted(tmp_path):
+    source = tmp_path / "client_backend"
+    source.mkdir()
+    (source / "a.bin").write_bytes(b"linked on disk")
+    os.link(source / "a.bin", source / "b.bin")
+
+    def add(tar):
+        tar.add(source, arcname=source.name)
+
+    path = tmp_path / "pkg.tar.zst"
+    _write_plain(path, _tar_bytes(add))
+    package_format.extract_tar_zstd(path, tmp_path / "out")
+    assert (tmp_path / "out/client_backend/b.bin").read_bytes() == b"linked on disk"
+
+
+def test_hardlink_to_missing_member_is_an_error(tmp_path):
+    def add(tar):
+        _add_link(tar, "client_backend/b.so", "client_backend/a.so", tarfile.LNKTYPE)
+
+    path = tmp_path / "pkg.tar.zst"
+    _write_plain(path, _tar_bytes(add))
+    with pytest.raises(ValueError):
+        package_format.extract_tar_zstd(path, tmp_path / "out")
+
+
+def test_extract_symlink_before_its_target(tmp_path):
+    def add(tar):
+        _add_link(tar, "client_backend/bin/python3", "python", tarfile.SYMTYPE)
+        _add_file(tar, "client_backend/bin/python", b"interpreter", 0o755)
+
+    path = tmp_path / "pkg.tar.zst"
+    _write_plain(path, _tar_bytes(add))
+    package_format.extract_tar_zstd(path, tmp_path / "out")
+    assert (tmp_path / "out/client_backend/bin/python3").read_bytes() == b"interpreter"
+
+
+def test_symlink_outside_package_is_rejected(tmp_path):
+    def add(tar):
+        _add_link(tar, "client_backend/evil", "../../etc/passwd", tarfile.SYMTYPE)
+
+    path = tmp_path / "pkg.tar.zst"
+    _write_plain(path, _tar_bytes(add))
+    with pytest.raises(ValueError):
+        package_format.extract_tar_zstd(path, tmp_path / "out")
+
+
+def test_unsupported_member_type_is_an_error(tmp_path):
+    def add(tar):
+        member = tarfile.TarInfo("client_backend/pipe")
+        member.type = tarfile.FIFOTYPE
+        tar.addfile(member)
+
+    path = tmp_path / "pkg.tar.zst"
+    _write_plain(path, _tar_bytes(add))
+    with pytest.raises(ValueError):
+        package_format.extract_tar_zstd(path, tmp_path / "out")
+
+
+@pytest.mark.parametrize("name", ["/etc/passwd", "client_backend/../../x", "C:/x"])
+def test_unsafe_member_names_are_rejected(tmp_path, name):
+    def add(tar):
+        _add_file(tar, name, b"x")
+
+    path = tmp_path / "pkg.tar.zst"
+    _write_plain(path, _tar_bytes(add))
+    with pytest.raises(ValueError):
+        package_format.extract_tar_zstd(path, tmp_path / "out")
@@ -0,0 +1,260 @@
+import os
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import download_stream
+import package_mirrors
+from backend_manager import backend_manager
+from package_mirrors import (
+    AllSourcesFailed,
+    MirrorDownloader,
+    PackageSource,
+    parse_sources,
+    probe_sources,
+)
+from package_server import PackageServer
+
+
+@pytest.fixture
+def package(tmp_path):
+    data = os.urandom(3 * 1024 * 1024 + 123)
+    path = tmp_path / "server" / "pkg.zip"
+    path.parent.mkdir()
+    path.write_bytes(data)
+    return path
+
+
+def _http_source(url, size, throughput_bps):
+    return PackageSource(
+        url,
+        "http",
+        size=size,
+        accept_ranges=True,
+        latency_s=0.001,
+        throughput_bps=throughput_bps,
+    )
+
+
+def test_parse_sources(tmp_path):
+    usb = tmp_path / "usb"
+    usb.mkdir()
+    sources = parse_sources(
+        "http://example.com/static/pkg.zip",
+        f" http://mirror/pkg.zip ; {usb}\n{usb.as_uri()}/other.zip;"
+        "http://example.com/static/pkg.zip",
+    )
+    assert [(s.kind, s.location) for s in sources] == [
+        ("http", "http://example.com/static/pkg.zip"),
+        ("http", "http://mirror/pkg.zip"),
+        ("file", str(usb / "pkg.zip")),
+        ("file", str(usb / "other.zip")),
+    ]
+
+
+def test_probe_ranks_sources_and_drops_size_mismatch(package, tmp_path):
+    usb = tmp_path / "usb"
+    usb.mkdir()
+    (usb / "pkg.zip").write_bytes(package.read_bytes())
+    stale = tmp_path / "stale"
+    stale.mkdir()
+    (stale / "pkg.zip").write_bytes(b"old package")
+
+    with PackageServer(package.parent) as server:
+        url = server.url_for("pkg.zip")
+        ranked = probe_sources(parse_sources(url, f"{usb};{stale}"))
+
+    assert {s.location for s in ranked} == {url, str(usb / "pkg.zip")}
+    assert all(s.size == package.stat().st_size for s in ranked)
+    assert ranked[0].estimated_seconds() <= ranked[1].estimated_seconds()
+
+
+def test_failed_probe_keeps_source_as_fallback(package, monkeypatch):
+    """Một lần HEAD chập chờn không được làm hỏng cả quá trình cài"""
+    original = package_mirrors._probe_http
+
+    def flaky(source, session):
+        raise requests.exceptions.ConnectionError("flaky HEAD")
+
+    monkeypatch.setattr(package_mirrors, "_probe_http", flaky)
+    with PackageServer(package.parent) as server:
+        url = server.url_for("pkg.zip")
+        sources = probe_sources(parse_sources(url))
+        assert [s.location for s in sources] == [url]
+        assert sources[0].probe_error and sources[0].size == 0
+
+        monkeypatch.setattr(package_mirrors, "_probe_http", original)
+        dest = package.parent.parent / "download.zip"
+        assert MirrorDownloader(sources, dest).run() == package.stat().st_size
+    assert dest.read_bytes() == package.read_bytes()
+
+
+def test_failed_probe_ranks_after_working_mirror(package, tmp_path, monkeypatch):
+    usb = tmp_path / "usb"
+    usb.mkdir()
+    (usb / "pkg.zip").write_bytes(package.read_bytes())
+
+    def flaky(source, session):
+        raise requests.exceptions.ConnectionError("flaky HEAD")
+
+    monkeypatch.setattr(package_mirrors, "_probe_http", flaky)
+    sources = probe_sources(parse_sources("http://127.0.0.1:9/pkg.zip", str(usb)))
+    assert [s.kind for s in sources] == ["file", "http"]
+    assert sources[0].size == package.stat().st_size
+
+
+def test_failover_mid_download_keeps_downloaded_bytes(package, tmp_path):
+    size = package.stat().st_size
+    with PackageServer(package.parent, drop_probability=1.0) as broken, PackageServer(
+        package.parent
+    ) as good:
+        # Nguồn lỗi được xếp nhanh hơn để chắc chắn được chọn trước
+        primary = _http_source(broken.url_for("pkg.zip"), size, 1e12)
+        mirror = _http_source(good.url_for("pkg.zip"), size, 1e6)
+        dest = tmp_path / "download.zip"
+        assert MirrorDownloader([primary, mirror], dest).run() == size
+
+    assert dest.read_bytes() == package.read_bytes()
+    assert primary.failures >= 1
+
+
+def test_parallel_segments_across_sources(package, tmp_path, monkeypatch):
+    monkeypatch.setattr(package_mirrors, "MIN_SEGMENT_BYTES", 256 * 1024)
+    size = package.stat().st_size
+    local = PackageSource(
+        str(package), "file", size=size, accept_ranges=True, latency_s=0.001
+    )
+    local.throughput_bps = 1e9
+    with PackageServer(package.parent) as server:
+        remote = _http_source(server.url_for("pkg.zip"), size, 1e9)
+        downloader = MirrorDownloader(
+            [remote, local], tmp_path / "download.zip", connections=4
+        )
+        assert len(downloader.segments) > 4
+        progress = []
+        downloader.progress_callback = progress.append
+        assert downloader.run() == size
+
+    assert (tmp_path / "download.zip").read_bytes() == package.read_bytes()
+    assert progress[-1] == 100
+
+
+def test_unprobed_source_with_other_size_is_rejected(package, tmp_path):
+    other = tmp_path / "other"
+    other.mkdir()
+    (other / "pkg.zip").write_bytes(b"different package")
+    size = package.stat().st_size
+    with PackageServer(package.parent, drop_probability=1.0) as broken, PackageServer(
+        other
+    ) as wrong, PackageServer(package.parent) as good:
+        primary = _http_source(broken.url_for("pkg.zip"), size, 1e6)
+        # Hai nguồn dự phòng chưa đo được: nguồn đầu có gói khác kích thước
+        stale = PackageSource(wrong.url_for("pkg.zip"), "http", probe_error="HEAD")
+        fallback = PackageSource(good.url_for("pkg.zip"), "http", probe_error="HEAD")
+        dest = tmp_path / "download.zip"
+        assert MirrorDownloader([primary, stale, fallback], dest).run() == size
+
+    assert "kích thước" in stale.error
+    assert dest.read_bytes() == package.read_bytes()
+
+
+def test_all_sources_failing_raises(tmp_path):
+    source = PackageSource(str(tmp_path / "missing.zip"), "file", probe_error="x")
+    with pytest.raises(AllSourcesFailed):
+        MirrorDownloader([source], tmp_path / "download.zip").run()
+
+
+def test_empty_source_list(tmp_path):
+    with pytest.raises(AllSourcesFailed):
+        MirrorDownloader([], tmp_path / "download.zip")
+    assert backend_manager.download_backend("", sources=[]) is False
+
+
+@pytest.fixture
+def silent_server():
+    """Server nhận kết nối nhưng không bao giờ trả lời"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(("127.0.0.1", 0))
+    sock.listen(8)
+    yield f"http://127.0.0.1:{sock.getsockname()[1]}/pkg.zip"
+    sock.close()
+
+
+def _cancel_after(seconds):
+    cancel_event = threading.Event()
+    threading.Timer(seconds, cancel_event.set).start()
+    return cancel_event
+
+
+def test_probe_stops_when_cancelled(silent_server):
+    started = time.monotonic()
+    with pytest.raises(download_stream.DownloadStopped):
+        probe_sources(
+            [PackageSource(silent_server, "http")], cancel_event=_cancel_after(0.2)
+        )
+    assert time.monotonic() - started < package_mirrors.PROBE_TIMEOUT
+
+
+def test_download_stops_when_cancelled(silent_server, tmp_path):
+    downloader = MirrorDownloader(
+        [_http_source(silent_server, 1024, 1e6)],
+        tmp_path / "out.zip",
+        cancel_event=_cancel_after(0.2),
+    )
+    started = time.monotonic()
+    with pytest.raises(download_stream.DownloadStopped):
+        downloader.run()
+    assert time.monotonic() - started < 5
+
+
+class _BrokenChunkedHandler(BaseHTTPRequestHandler):
+    """Trả body chunked rồi đóng kết nối giữa chừng"""
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        chunk = b"x" * 4096
+        self.wfile.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+        self.wfile.flush()
+        self.connection.shutdown(socket.SHUT_RDWR)
+
+
+def test_chunked_stream_dropped_midway_fails_over(package, tmp_path):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _BrokenChunkedHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/pkg.zip"
+        # Không biết kích thước (chưa đo được): tải một luồng tới hết dữ liệu
+        broken = PackageSource(url, "http", latency_s=0.001, throughput_bps=1e9)
+        fallback = PackageSource(
+            str(package), "file", latency_s=0.01, throughput_bps=1e6
+        )
+        dest = tmp_path / "out.zip"
+        downloader = MirrorDownloader([broken, fallback], dest)
+        assert downloader.run() == package.stat().st_size
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert dest.read_bytes() == package.read_bytes()
+    assert broken.failures == package_mirrors.MAX_SOURCE_FAILURES
+
+
+def test_unexpected_worker_error_is_not_reported_as_success(package, tmp_path):
+    source = PackageSource(str(package), "file", latency_s=0.01, throughput_bps=1e6)
+    downloader = MirrorDownloader([source], tmp_path / "out.zip")
+
+    def broken_fetch(source, segment):
+        raise RuntimeError("lỗi lạ")
+
+    downloader._fetch = broken_fetch
+    with pytest.raises(AllSourcesFailed):
+        downloader.run()
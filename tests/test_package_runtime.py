@@ -0,0 +1,242 @@
+import importlib.machinery
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import textwrap
+import threading
+import time
+import zipfile
+
+import pytest
+
+import package_runtime
+from backend_manager import backend_manager
+
+SITE_REL = "python_portable/Lib/site-packages"
+# Lớn hơn PREFETCH_MAX_BYTES: chỉ được giải nén khi có người mở
+ASSET_SIZE = 512 * 1024
+
+RUN_PY = textwrap.dedent("""
+    import json, os, subprocess, sys
+
+    ROOT = os.path.dirname(os.path.abspath(__file__))
+    SITE = os.path.join(ROOT, "python_portable", "Lib", "site-packages")
+    sys.path.insert(0, SITE)
+
+    import MyPkg
+    from MyPkg.Sub import Mod
+    from MyPkg import _json as ext
+
+    pkg_dir = os.path.dirname(MyPkg.__file__)
+    with open(os.path.join(pkg_dir, "Data.txt"), encoding="utf-8") as f:
+        data = f.read()
+    with open(os.path.join(pkg_dir, "Assets", "Big.bin"), "rb") as f:
+        asset = f.read()
+    child = subprocess.run(
+        [sys.executable, "-c", {child!r}, SITE],
+        capture_output=True, text=True, check=True,
+    )
+    with open(os.path.join(ROOT, "result.json"), "w", encoding="utf-8") as f:
+        json.dump(
+            {{
+                "package_file": MyPkg.__file__,
+                "mod_value": Mod.VALUE,
+                "data": data,
+                "asset_size": len(asset),
+                "ext_file": ext.__file__,
+                "ext_works": ext.encode_basestring_ascii("x") == '"x"',
+                "child": child.stdout.strip(),
+            }},
+            f,
+        )
+    """).format(
+    child=(
+        "import site, sys; site.addsitedir(sys.argv[1]); "
+        "from MyPkg.Sub import Mod; print(Mod.VALUE)"
+    )
+)
+
+
+def _extension_source():
+    """Extension có sẵn của interpreter dùng làm thư viện native trong gói"""
+    spec = importlib.util.find_spec("_json")
+    origin = spec.origin if spec else None
+    for suffix in importlib.machinery.EXTENSION_SUFFIXES:
+        if origin and origin.endswith(suffix):
+            return origin, suffix
+    pytest.skip("_json không phải extension module trên interpreter này")
+
+
+def _build_package(path):
+    origin, suffix = _extension_source()
+    site = f"client_backend/{SITE_REL}"
+    files = {
+        "client_backend/run.py": RUN_PY,
+        f"{site}/MyPkg/__init__.py": "NAME = 'MyPkg'\n",
+        f"{site}/MyPkg/Data.txt": "xin chào",
+        f"{site}/MyPkg/Assets/Big.bin": b"\0" * ASSET_SIZE,
+        f"{site}/MyPkg/Sub/__init__.py": "",
+        f"{site}/MyPkg/Sub/Mod.py": "VALUE = 42\n",
+        f"{site}/MyPkg-1.0.dist-info/METADATA": "Name: MyPkg\n",
+    }
+    with open(origin, "rb") as f:
+        files[f"{site}/MyPkg/_json{suffix}"] = f.read()
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, content in files.items():
+            zf.writestr(name, content)
+
+
+@pytest.fixture
+def installed(tmp_path, monkeypatch):
+    app_dir = tmp_path / "AppData"
+    monkeypatch.setattr(backend_manager, "app_data_dir", app_dir)
+    monkeypatch.setattr(backend_manager, "user_backend_dir", app_dir / "client_backend")
+    _build_package(tmp_path / "pkg.zip")
+    assert backend_manager.install_lazy_package(tmp_path / "pkg.zip")
+    return app_dir / "client_backend"
+
+
+def _site_dir(backend_dir):
+    return os.path.join(str(backend_dir), *SITE_REL.split("/"))
+
+
+def test_install_extracts_only_startup_files(installed):
+    assert (installed / "run.py").is_file()
+    site = installed / SITE_REL
+    assert (site / "MyPkg-1.0.dist-info" / "METADATA").is_file()
+    assert (site / package_runtime.PTH_NAME).is_file()
+    assert not (site / "MyPkg").exists()
+    assert package_runtime.validate_package(installed)
+
+
+def test_run_from_package_end_to_end(installed):
+    env = {
+        k: v
+        for k, v in os.environ.items()
+        if k not in (package_runtime.ROOT_ENV, package_runtime.CHILD_ENV)
+    }
+    runtime_py = (
+        installed / package_runtime.PACKAGE_DIR_NAME / package_runtime.RUNTIME_NAME
+    )
+    subprocess.run(
+        [sys.executable, str(runtime_py), str(installed / "run.py")],
+        cwd=str(installed),
+        env=env,
+        check=True,
+        timeout=60,
+    )
+
+    result = json.loads((installed / "result.json").read_text(encoding="utf-8"))
+    pkg_dir = installed / SITE_REL / "MyPkg"
+    assert result["package_file"] == str(pkg_dir / "__init__.py")
+    assert result["mod_value"] == 42
+    assert result["data"] == "xin chào"
+    assert result["asset_size"] == ASSET_SIZE
+    assert result["ext_works"]
+    assert os.path.isfile(result["ext_file"])
+    assert result["child"] == "42"
+    # .py được đọc thẳng từ gói, không giải nén ra đĩa
+    assert not (pkg_dir / "Sub" / "Mod.py").exists()
+    assert (pkg_dir / "Assets" / "Big.bin").is_file()
+
+
+def test_finder_keeps_case_of_relative_path(installed, monkeypatch):
+    # Giả lập Windows: normcase hạ chữ thường
+    monkeypatch.setattr(os.path, "normcase", lambda p: p.lower())
+    runtime = package_runtime.PackageRuntime(str(installed))
+    site = _site_dir(installed)
+
+    assert runtime.rel_dir(site) == SITE_REL
+    assert runtime.rel_path(str(installed).upper() + "/run.py") == "run.py"
+    spec = package_runtime._ArchiveFinder(runtime).find_spec("MyPkg", [site])
+    assert spec is not None
+    assert spec.origin == os.path.join(site, "MyPkg", "__init__.py")
+    assert runtime.rel_path(os.path.join(site, "MyPkg", "Data.txt")) == (
+        f"{SITE_REL}/MyPkg/Data.txt"
+    )
+
+
+def test_finder_materializes_extension_before_returning(installed):
+    runtime = package_runtime.PackageRuntime(str(installed))
+    site = _site_dir(installed)
+
+    spec = package_runtime._ArchiveFinder(runtime).find_spec(
+        "MyPkg._json", [os.path.join(site, "MyPkg")]
+    )
+    assert spec is None
+    assert any(
+        os.path.isfile(os.path.join(site, "MyPkg", "_json" + suffix))
+        for suffix in importlib.machinery.EXTENSION_SUFFIXES
+    )
+
+
+def test_concurrent_materialize_waits_for_file(installed, monkeypatch):
+    runtime = package_runtime.PackageRuntime(str(installed))
+    rel = f"{SITE_REL}/MyPkg/Data.txt"
+    target = runtime.disk_path(rel)
+    extract = runtime._extract
+    calls = []
+
+    def slow_extract(rel):
+        calls.append(rel)
+        time.sleep(0.2)
+        return extract(rel)
+
+    monkeypatch.setattr(runtime, "_extract", slow_extract)
+    seen = []
+
+    def worker():
+        seen.append((runtime.materialize(rel), os.path.isfile(target)))
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert seen == [(True, True)] * 4
+    assert calls == [rel]
+    assert list(runtime._accessed) == [rel]
+
+
+def test_waiter_retries_after_failed_extraction(installed, monkeypatch):
+    runtime = package_runtime.PackageRuntime(str(installed))
+    rel = f"{SITE_REL}/MyPkg/Data.txt"
+    extract = runtime._extract
+    started = threading.Event()
+    calls = []
+
+    def flaky_extract(rel):
+        calls.append(rel)
+        if len(calls) == 1:
+            started.set()
+            time.sleep(0.2)
+            raise OSError("disk full")
+        return extract(rel)
+
+    monkeypatch.setattr(runtime, "_extract", flaky_extract)
+    errors = []
+
+    def first():
+        try:
+            runtime.materialize(rel)
+        except OSError as e:
+            errors.append(e)
+
+    t = threading.Thread(target=first)
+    t.start()
+    started.wait()
+    assert runtime.materialize(rel)
+    t.join()
+
+    assert len(errors) == 1
+    assert len(calls) == 2
+    assert os.path.isfile(runtime.disk_path(rel))
+
+
+def test_missing_member_is_not_marked_materialized(installed):
+    runtime = package_runtime.PackageRuntime(str(installed))
+    assert runtime.materialize("khong_co.txt") is False
+    assert "khong_co.txt" not in runtime._materialized
@@ -0,0 +1,62 @@
+import time
+
+import requests
+
+from package_server import PackageServer, parse_range
+
+
+def test_parse_range_basic_and_open_ended():
+    assert parse_range("bytes=0-9", 100) == (0, 9)
+    assert parse_range("bytes=90-", 100) == (90, 99)
+
+
+def test_parse_range_suffix():
+    assert parse_range("bytes=-10", 100) == (90, 99)
+    # Suffix dài hơn file: trả cả file
+    assert parse_range("bytes=-500", 100) == (0, 99)
+    assert parse_range("bytes=-0", 100) == ()
+
+
+def test_parse_range_clamps_end_to_file_size():
+    assert parse_range("bytes=50-1000", 100) == (50, 99)
+
+
+def test_parse_range_unsatisfiable_and_invalid():
+    assert parse_range("bytes=100-", 100) == ()
+    assert parse_range("bytes=5-2", 100) is None
+    assert parse_range("bytes=0-1,5-6", 100) is None
+    assert parse_range("bytes=abc", 100) is None
+    assert parse_range("items=0-1", 100) is None
+
+
+def test_server_serves_ranges(tmp_path):
+    data = bytes(range(256)) * 4
+    (tmp_path / "pkg.zip").write_bytes(data)
+    with PackageServer(tmp_path) as server:
+        url = server.url_for("pkg.zip")
+
+        response = requests.get(url, headers={"Range": "bytes=-16"}, timeout=5)
+        assert response.status_code == 206
+        assert response.headers["Content-Range"] == f"bytes 1008-1023/{len(data)}"
+        assert response.content == data[-16:]
+
+        response = requests.get(url, headers={"Range": "bytes=1000-5000"}, timeout=5)
+        assert response.status_code == 206
+        assert response.content == data[1000:]
+
+        response = requests.get(url, headers={"Range": "bytes=2000-"}, timeout=5)
+        assert response.status_code == 416
+        assert response.headers["Content-Range"] == f"bytes */{len(data)}"
+
+
+def test_bandwidth_is_megabits_per_second(tmp_path):
+    size = 250_000
+    (tmp_path / "pkg.zip").write_bytes(b"\0" * size)
+    # 8 Mbps = 1 000 000 byte/giây -> 250 KB mất khoảng 0.25 giây (chunk đầu
+    # gửi ngay), nếu hiểu nhầm là MiB/s thì chỉ mất khoảng 0.03 giây
+    with PackageServer(tmp_path, bandwidth_mbps=8) as server:
+        started = time.monotonic()
+        response = requests.get(server.url_for("pkg.zip"), timeout=10)
+        elapsed = time.monotonic() - started
+    assert len(response.content) == size
+    assert 0.15 <= elapsed < 1.0
@@ -0,0 +1,110 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+import requests
+
+from backend_manager import backend_manager
+from resource_monitor import MonitorSnapshot, ProcessSample, ResourceMonitor
+
+
+@pytest.fixture
+def monitor(tmp_path):
+    monitor = ResourceMonitor(interval=0.2, metrics_path=tmp_path / "metrics.prom")
+    yield monitor
+    monitor.stop()
+
+
+@pytest.fixture
+def no_backend_stats(monkeypatch):
+    def refuse(*args, **kwargs):
+        raise requests.exceptions.ConnectionError("refused")
+
+    monkeypatch.setattr(requests, "get", refuse)
+
+
+def _snapshot(timestamp, backend_rss, backend_stats=None):
+    return MonitorSnapshot(
+        timestamp=timestamp,
+        ui=ProcessSample(pids=[1], cpu_percent=12.5, rss_bytes=100, threads=4),
+        backend=ProcessSample(pids=[2, 3], rss_bytes=backend_rss, handles=7),
+        chromium=ProcessSample(),
+        backend_stats=backend_stats or {},
+    )
+
+
+def test_sample_includes_live_backend(monitor, monkeypatch, no_backend_stats):
+    process = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+    monkeypatch.setattr(backend_manager, "process", process)
+    try:
+        snapshot = monitor.sample()
+    finally:
+        process.kill()
+        process.wait()
+
+    assert snapshot.ui.pids == [os.getpid()]
+    assert snapshot.ui.rss_bytes > 0
+    assert snapshot.backend.pids == [process.pid]
+    assert snapshot.backend.threads >= 1
+
+
+def test_sample_does_not_clear_exited_backend(monitor, monkeypatch, no_backend_stats):
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    monkeypatch.setattr(backend_manager, "process", process)
+
+    snapshot = monitor.sample()
+
+    assert snapshot.backend.pids == []
+    # Trạng thái của backend_manager chỉ do thread của nó thay đổi
+    assert backend_manager.process is process
+
+
+def test_write_metrics_prometheus_format(monitor):
+    monitor.write_metrics(_snapshot(1.0, 2048, {"queue depth": 3, "latency.ms": 1.5}))
+
+    lines = monitor.metrics_path.read_text(encoding="utf-8").splitlines()
+    assert "# TYPE ai_dubbing_process_cpu_percent gauge" in lines
+    assert 'ai_dubbing_process_cpu_percent{group="ui"} 12.5' in lines
+    assert 'ai_dubbing_process_resident_memory_bytes{group="backend"} 2048' in lines
+    assert 'ai_dubbing_process_open_handles{group="backend"} 7' in lines
+    assert 'ai_dubbing_process_count{group="backend"} 2' in lines
+    assert 'ai_dubbing_process_count{group="chromium"} 0' in lines
+    assert "ai_dubbing_backend_queue_depth 3" in lines
+    assert "ai_dubbing_backend_latency_ms 1.5" in lines
+    assert not monitor.metrics_path.with_suffix(".prom.tmp").exists()
+
+
+def test_rss_trend(monitor):
+    assert monitor.rss_trend() == 0.0
+    for t in range(5):
+        monitor.history.append(_snapshot(float(t), 1000 + 100 * t))
+
+    assert monitor.rss_trend("backend") == pytest.approx(100.0)
+    assert monitor.rss_trend("ui") == pytest.approx(0.0)
+    assert monitor.latest().timestamp == 4.0
+
+
+def test_backend_stats_keep_only_numbers(monitor, monkeypatch):
+    class _Response:
+        status_code = 200
+
+        def json(self):
+            return {"queue": 2, "latency": 0.5, "ok": True, "name": "x"}
+
+    monkeypatch.setattr(requests, "get", lambda *args, **kwargs: _Response())
+    assert monitor._fetch_backend_stats() == {"queue": 2, "latency": 0.5}
+
+
+def test_background_thread_records_history(monitor, monkeypatch, no_backend_stats):
+    monkeypatch.setattr(backend_manager, "process", None)
+    monitor.start()
+    deadline = time.monotonic() + 5
+    while monitor.latest() is None and time.monotonic() < deadline:
+        time.sleep(0.05)
+    monitor.stop()
+
+    assert monitor.latest() is not None
+    assert monitor.metrics_path.is_file()
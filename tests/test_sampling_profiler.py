@@ -0,0 +1,138 @@
+import json
+import logging
+import threading
+import time
+
+import pytest
+import requests
+
+import sampling_profiler as sp
+from backend_manager import backend_manager
+from sampling_profiler import SamplingProfiler, hot_counters, render_flamegraph
+
+
+@pytest.fixture
+def profiler(tmp_path):
+    profiler = SamplingProfiler(tmp_path / "profiles", rate_hz=200)
+    yield profiler
+    profiler.stop()
+
+
+def _busy_until(stop_event):
+    while not stop_event.is_set():
+        sum(range(1000))
+
+
+def test_hot_counters_ignored_when_disabled():
+    counters = sp.HotCounters()
+    counters.add("x")
+    assert counters.snapshot() == {}
+
+    counters.enabled = True
+    counters.add("x")
+    counters.add("ms", 1.23456)
+    counters.add("ms", 1)
+    assert counters.snapshot() == {"ms": 2.235, "x": 1}
+
+    counters.reset()
+    assert counters.snapshot() == {}
+
+
+def test_render_flamegraph_nests_frames():
+    svg = render_flamegraph({"main;a;b": 3, "main;a;c<x>": 1}, "tiêu đề")
+
+    assert svg.startswith("<svg") and svg.endswith("</svg>")
+    assert "tiêu đề" in svg
+    assert "main: 4 mẫu (100.0%)" in svg
+    assert "b: 3 mẫu (75.0%)" in svg
+    # Tên hàm được escape
+    assert "c&lt;x&gt;: 1 mẫu (25.0%)" in svg
+
+
+def test_render_flamegraph_drops_frames_narrower_than_a_pixel():
+    svg = render_flamegraph({"main;hot": 10000, "main;cold": 1}, "t")
+    assert "hot: 10000" in svg
+    assert "cold" not in svg
+
+
+def test_render_flamegraph_empty():
+    svg = render_flamegraph({}, "trống")
+    assert "<rect" not in svg
+
+
+def test_start_stop_writes_results(profiler):
+    stop_busy = threading.Event()
+    worker = threading.Thread(target=_busy_until, args=(stop_busy,), name="BusyWorker")
+    worker.start()
+    try:
+        assert profiler.start()
+        assert not profiler.start()
+        logging.getLogger("test").warning("một cảnh báo")
+        time.sleep(0.3)
+        svg_path = profiler.stop()
+    finally:
+        stop_busy.set()
+        worker.join()
+
+    assert not profiler.is_running
+    assert not hot_counters.enabled
+    assert svg_path.is_file()
+    collapsed = svg_path.with_suffix(".collapsed").read_text(encoding="utf-8")
+    assert any(
+        line.startswith("BusyWorker;") and "_busy_until" in line
+        for line in collapsed.splitlines()
+    )
+    summary = json.loads(svg_path.with_suffix(".json").read_text(encoding="utf-8"))
+    assert summary["samples"] > 0
+    assert summary["rate_hz"] == 200
+    assert summary["counters"]["log.WARNING"] == 1
+    assert "_busy_until" in svg_path.read_text(encoding="utf-8")
+
+
+def test_stop_when_not_running(profiler):
+    assert profiler.stop() is None
+
+
+def test_toggle(profiler):
+    assert profiler.toggle() is None
+    assert profiler.is_running
+    assert profiler.toggle().suffix == ".svg"
+    assert not profiler.is_running
+
+
+def test_http_calls_counted_while_running(profiler, monkeypatch):
+    def fake_send(session, request, **kwargs):
+        response = requests.Response()
+        response.status_code = 200
+        return response
+
+    monkeypatch.setattr(requests.sessions.Session, "send", fake_send)
+    profiler.start()
+    requests.get(f"{backend_manager.base_url}/v1/check/status")
+    requests.get(f"{backend_manager.base_url}/v1/check/status")
+    requests.get("http://example.invalid/file")
+    counters = hot_counters.snapshot()
+    profiler.stop()
+
+    assert counters["http.backend.calls"] == 2
+    assert counters["http.backend /v1/check/status"] == 2
+    assert counters["http.other.calls"] == 1
+    assert "http.backend.ms" in counters
+    # Hook được gỡ khi dừng
+    assert requests.sessions.Session.send is fake_send
+
+
+def test_start_from_env(tmp_path, monkeypatch):
+    profiler = SamplingProfiler(tmp_path, rate_hz=100)
+    monkeypatch.setattr(sp, "sampling_profiler", profiler)
+
+    monkeypatch.setenv(sp.PROFILE_ENV, "0")
+    assert not sp.start_from_env()
+
+    monkeypatch.setenv(sp.PROFILE_ENV, "1")
+    monkeypatch.setenv(sp.PROFILE_HZ_ENV, "50")
+    try:
+        assert sp.start_from_env()
+        assert profiler.rate_hz == 50
+    finally:
+        profiler.stop()
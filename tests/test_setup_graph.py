@@ -0,0 +1,166 @@
+import threading
+import time
+
+import pytest
+
+from setup_graph import SetupCancelled, SetupGraph, StepFailed
+
+
+def test_steps_run_after_their_dependencies():
+    order = []
+    lock = threading.Lock()
+
+    def step(name):
+        def func(ctx):
+            with lock:
+                order.append(name)
+            return name.upper()
+
+        return func
+
+    graph = SetupGraph(max_workers=4)
+    graph.add("a", step("a"))
+    graph.add("b", step("b"), deps=["a"])
+    graph.add("c", step("c"), deps=["a"])
+    graph.add("d", step("d"), deps=["b", "c"])
+    ctx = graph.run()
+
+    assert order[0] == "a" and order[-1] == "d"
+    assert ctx.results == {"a": "A", "b": "B", "c": "C", "d": "D"}
+    assert all(step.status == "done" for step in graph.steps.values())
+
+
+def test_independent_steps_run_in_parallel():
+    barrier = threading.Barrier(2, timeout=5)
+    graph = SetupGraph(max_workers=2)
+    # Chỉ qua được barrier nếu hai bước chạy cùng lúc
+    graph.add("left", lambda ctx: barrier.wait())
+    graph.add("right", lambda ctx: barrier.wait())
+    graph.run()
+
+
+def test_unknown_dependency_is_rejected():
+    graph = SetupGraph()
+    with pytest.raises(ValueError):
+        graph.add("b", lambda ctx: None, deps=["a"])
+
+
+def test_failure_skips_dependents_and_stops_running_steps():
+    stopped = threading.Event()
+
+    def slow(ctx):
+        for _ in range(500):
+            ctx.check_cancelled()
+            time.sleep(0.01)
+
+    def watch_cancel(ctx):
+        try:
+            slow(ctx)
+        except SetupCancelled:
+            stopped.set()
+            raise
+
+    def boom(ctx):
+        time.sleep(0.05)
+        raise RuntimeError("disk full")
+
+    graph = SetupGraph(max_workers=4)
+    graph.add("slow", watch_cancel)
+    graph.add("boom", boom)
+    graph.add("after", lambda ctx: None, deps=["boom"])
+
+    started = time.perf_counter()
+    with pytest.raises(StepFailed, match="disk full"):
+        graph.run()
+
+    assert time.perf_counter() - started < 2
+    assert stopped.is_set()
+    assert graph.steps["boom"].status == "failed"
+    assert graph.steps["after"].status == "pending"
+
+
+def test_step_failed_message_is_kept():
+    def fail(ctx):
+        raise StepFailed("Không thể tải backend")
+
+    graph = SetupGraph()
+    graph.add("download", fail)
+    with pytest.raises(StepFailed) as excinfo:
+        graph.run()
+    assert str(excinfo.value) == "Không thể tải backend"
+
+
+def test_optional_step_failure_is_skipped():
+    def fail(ctx):
+        raise RuntimeError("no port")
+
+    graph = SetupGraph()
+    graph.add("probe", fail, optional=True)
+    graph.add("start", lambda ctx: ctx.results["probe"], deps=["probe"])
+    ctx = graph.run()
+
+    assert graph.steps["probe"].status == "skipped"
+    assert ctx.results["start"] is None
+
+
+def test_cancel_stops_running_step_and_pending_steps():
+    entered = threading.Event()
+
+    def long_step(ctx):
+        entered.set()
+        while True:
+            ctx.check_cancelled()
+            time.sleep(0.01)
+
+    graph = SetupGraph()
+    graph.add("download", long_step)
+    graph.add("extract", lambda ctx: None, deps=["download"])
+
+    def cancel_later():
+        entered.wait(5)
+        graph.cancel()
+
+    threading.Thread(target=cancel_later).start()
+    with pytest.raises(SetupCancelled):
+        graph.run()
+    assert graph.steps["download"].error == "cancelled"
+    assert graph.steps["extract"].status == "pending"
+
+
+def test_cancel_before_run_runs_nothing():
+    ran = []
+    graph = SetupGraph()
+    graph.add("a", lambda ctx: ran.append("a"))
+    graph.cancel()
+    with pytest.raises(SetupCancelled):
+        graph.run()
+    assert ran == []
+
+
+def test_progress_is_weighted_across_steps():
+    reports = []
+
+    def half(ctx):
+        ctx.report("download", 50)
+
+    graph = SetupGraph(max_workers=1)
+    graph.add("download", half, weight=60)
+    graph.add("extract", lambda ctx: None, deps=["download"], weight=40)
+    graph.run(progress_callback=lambda message, percent: reports.append(percent))
+
+    assert reports == [30, 60, 100]
+
+
+def test_critical_path_uses_measured_durations():
+    graph = SetupGraph()
+    graph.add("a", lambda ctx: None)
+    graph.add("b", lambda ctx: None, deps=["a"])
+    graph.add("c", lambda ctx: None)
+    graph.run()
+    graph.steps["a"].duration = 1.0
+    graph.steps["b"].duration = 2.0
+    graph.steps["c"].duration = 2.5
+
+    path, total = graph.critical_path()
+    assert path == ["a", "b"]
+    assert total == pytest.approx(3.0)
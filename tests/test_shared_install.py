@@ -0,0 +1,181 @@
+import json
+import os
+import stat
+import zipfile
+
+import pytest
+
+import install_manifest
+import shared_install
+from app_settings import AppSettings
+from backend_manager import BackendManager
+from package_server import build_synthetic_package
+
+PYTHON_REL = (
+    "python_portable/python.exe" if os.name == "nt" else "python_portable/bin/python"
+)
+
+
+def _layout_backend(backend_dir, marker="shared"):
+    """Cây client_backend tối thiểu mà validate_install chấp nhận"""
+    (backend_dir / PYTHON_REL).parent.mkdir(parents=True, exist_ok=True)
+    (backend_dir / PYTHON_REL).write_bytes(b"\0")
+    (backend_dir / "run.py").write_text(f"print({marker!r})\n")
+    (backend_dir / "lib" / "pkg").mkdir(parents=True)
+    (backend_dir / "lib" / "pkg" / "mod.py").write_text("x = 1\n")
+    (backend_dir / "logs").mkdir()
+    install_manifest.write_manifest(
+        backend_dir, {"run.py": 0, PYTHON_REL: 0, "lib/pkg/mod.py": 0}
+    )
+    return backend_dir
+
+
+@pytest.fixture
+def shared_root(tmp_path, monkeypatch):
+    root = tmp_path / "machine"
+    monkeypatch.setenv(shared_install.SHARED_ROOT_ENV, str(root))
+    yield root
+    if root.exists():
+        shared_install.remove_shared(root)
+
+
+def test_shared_root_from_env(shared_root):
+    assert shared_install.shared_root() == shared_root
+    assert shared_install.shared_backend_dir() == shared_root / "client_backend"
+
+
+def test_overlay_links_shared_tree_and_keeps_writable_dirs(tmp_path):
+    shared = _layout_backend(tmp_path / "shared")
+    overlay = shared_install.prepare_overlay(shared, tmp_path / "overlay")
+
+    assert (overlay / "run.py").read_text() == "print('shared')\n"
+    assert (overlay / "lib").is_symlink() or os.name == "nt"
+    assert (overlay / "lib" / "pkg" / "mod.py").exists()
+    assert not (overlay / install_manifest.MANIFEST_NAME).exists()
+    for name in shared_install.WRITABLE_DIRS:
+        assert (overlay / name).is_dir() and not (overlay / name).is_symlink()
+    # logs của bản chung không được dùng chung
+    (overlay / "logs" / "backend.log").write_text("user log")
+    assert not (shared / "logs" / "backend.log").exists()
+
+
+def test_overlay_is_reused_until_shared_install_changes(tmp_path):
+    shared = _layout_backend(tmp_path / "shared")
+    overlay = shared_install.prepare_overlay(shared, tmp_path / "overlay")
+    (overlay / "cache" / "keep.bin").write_bytes(b"cached")
+    stamp = (overlay / shared_install.OVERLAY_STAMP_NAME).stat().st_mtime_ns
+
+    shared_install.prepare_overlay(shared, overlay)
+    assert (overlay / shared_install.OVERLAY_STAMP_NAME).stat().st_mtime_ns == stamp
+
+    # Bản chung được cài lại: manifest mới -> overlay được làm mới
+    (shared / "new_file.py").write_text("y = 2\n")
+    install_manifest.write_manifest(shared, {"run.py": 0, "new_file.py": 0})
+    shared_install.prepare_overlay(shared, overlay)
+    assert (overlay / "new_file.py").exists()
+    assert (overlay / "cache" / "keep.bin").read_bytes() == b"cached"
+    # Bỏ link không làm mất file của bản chung
+    assert (shared / "lib" / "pkg" / "mod.py").exists()
+
+
+def test_overlay_env_points_at_writable_dirs(tmp_path):
+    env = shared_install.overlay_env(tmp_path / "overlay", tmp_path / "out")
+    assert env["AI_DUBBING_DATA_DIR"] == str(tmp_path / "overlay")
+    assert env["AI_DUBBING_LOG_DIR"] == str(tmp_path / "overlay" / "logs")
+    assert env["AI_DUBBING_OUTPUT_DIR"] == str(tmp_path / "out")
+
+
+def test_make_read_only_clears_write_bits(tmp_path):
+    tree = _layout_backend(tmp_path / "tree")
+    shared_install.make_read_only(tree)
+    try:
+        for path in [tree / "run.py", tree / "lib" / "pkg" / "mod.py"]:
+            mode = path.stat().st_mode
+            assert not mode & 0o222 and mode & stat.S_IROTH
+        if os.name != "nt":
+            assert not (tree / "lib").stat().st_mode & 0o222
+    finally:
+        for dirpath, _, _ in os.walk(tree):
+            os.chmod(dirpath, 0o755)
+
+
+def test_install_and_replace_shared(tmp_path, shared_root):
+    package = build_synthetic_package(
+        tmp_path / "pkg.zip", total_size_mb=0.1, file_count=10
+    )
+    target = shared_install.install_shared(package, shared_root)
+    assert (target / "run.py").exists()
+    assert not (target / "run.py").stat().st_mode & 0o222
+    manifest = install_manifest.load_manifest(target)
+    assert install_manifest.fast_validate(target, manifest) == []
+
+    # Cài lại: thay nguyên tử, không còn thư mục tạm/bản cũ
+    with zipfile.ZipFile(package, "a") as zf:
+        zf.writestr("client_backend/extra.py", "z = 3\n")
+    target = shared_install.install_shared(package, shared_root)
+    assert (target / "extra.py").exists()
+    assert sorted(p.name for p in shared_root.iterdir()) == ["client_backend"]
+
+    shared_install.remove_shared(shared_root)
+    assert not target.exists()
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch, shared_root):
+    monkeypatch.setenv("APPDATA", str(tmp_path / "appdata"))
+    manager = BackendManager()
+    manager.settings = AppSettings(install_mode="auto")
+    return manager
+
+
+def test_shared_install_is_preferred_and_private_install_kept(manager, shared_root):
+    _layout_backend(manager.user_backend_dir, marker="user")
+    _layout_backend(shared_root / "client_backend")
+
+    assert manager.is_backend_installed()
+    assert manager.shared_mode
+    assert manager.backend_dir == shared_root / "client_backend"
+    # Bản riêng vẫn còn nguyên để dự phòng
+    assert (manager.user_backend_dir / "run.py").read_text() == "print('user')\n"
+    assert not manager.trash_reaper.trash_dir.exists()
+
+
+def test_user_install_used_when_shared_missing_or_mode_user(manager, shared_root):
+    _layout_backend(manager.user_backend_dir, marker="user")
+    assert manager.select_install() and not manager.shared_mode
+
+    _layout_backend(shared_root / "client_backend")
+    manager.settings = AppSettings(install_mode="user")
+    assert manager.select_install() and not manager.shared_mode
+    assert manager.backend_dir == manager.user_backend_dir
+
+
+def test_falls_back_to_private_install_when_shared_does_not_start(
+    manager, shared_root, monkeypatch
+):
+    _layout_backend(manager.user_backend_dir, marker="user")
+    _layout_backend(shared_root / "client_backend")
+    manager.max_startup_retries = 2
+    manager.startup_delay = 0
+    started_from = []
+
+    def start_once():
+        started_from.append(manager.backend_dir)
+        return manager.backend_dir == manager.user_backend_dir
+
+    monkeypatch.setattr(manager, "_start_backend_once", start_once)
+    monkeypatch.setattr(manager, "_wait_for_backend_ready", lambda *args: True)
+
+    assert manager.is_backend_installed() and manager.shared_mode
+    assert manager.start_backend()
+    assert not manager.shared_mode
+    assert started_from == [shared_root / "client_backend"] * 2 + [
+        manager.user_backend_dir
+    ]
+
+
+def test_stamp_records_shared_manifest(tmp_path):
+    shared = _layout_backend(tmp_path / "shared")
+    overlay = shared_install.prepare_overlay(shared, tmp_path / "overlay")
+    stamp = json.loads((overlay / shared_install.OVERLAY_STAMP_NAME).read_text())
+    assert stamp["created"] == install_manifest.load_manifest(shared)["created"]
@@ -0,0 +1,63 @@
+import os
+import time
+
+from trash_reaper import TrashReaper
+
+
+def _make_tree(root, files=50):
+    for i in range(files):
+        path = root / f"pkg_{i % 5}" / f"mod_{i}.py"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f"x = {i}\n")
+    return root
+
+
+def test_move_to_trash_is_a_rename(tmp_path):
+    reaper = TrashReaper(tmp_path / "trash")
+    tree = _make_tree(tmp_path / "client_backend")
+
+    target = reaper.move_to_trash(tree)
+    assert not tree.exists()
+    assert target.parent == tmp_path / "trash"
+    assert (target / "pkg_0" / "mod_0.py").exists()
+
+
+def test_move_missing_path_returns_none(tmp_path):
+    assert TrashReaper(tmp_path / "trash").move_to_trash(tmp_path / "missing") is None
+
+
+def test_reap_removes_everything_in_batches(tmp_path):
+    reaper = TrashReaper(tmp_path / "trash", batch_size=7, batch_pause=0)
+    reaper.move_to_trash(_make_tree(tmp_path / "a"))
+    reaper.move_to_trash(_make_tree(tmp_path / "b", files=3))
+
+    assert reaper.reap() == 53
+    assert list((tmp_path / "trash").iterdir()) == []
+
+
+def test_reap_removes_read_only_files_and_keeps_link_targets(tmp_path):
+    reaper = TrashReaper(tmp_path / "trash", batch_pause=0)
+    tree = _make_tree(tmp_path / "old", files=2)
+    (tree / "pkg_0" / "mod_0.py").chmod(0o444)
+    outside = _make_tree(tmp_path / "outside", files=2)
+    os.symlink(outside, tree / "linked", target_is_directory=True)
+
+    reaper.move_to_trash(tree)
+    reaper.reap()
+    assert list((tmp_path / "trash").iterdir()) == []
+    assert (outside / "pkg_0" / "mod_0.py").exists()
+
+
+def test_background_thread_reaps_leftovers_and_new_trash(tmp_path):
+    reaper = TrashReaper(tmp_path / "trash", batch_pause=0, idle_interval=60)
+    # Phần còn sót từ phiên trước
+    _make_tree(tmp_path / "trash" / "leftover", files=3)
+    reaper.start()
+    try:
+        reaper.move_to_trash(_make_tree(tmp_path / "new", files=3))
+        deadline = time.monotonic() + 5
+        while any((tmp_path / "trash").iterdir()) and time.monotonic() < deadline:
+            time.sleep(0.02)
+    finally:
+        reaper.stop()
+    assert list((tmp_path / "trash").iterdir()) == []
@@ -0,0 +1,192 @@
+import pytest
+
+QtWebEngineCore = pytest.importorskip("PyQt6.QtWebEngineCore")
+pytest.importorskip("PyQt6.QtWebEngineWidgets")
+
+from ui.web_view_pool import WebViewPool  # noqa: E402
+
+State = QtWebEngineCore.QWebEnginePage.LifecycleState
+
+# Các chuyển trạng thái Chromium chấp nhận (Discarded -> Active là nạp lại trang)
+CHROMIUM_TRANSITIONS = {
+    (State.Active, State.Frozen),
+    (State.Frozen, State.Active),
+    (State.Active, State.Discarded),
+    (State.Frozen, State.Discarded),
+    (State.Discarded, State.Active),
+}
+
+
+class _FakePage:
+    def __init__(self, pid):
+        self.pid = pid
+        self.state = State.Active
+
+    def lifecycleState(self):
+        return self.state
+
+    def setLifecycleState(self, state):
+        assert (self.state, state) in CHROMIUM_TRANSITIONS, (self.state, state)
+        self.state = state
+
+    def renderProcessPid(self):
+        return self.pid
+
+
+class _FakeView:
+    def __init__(self, pid):
+        self._page = _FakePage(pid)
+        self.url = None
+        self.deleted = False
+
+    def page(self):
+        return self._page
+
+    def load(self, url):
+        self.url = url.toString()
+
+    def deleteLater(self):
+        self.deleted = True
+
+
+class _FakeStack:
+    """Thay QStackedWidget: không cần QApplication hay màn hình"""
+
+    def __init__(self):
+        self.widgets = []
+        self.current = None
+
+    def addWidget(self, widget):
+        self.widgets.append(widget)
+        if self.current is None:
+            self.current = widget
+
+    def removeWidget(self, widget):
+        self.widgets.remove(widget)
+        if self.current is widget:
+            self.current = self.widgets[0] if self.widgets else None
+
+    def setCurrentWidget(self, widget):
+        self.current = widget
+
+    def currentWidget(self):
+        return self.current
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = WebViewPool(_FakeStack(), profile=None, max_views=3, max_frozen=1)
+    created = []
+
+    def create_view():
+        view = _FakeView(pid=len(created) + 1)
+        created.append(view)
+        pool.container.addWidget(view)
+        return view
+
+    monkeypatch.setattr(pool, "_create_view", create_view)
+    pool.created = created
+    return pool
+
+
+def _states(pool):
+    return {key: view.page().lifecycleState() for key, view in pool._views.items()}
+
+
+def test_show_orders_views_by_recent_use(pool):
+    for key in ("a", "b", "c"):
+        pool.show(f"https://{key}.test/", key)
+
+    assert list(pool._views) == ["a", "b", "c"]
+    assert _states(pool) == {
+        "a": State.Discarded,
+        "b": State.Frozen,
+        "c": State.Active,
+    }
+
+    view = pool.show("https://a.test/", "a")
+    assert view is pool.created[0]
+    assert list(pool._views) == ["b", "c", "a"]
+    assert _states(pool) == {
+        "b": State.Discarded,
+        "c": State.Frozen,
+        "a": State.Active,
+    }
+    assert pool.current_view() is view
+
+
+def test_evicts_least_recently_used_over_max_views(pool):
+    for key in ("a", "b", "c", "d"):
+        pool.show(f"https://{key}.test/", key)
+
+    assert list(pool._views) == ["b", "c", "d"]
+    assert pool.created[0].deleted
+    assert pool.created[0] not in pool.container.widgets
+
+
+def test_warmup_is_most_recent_and_kept_until_shown(pool):
+    pool.configure(max_views=2)
+    pool.show("https://a.test/", "a")
+    pool.show("https://b.test/", "b")
+
+    pool.warmup("https://w.test/", "w")
+    # View hiện tại vẫn đứng cuối, view warmup ngay trước nó và vẫn đang tải
+    assert list(pool._views) == ["w", "b"]
+    assert pool.current_view() is pool._views["b"]
+    assert _states(pool)["w"] == State.Active
+
+    pool.show("https://c.test/", "c")
+    assert list(pool._views) == ["w", "c"]
+
+    warmed = pool._views["w"]
+    assert pool.show("https://w.test/", "w") is warmed
+    pool.show("https://d.test/", "d")
+    assert "w" in pool._views
+    pool.show("https://e.test/", "e")
+    assert "w" not in pool._views
+
+
+def test_warmup_before_first_show_is_reused(pool):
+    pool.warmup("https://home.test/")
+    view = pool.show("https://home.test/")
+
+    assert len(pool.created) == 1
+    assert view is pool.created[0]
+    assert view.url == "https://home.test/"
+
+
+def test_raising_max_frozen_keeps_discarded_views(pool):
+    pool.configure(max_frozen=0)
+    pool.show("https://a.test/", "a")
+    pool.show("https://b.test/", "b")
+    assert _states(pool)["a"] == State.Discarded
+
+    # Discarded -> Frozen không hợp lệ: _FakePage sẽ báo lỗi nếu pool yêu cầu
+    pool.configure(max_frozen=2)
+    assert _states(pool)["a"] == State.Discarded
+
+    pool.show("https://c.test/", "c")
+    assert _states(pool)["b"] == State.Frozen
+    pool.configure(max_frozen=0)
+    assert _states(pool)["b"] == State.Discarded
+
+
+def test_memory_budget_enforced_after_warmup(pool, monkeypatch):
+    monkeypatch.setattr(pool, "_memory_usage_mb", lambda: 400 * len(pool._views))
+    pool.configure(memory_budget_mb=1000)
+    pool.show("https://a.test/", "a")
+    pool.show("https://b.test/", "b")
+
+    pool.warmup("https://w.test/", "w")
+
+    assert list(pool._views) == ["w", "b"]
+    assert pool.created[0].deleted
+
+
+def test_memory_budget_never_evicts_current_view(pool, monkeypatch):
+    monkeypatch.setattr(pool, "_memory_usage_mb", lambda: 10000.0)
+    pool.show("https://a.test/", "a")
+    pool.show("https://b.test/", "b")
+
+    assert list(pool._views) == ["b"]
+    assert pool.current_view() is pool._views["b"]
@@ -0,0 +1,174 @@
+import os
+import stat
+import time
+import uuid
+import logging
+import threading
+from pathlib import Path
+from typing import Optional
+
+try:
+    import psutil
+except ImportError:  # thiếu psutil thì không chờ máy rảnh
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+
+def _remove_readonly(func, path, exc):
+    """Windows: bỏ thuộc tính read-only rồi xóa lại"""
+    os.chmod(path, stat.S_IWRITE)
+    func(path)
+
+
+class TrashReaper:
+    """Xóa thư mục cũ ở chế độ nền thay vì chặn luồng cài đặt.
+
+    move_to_trash() chỉ đổi tên thư mục vào vùng trash (cùng ổ đĩa nên gần
+    như tức thời). Thread nền xóa dần nội dung trash, nghỉ sau mỗi lô file
+    để không chiếm hết I/O, tạm dừng khi CPU hệ thống đang bận, và dọn
+    luôn phần còn sót lại nếu lần chạy trước bị crash giữa chừng.
+    """
+
+    def __init__(
+        self,
+        trash_dir: Path,
+        batch_size: int = 200,
+        batch_pause: float = 0.02,
+        busy_cpu_percent: float = 80,
+        idle_interval: float = 600,
+    ):
+        self.trash_dir = Path(trash_dir)
+        self.batch_size = batch_size
+        self.batch_pause = batch_pause
+        self.busy_cpu_percent = busy_cpu_percent
+        self.idle_interval = idle_interval
+        self._wake_event = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._process = None
+
+    def move_to_trash(self, path: Path) -> Optional[Path]:
+        """Đổi tên path vào trash; trả về None nếu không đổi tên được"""
+        path = Path(path)
+        if not path.exists():
+            return None
+        try:
+            self.trash_dir.mkdir(parents=True, exist_ok=True)
+            target = (
+                self.trash_dir
+                / f"{path.name}-{int(time.time())}-{uuid.uuid4().hex[:8]}"
+            )
+            os.replace(path, target)
+        except OSError as e:
+            logger.warning(f"Không thể chuyển {path} vào trash: {e}")
+            return None
+
+        logger.info(f"Đã chuyển {path} vào trash")
+        self._wake_event.set()
+        return target
+
+    def start(self):
+        """Chạy thread xóa nền (lần đầu dọn ngay phần còn sót từ phiên trước)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._wake_event.set()
+        self._thread = threading.Thread(
+            target=self._run, name="TrashReaper", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._wake_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def reap(self) -> int:
+        """Xóa toàn bộ nội dung trash, trả về số file đã xóa"""
+        if not self.trash_dir.exists():
+            return 0
+
+        removed = 0
+        started = time.perf_counter()
+        for entry in list(os.scandir(self.trash_dir)):
+            if self._stop_event.is_set():
+                break
+            removed += self._delete_tree(entry.path)
+
+        if removed:
+            logger.info(
+                f"Đã xóa {removed} file trong trash sau "
+                f"{time.perf_counter() - started:.1f}s"
+            )
+        return removed
+
+    def _delete_tree(self, root: str) -> int:
+        """Xóa từ dưới lên, nghỉ sau mỗi batch_size file"""
+        removed = 0
+        if not os.path.isdir(root) or os.path.islink(root):
+            self._unlink(root)
+            return 1
+
+        for dirpath, dirnames, filenames in os.walk(root, topdown=False):
+            for name in filenames:
+                if self._stop_event.is_set():
+                    return removed
+                self._unlink(os.path.join(dirpath, name))
+                removed += 1
+                if removed % self.batch_size == 0:
+                    self._throttle()
+            for name in dirnames:
+                path = os.path.join(dirpath, name)
+                if os.path.islink(path):
+                    self._unlink(path)
+                else:
+                    self._rmdir(path)
+        self._rmdir(root)
+        return removed
+
+    def _unlink(self, path: str):
+        try:
+            os.unlink(path)
+        except PermissionError:
+            try:
+                _remove_readonly(os.unlink, path, None)
+            except OSError as e:
+                logger.debug(f"Không xóa được {path}: {e}")
+        except OSError as e:
+            logger.debug(f"Không xóa được {path}: {e}")
+
+    def _rmdir(self, path: str):
+        try:
+            os.rmdir(path)
+        except OSError as e:
+            logger.debug(f"Không xóa được thư mục {path}: {e}")
+
+    def _system_busy(self) -> bool:
+        """CPU đang bận bởi việc khác (không tính chính process này)"""
+        if psutil is None:
+            return False
+        if self._process is None:
+            self._process = psutil.Process()
+        system = psutil.cpu_percent(interval=None)
+        own = self._process.cpu_percent(interval=None) / (psutil.cpu_count() or 1)
+        return system - own > self.busy_cpu_percent
+
+    def _throttle(self):
+        self._stop_event.wait(self.batch_pause)
+        # Nhường máy cho việc khác khi CPU đang bận
+        while not self._stop_event.is_set() and self._system_busy():
+            self._stop_event.wait(1.0)
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self._wake_event.wait(self.idle_interval)
+            self._wake_event.clear()
+            if self._stop_event.is_set():
+                break
+            try:
+                self.reap()
+            except Exception as e:
+                logger.error(f"Lỗi khi dọn trash: {e}")
@@ -0,0 +1,33 @@
+from PyQt6.QtCore import QObject, QEvent
+
+from sampling_profiler import hot_counters
+
+
+class QtEventCounter(QObject):
+    """Đếm event của toàn app khi profiler chạy
+
+    Signal nối giữa các thread (worker -> UI) được giao dưới dạng event
+    MetaCall, nên qt.queued_signals là số signal queued đã được xử lý.
+    """
+
+    def __init__(self, app: QObject):
+        super().__init__(app)
+        self.app = app
+        self.active = False
+
+    def start(self):
+        if not self.active:
+            self.app.installEventFilter(self)
+            self.active = True
+
+    def stop(self):
+        if self.active:
+            self.app.removeEventFilter(self)
+            self.active = False
+
+    def eventFilter(self, obj, event):
+        event_type = event.type()
+        if event_type == QEvent.Type.MetaCall:
+            hot_counters.add("qt.queued_signals")
+        hot_counters.add(f"qt.event.{event_type.name}")
+        return False
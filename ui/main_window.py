@@ -1,5 +1,7 @@
 import sys
 import os
+import shutil
+import socket
 from pathlib import Path
 from PyQt6.QtWidgets import (
     QApplication,
@@ -15,17 +17,25 @@ from PyQt6.QtWidgets import (
     QSplitter,
     QFrame,
     QSizePolicy,
+    QStackedWidget,
 )
-from PyQt6.QtWebEngineWidgets import QWebEngineView
 
 # Thêm QSize nếu chưa có
-from PyQt6.QtGui import QFont, QIcon, QPixmap
-from PyQt6.QtCore import QUrl, Qt, QThread, pyqtSignal, QSize
+from PyQt6.QtGui import QFont, QIcon, QPixmap, QShortcut, QKeySequence
+from PyQt6.QtCore import Qt, QThread, pyqtSignal, QSize
 import logging
-from const import DOWNLOAD_AI_SERVICE_PACKAGE
+from const import MEDIA_URL_SCHEME
 
 # Import backend manager
+from app_settings import settings_store, changes_requiring
 from backend_manager import backend_manager
+from backend_updater import backend_updater
+from setup_graph import SetupGraph, SetupCancelled, StepFailed
+from ui.media_scheme import MediaSchemeHandler
+from ui.web_view_pool import WebViewPool, create_persistent_profile
+from resource_monitor import resource_monitor
+from sampling_profiler import sampling_profiler
+from ui.event_counter import QtEventCounter
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +45,13 @@ logger = logging.getLogger(__name__)
 CURRENT_DIR = Path(__file__).parent.resolve()
 ICONS_DIR = CURRENT_DIR.parent / "icons"  # Điều hướng lên một cấp từ ui/
 
+HOME_URL = "https://www.youtube.com"
+
+# Dung lượng trống tối thiểu khi không biết kích thước gói
+MIN_FREE_DISK_BYTES = 8 * 1024**3
+# Thời gian tối đa chờ worker cài đặt dừng khi đóng cửa sổ
+SETUP_CANCEL_TIMEOUT_MS = 5000
+
 
 class BackendSetupWorker(QThread):
     """Worker thread để cài đặt và khởi động backend"""
@@ -43,49 +60,69 @@ class BackendSetupWorker(QThread):
     status = pyqtSignal(str)  # status message
     finished = pyqtSignal(bool, str)  # success, message
 
+    warmup_requested = pyqtSignal()  # yêu cầu UI thread khởi động web engine sớm
+
     def __init__(self):
         super().__init__()
 
-        # TODO: Thay bằng URL thật
-        download_url = DOWNLOAD_AI_SERVICE_PACKAGE
-        self.download_url = download_url
+        # URL gói backend lấy từ settings.json (mặc định const.DOWNLOAD_AI_SERVICE_PACKAGE)
+        self.download_url = settings_store.settings.package_url
+        # Tạo sẵn để cancel() có hiệu lực cả khi thread chưa bắt đầu chạy
+        self.graph = self.build_graph()
+
+    def build_graph(self) -> SetupGraph:
+        """Mô tả quá trình setup dưới dạng đồ thị các bước phụ thuộc nhau"""
+        graph = SetupGraph(max_workers=4)
+        graph.add("ensure_dir", self._step_ensure_dir)
+        graph.add("apply_update", self._step_apply_update, deps=["ensure_dir"])
+        graph.add("check_install", self._step_check_install, deps=["apply_update"])
+        graph.add("probe_port", self._step_probe_port, optional=True)
+        graph.add("warmup_web_engine", self._step_warmup_web_engine, optional=True)
+        # Không tùy chọn: nguồn đo lỗi vẫn được giữ làm dự phòng nên bước này
+        # chỉ lỗi khi chưa cấu hình nguồn nào, lỗi đó phải tới được người dùng
+        graph.add("read_manifest", self._step_read_manifest, deps=["check_install"])
+        graph.add(
+            "remove_old_install", self._step_remove_old_install, deps=["check_install"]
+        )
+        graph.add(
+            "preflight_disk",
+            self._step_preflight_disk,
+            deps=["check_install", "read_manifest"],
+        )
+        graph.add("download", self._step_download, deps=["preflight_disk"], weight=60)
+        graph.add(
+            "extract",
+            self._step_extract,
+            deps=["download", "remove_old_install"],
+            weight=25,
+        )
+        graph.add(
+            "start_backend",
+            self._step_start_backend,
+            deps=["extract", "probe_port"],
+            weight=15,
+        )
+        return graph
+
+    def cancel(self):
+        """Hủy quá trình setup đang chạy"""
+        self.graph.cancel()
 
     def run(self):
         try:
-            # Setup backend
-            backend_manager.ensure_app_data_dir()
-
-            # Kiểm tra backend đã cài đặt chưa
-            if not backend_manager.is_backend_installed():
-                self.status.emit("Đang tải backend...")
-                self.progress.emit("Đang tải backend...", 10)
-
-                if not backend_manager.download_backend(
-                    self.download_url,
-                    progress_callback=lambda p: self.progress.emit(
-                        f"Đang tải: {p}%", p
-                    ),
-                ):
-                    self.finished.emit(False, "Không thể tải backend")
-                    return
-
-                self.progress.emit("Đang giải nén backend...", 70)
-                if not backend_manager.extract_backend(
-                    progress_callback=lambda p: self.progress.emit(
-                        f"Đang giải nén: {p}%", 70 + int(p * 0.2)
-                    )
-                ):
-                    self.finished.emit(False, "Không thể giải nén backend")
-                    return
-
-                self.progress.emit("Đã cài đặt backend", 90)
-
-            # Khởi động backend
-            self.status.emit("Đang khởi động backend...")
-            if backend_manager.start_backend(status_callback=self.status.emit):
-                self.finished.emit(True, "Backend đã sẵn sàng")
-            else:
-                self.finished.emit(False, "Không thể khởi động backend sau 3 lần thử")
+            self.graph.run(
+                progress_callback=self.progress.emit,
+                status_callback=self.status.emit,
+            )
+            self.finished.emit(True, "Backend đã sẵn sàng")
+
+        except SetupCancelled:
+            # Chỉ bị hủy khi đóng cửa sổ: không báo lỗi cho người dùng
+            logger.info("Đã hủy cài đặt backend")
+            backend_manager.stop_backend()
+
+        except StepFailed as e:
+            self.finished.emit(False, str(e))
 
         except Exception as e:
             logger.error(f"Lỗi trong worker: {e}")
@@ -94,13 +131,167 @@ class BackendSetupWorker(QThread):
             traceback.print_exc()
             self.finished.emit(False, f"Lỗi: {str(e)}")
 
+    # --- Các bước setup (chạy trên thread pool của SetupGraph) ---
+
+    def _step_ensure_dir(self, ctx):
+        backend_manager.ensure_app_data_dir()
+        backend_manager.clean_leftovers()
+
+    def _step_apply_update(self, ctx):
+        """Kích hoạt bản cập nhật đã tải nền ở phiên trước (nếu có)"""
+        if backend_updater.has_staged_update():
+            self.status.emit("Đang áp dụng bản cập nhật backend...")
+            backend_updater.apply_staged_update()
+
+    def _step_check_install(self, ctx):
+        return backend_manager.is_backend_installed()
+
+    def _step_probe_port(self, ctx):
+        """Kiểm tra cổng backend có đang bị process khác chiếm không"""
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            sock.settimeout(0.5)
+            in_use = (
+                sock.connect_ex(
+                    (backend_manager.backend_host, backend_manager.backend_port)
+                )
+                == 0
+            )
+        if in_use and not backend_manager.is_backend_running():
+            logger.warning(
+                f"Cổng {backend_manager.backend_port} đang được process khác sử dụng"
+            )
+        return in_use
+
+    def _step_warmup_web_engine(self, ctx):
+        self.warmup_requested.emit()
+
+    def _step_read_manifest(self, ctx):
+        """Đo các nguồn gói (URL chính + mirror) và lấy kích thước gói"""
+        if ctx.results["check_install"]:
+            return None
+        sources = backend_manager.probe_package_sources(
+            self.download_url, cancel_event=ctx.cancel_event
+        )
+        if not sources:
+            # Nguồn đo lỗi vẫn được giữ làm dự phòng: chỉ rỗng khi chưa cấu hình
+            raise StepFailed("Chưa cấu hình nguồn gói backend (URL gói/mirror)")
+        return {"size": sources[0].size or 0, "sources": sources}
+
+    def _step_remove_old_install(self, ctx):
+        """Bỏ bản cài dở dang (đổi tên vào trash) trong lúc tải gói mới"""
+        if ctx.results["check_install"] or not backend_manager.backend_dir.exists():
+            return
+        backend_manager.remove_backend_dir()
+
+    def _step_preflight_disk(self, ctx):
+        """Kiểm tra dung lượng trống trước khi tải"""
+        if ctx.results["check_install"]:
+            return
+        manifest = ctx.results.get("read_manifest") or {}
+        # Cần chỗ cho file zip + bản giải nén (ước lượng gấp 3 lần gói)
+        required = manifest.get("size", 0) * 3 or MIN_FREE_DISK_BYTES
+        free = shutil.disk_usage(backend_manager.app_data_dir).free
+        if free < required:
+            raise StepFailed(
+                f"Không đủ dung lượng ổ đĩa: cần {required / 1024**3:.1f} GB, "
+                f"còn trống {free / 1024**3:.1f} GB"
+            )
+
+    def _step_download(self, ctx):
+        if ctx.results["check_install"]:
+            return
+        self.status.emit("Đang tải backend...")
+
+        def on_progress(p):
+            ctx.check_cancelled()
+            ctx.report("download", p, f"Đang tải: {p}%")
+
+        manifest = ctx.results.get("read_manifest") or {}
+        if not backend_manager.download_backend(
+            self.download_url,
+            progress_callback=on_progress,
+            sources=manifest.get("sources"),
+            cancel_event=ctx.cancel_event,
+        ):
+            ctx.check_cancelled()
+            raise StepFailed("Không thể tải backend")
+
+    def _step_extract(self, ctx):
+        if ctx.results["check_install"]:
+            return
+        ctx.report("extract", 0, "Đang giải nén backend...")
+
+        def on_progress(p):
+            ctx.check_cancelled()
+            ctx.report("extract", p, f"Đang giải nén: {p}%")
+
+        if not backend_manager.extract_backend(progress_callback=on_progress):
+            ctx.check_cancelled()
+            raise StepFailed("Không thể giải nén backend")
+        backend_updater.record_installed(backend_manager.last_download_info)
+        ctx.report("extract", 100, "Đã cài đặt backend")
+
+    def _step_start_backend(self, ctx):
+        self.status.emit("Đang khởi động backend...")
+
+        def on_status(message):
+            ctx.check_cancelled()
+            self.status.emit(message)
+
+        if not backend_manager.start_backend(
+            status_callback=on_status, cancel_event=ctx.cancel_event
+        ):
+            ctx.check_cancelled()
+            raise StepFailed(
+                f"Không thể khởi động backend sau "
+                f"{backend_manager.max_startup_retries} lần thử"
+            )
+
+
+class BackendReconfigureWorker(QThread):
+    """Áp dụng cấu hình mới cho backend đang chạy (có thể phải restart)"""
+
+    status = pyqtSignal(str)
+    finished = pyqtSignal(bool)
+
+    def __init__(self, changed: set):
+        super().__init__()
+        self.changed = changed
+
+    def run(self):
+        try:
+            ok = backend_manager.reconfigure_backend(
+                self.changed, status_callback=self.status.emit
+            )
+        except Exception as e:
+            logger.error(f"Lỗi khi áp dụng cấu hình backend: {e}")
+            ok = False
+        self.finished.emit(ok)
+
 
 class MainWindow(QMainWindow):
+    # Cấu hình đổi (có thể từ thread theo dõi file) -> xử lý trên UI thread
+    settings_changed = pyqtSignal(object, object)
+
     def __init__(self):
         super().__init__()
         self.backend_ready = False
         self.setup_thread = None
+        self.reconfigure_thread = None
+        self.pending_backend_changes = set()
+        self.monitor_panel = None
         self.init_ui()
+        # Profiler có thể đã được bật từ biến môi trường AI_DUBBING_PROFILE
+        self.event_counter = QtEventCounter(QApplication.instance())
+        if sampling_profiler.is_running:
+            self.event_counter.start()
+        QShortcut(QKeySequence("Ctrl+Shift+P"), self, self.toggle_profiler)
+        self.settings_changed.connect(self.on_settings_changed)
+        settings_store.subscribe(self.settings_changed.emit)
+        settings_store.start_watching()
+        resource_monitor.start()
+        # Dọn thư mục cũ trong trash (kể cả phần sót lại từ phiên trước)
+        backend_manager.trash_reaper.start()
         self.start_backend_setup()
 
     def init_ui(self):
@@ -221,9 +412,7 @@ class MainWindow(QMainWindow):
 
         # --- Tạo các menu buttons ---
         # Trang chủ
-        self.home_button = create_menu_button(
-            "home", "Trang chủ", "https://www.youtube.com"
-        )
+        self.home_button = create_menu_button("home", "Trang chủ", HOME_URL)
         # YouTube
         self.youtube_button = create_menu_button(
             "youtube", "YouTube", "https://www.youtube.com"
@@ -256,9 +445,30 @@ class MainWindow(QMainWindow):
         right_layout = QVBoxLayout(right_panel)
         right_layout.setContentsMargins(10, 10, 10, 10)
 
-        # Web view
-        self.web_view = QWebEngineView()
-        right_layout.addWidget(self.web_view)
+        # Profile bền vững (cookie + disk cache) dùng chung cho mọi web view
+        settings = settings_store.settings
+        self.web_profile = create_persistent_profile(
+            backend_manager.app_data_dir,
+            cache_size_mb=settings.web_cache_mb,
+            parent=self,
+        )
+
+        # Phục vụ media đã lồng tiếng qua app:// thay vì HTTP của backend
+        self.media_scheme_handler = MediaSchemeHandler(backend_manager.output_dir, self)
+        self.web_profile.installUrlSchemeHandler(
+            MEDIA_URL_SCHEME.encode(), self.media_scheme_handler
+        )
+
+        # Mỗi đích đến của sidebar có một web view riêng, giữ lại giữa các lần chuyển
+        self.web_stack = QStackedWidget()
+        self.view_pool = WebViewPool(
+            self.web_stack,
+            self.web_profile,
+            max_views=settings.max_web_views,
+            memory_budget_mb=settings.web_memory_budget_mb,
+            parent=self,
+        )
+        right_layout.addWidget(self.web_stack)
 
         # Add panels to splitter
         splitter.addWidget(left_panel)
@@ -291,6 +501,10 @@ class MainWindow(QMainWindow):
         self.setup_thread.progress.connect(self.update_progress)
         self.setup_thread.status.connect(self.update_status)
         self.setup_thread.finished.connect(self.on_setup_finished)
+        # Tải trước trang chủ trong lúc backend đang được cài đặt
+        self.setup_thread.warmup_requested.connect(
+            lambda: self.view_pool.warmup(HOME_URL)
+        )
         self.setup_thread.start()
 
         # self.on_setup_finished(True, "Backend đã sẵn sàng")  # Giả lập thành công
@@ -312,6 +526,10 @@ class MainWindow(QMainWindow):
             self.log_message("✓ " + message)
             self.backend_ready = True
             self.switch_to_main_interface()
+            # Kiểm tra CRC toàn bộ bản cài ở chế độ nền
+            backend_manager.start_deep_verification()
+            # Kiểm tra và tải trước bản cập nhật ở chế độ nền
+            backend_updater.start()
         else:
             self.log_message("✗ " + message)
             QMessageBox.critical(self, "Lỗi", message)
@@ -325,29 +543,123 @@ class MainWindow(QMainWindow):
 
     def load_youtube(self):
         """Tải YouTube trong web view"""
-        self.load_url("https://www.youtube.com")
+        self.load_url(HOME_URL)
 
     def load_url(self, url):
-        """Tải URL trong web view"""
+        """Hiển thị URL, dùng lại web view đã mở nếu có trong pool"""
         # Loại bỏ khoảng trắng thừa nếu có
         clean_url = url.strip()
-        self.web_view.load(QUrl(clean_url))
+        self.view_pool.show(clean_url)
+
+    @property
+    def web_view(self):
+        """Web view đang hiển thị"""
+        return self.view_pool.current_view()
 
     def refresh_web_view(self):
         """Làm mới web view"""
-        self.web_view.reload()
+        if self.web_view:
+            self.web_view.reload()
 
     def show_settings(self):
-        """Hiển thị cài đặt"""
-        # Placeholder for settings functionality
-        QMessageBox.information(
-            self, "Cài đặt", "Tính năng cài đặt sẽ được triển khai sau"
-        )
+        """Hiển thị hộp thoại cài đặt"""
+        # Import khi cần: hộp thoại ít dùng, không nằm trên đường khởi động
+        from ui.settings_dialog import SettingsDialog
+
+        dialog = SettingsDialog(settings_store, self)
+        dialog.monitor_requested.connect(self.show_resource_monitor)
+        dialog.profiler_requested.connect(self.toggle_profiler)
+        dialog.exec()
+
+    def on_settings_changed(self, settings, changed):
+        """Áp dụng cấu hình mới cho web view và backend đang chạy"""
+        if "web_cache_mb" in changed:
+            self.web_profile.setHttpCacheMaximumSize(
+                settings.web_cache_mb * 1024 * 1024
+            )
+        if changed & {"max_web_views", "web_memory_budget_mb"}:
+            self.view_pool.configure(
+                max_views=settings.max_web_views,
+                memory_budget_mb=settings.web_memory_budget_mb,
+            )
+
+        backend_changes = changes_requiring(
+            changed, "backend_live"
+        ) | changes_requiring(changed, "backend_restart")
+        # Trước khi backend sẵn sàng, cấu hình mới tự có hiệu lực khi khởi động
+        if backend_changes and self.backend_ready:
+            self.pending_backend_changes |= backend_changes
+            self.reconfigure_backend()
+
+    def reconfigure_backend(self):
+        """Chạy BackendReconfigureWorker, gom các thay đổi đến trong lúc chạy"""
+        if self.reconfigure_thread and self.reconfigure_thread.isRunning():
+            return
+        changed, self.pending_backend_changes = self.pending_backend_changes, set()
+        self.reconfigure_thread = BackendReconfigureWorker(changed)
+        self.reconfigure_thread.status.connect(self.log_message)
+        self.reconfigure_thread.finished.connect(self.on_reconfigure_finished)
+        self.reconfigure_thread.start()
+
+    def on_reconfigure_finished(self, success):
+        if not success:
+            QMessageBox.warning(
+                self,
+                "Lỗi",
+                "Không thể khởi động lại backend với cấu hình mới. "
+                "Kiểm tra lại cài đặt (ví dụ cổng backend).",
+            )
+        if self.pending_backend_changes:
+            self.reconfigure_backend()
+
+    def show_resource_monitor(self):
+        """Hiển thị bảng giám sát tài nguyên"""
+        if self.monitor_panel is None:
+            from ui.resource_monitor_panel import ResourceMonitorPanel
+
+            self.monitor_panel = ResourceMonitorPanel(resource_monitor, self)
+        self.monitor_panel.show()
+        self.monitor_panel.raise_()
+
+    def toggle_profiler(self):
+        """Bật/tắt sampling profiler; khi tắt, kết quả được ghi ra file"""
+        if sampling_profiler.is_running:
+            self.event_counter.stop()
+            result = sampling_profiler.stop()
+            if result:
+                self.log_message(f"Đã ghi profile: {result}")
+        else:
+            sampling_profiler.start()
+            self.event_counter.start()
+            self.log_message(
+                f"Đang chạy profiler ({sampling_profiler.rate_hz} Hz), "
+                f"nhấn Ctrl+Shift+P để dừng và ghi kết quả"
+            )
 
     def closeEvent(self, event):
         """Xử lý khi đóng ứng dụng"""
         self.log_message("Đang đóng ứng dụng...")
         # backend_manager.stop_backend()
+        settings_store.stop_watching()
+        if self.setup_thread and self.setup_thread.isRunning():
+            # Không để QThread sống lâu hơn cửa sổ khi đang tải/giải nén
+            self.log_message("Đang hủy cài đặt backend...")
+            # Không hiện hộp thoại lỗi/quit() trong lúc đang đóng
+            self.setup_thread.finished.disconnect(self.on_setup_finished)
+            self.setup_thread.cancel()
+            if not self.setup_thread.wait(SETUP_CANCEL_TIMEOUT_MS):
+                logger.warning("Worker cài đặt chưa dừng kịp, đóng ứng dụng luôn")
+        if self.reconfigure_thread:
+            self.reconfigure_thread.wait()
+        resource_monitor.stop()
+        if sampling_profiler.is_running:
+            self.event_counter.stop()
+            sampling_profiler.stop()
+        backend_updater.stop()
+        backend_manager.stop_deep_verification()
+        backend_manager.trash_reaper.stop()
+        # Page phải bị hủy trước profile
+        self.view_pool.clear()
         event.accept()
 
 
@@ -0,0 +1,224 @@
+import mimetypes
+import mmap
+import logging
+from pathlib import Path
+from typing import Optional
+from urllib.parse import unquote
+
+from PyQt6.QtCore import QIODevice, QObject
+from PyQt6.QtWebEngineCore import (
+    QWebEngineUrlScheme,
+    QWebEngineUrlSchemeHandler,
+    QWebEngineUrlRequestJob,
+)
+
+from const import MEDIA_URL_SCHEME, MEDIA_URL_HOST
+
+logger = logging.getLogger(__name__)
+
+# mimetypes của hệ điều hành (nhất là Windows registry) thường thiếu
+# hoặc sai cho các định dạng media, nên bổ sung trước khi tra cứu
+_EXTRA_MIME_TYPES = {
+    ".mp4": "video/mp4",
+    ".m4v": "video/mp4",
+    ".webm": "video/webm",
+    ".mkv": "video/x-matroska",
+    ".mov": "video/quicktime",
+    ".mp3": "audio/mpeg",
+    ".m4a": "audio/mp4",
+    ".aac": "audio/aac",
+    ".wav": "audio/wav",
+    ".ogg": "audio/ogg",
+    ".opus": "audio/ogg",
+    ".vtt": "text/vtt",
+    ".srt": "text/plain",
+    ".json": "application/json",
+}
+
+
+def guess_mime_type(path: Path) -> str:
+    """Xác định MIME type theo phần mở rộng của file"""
+    suffix = path.suffix.lower()
+    if suffix in _EXTRA_MIME_TYPES:
+        return _EXTRA_MIME_TYPES[suffix]
+    mime_type, _ = mimetypes.guess_type(path.name)
+    return mime_type or "application/octet-stream"
+
+
+def parse_range(header: str, size: int):
+    """Phân tích header Range một khoảng (RFC 9110)
+
+    Trả về (start, end) đã giới hạn trong file, () nếu khoảng không thỏa mãn
+    được (416) hoặc None nếu header không hợp lệ/nhiều khoảng (trả cả file).
+    """
+    if not header.startswith("bytes=") or "," in header:
+        return None
+    first, sep, last = header[6:].strip().partition("-")
+    try:
+        if not sep or (not first and not last):
+            return None
+        if not first:
+            # bytes=-N: N byte cuối file
+            suffix = int(last)
+            if suffix <= 0 or size == 0:
+                return ()
+            return max(size - suffix, 0), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if last and start > end:
+        return None
+    if start >= size:
+        return ()
+    return start, min(end, size - 1)
+
+
+def _request_header(job: QWebEngineUrlRequestJob, name: bytes) -> Optional[str]:
+    """Giá trị header của request (Qt >= 6.5), None nếu không có"""
+    if not hasattr(job, "requestHeaders"):
+        return None
+    for key, value in job.requestHeaders().items():
+        if bytes(key).lower() == name.lower():
+            return bytes(value).decode("latin-1")
+    return None
+
+
+def register_media_scheme():
+    """Đăng ký app:// scheme - bắt buộc gọi TRƯỚC khi tạo QApplication"""
+    scheme = QWebEngineUrlScheme(MEDIA_URL_SCHEME.encode())
+    scheme.setSyntax(QWebEngineUrlScheme.Syntax.Host)
+    scheme.setFlags(
+        QWebEngineUrlScheme.Flag.SecureScheme
+        | QWebEngineUrlScheme.Flag.LocalAccessAllowed
+        | QWebEngineUrlScheme.Flag.CorsEnabled
+    )
+    QWebEngineUrlScheme.registerScheme(scheme)
+    logger.info(f"Đã đăng ký URL scheme: {MEDIA_URL_SCHEME}://")
+
+
+class MappedFileDevice(QIODevice):
+    """QIODevice chỉ đọc, truy cập ngẫu nhiên, đọc dữ liệu từ file được mmap.
+
+    Thiết bị không tuần tự (isSequential() == False) và báo đúng size(),
+    nên khi Chromium gửi header Range (tua video), QtWebEngine chỉ cần
+    seek() tới offset rồi trả về 206 Partial Content - không phải đọc
+    lại phần đầu file.
+    """
+
+    def __init__(self, path: Path, parent: QObject = None):
+        super().__init__(parent)
+        self._file = open(path, "rb")
+        self._size = Path(path).stat().st_size
+        # mmap không hỗ trợ file rỗng
+        self._map = (
+            mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            if self._size > 0
+            else None
+        )
+
+    def isSequential(self) -> bool:
+        return False
+
+    def size(self) -> int:
+        return self._size
+
+    def readData(self, maxlen: int) -> bytes:
+        pos = self.pos()
+        if self._map is None or pos >= self._size:
+            return b""
+        end = min(pos + maxlen, self._size)
+        return self._map[pos:end]
+
+    def writeData(self, data) -> int:
+        return -1
+
+    def close(self):
+        super().close()
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if not self._file.closed:
+            self._file.close()
+
+
+class MediaSchemeHandler(QWebEngineUrlSchemeHandler):
+    """Phục vụ file trong thư mục output qua app://media/<đường dẫn tương đối>
+
+    Dữ liệu được đọc thẳng từ ổ đĩa trong tiến trình UI, không đi qua
+    HTTP server của backend trên cổng 17199.
+    """
+
+    def __init__(self, root_dir: Path, parent: QObject = None):
+        super().__init__(parent)
+        self.root_dir = Path(root_dir)
+
+    def resolve_path(self, url_path: str) -> Optional[Path]:
+        """Chuyển path của URL thành file trong root_dir, chặn '..' thoát ra ngoài"""
+        relative = unquote(url_path).lstrip("/")
+        if not relative:
+            return None
+
+        root = self.root_dir.resolve()
+        candidate = (root / relative).resolve()
+        try:
+            candidate.relative_to(root)
+        except ValueError:
+            return None
+        return candidate
+
+    def requestStarted(self, job: QWebEngineUrlRequestJob):
+        url = job.requestUrl()
+        method = bytes(job.requestMethod()).decode("ascii", "ignore").upper()
+
+        if method not in ("GET", "HEAD"):
+            job.fail(QWebEngineUrlRequestJob.Error.RequestDenied)
+            return
+
+        if url.host() != MEDIA_URL_HOST:
+            job.fail(QWebEngineUrlRequestJob.Error.UrlInvalid)
+            return
+
+        file_path = self.resolve_path(url.path())
+        if file_path is None:
+            logger.warning(f"Từ chối truy cập media: {url.toString()}")
+            job.fail(QWebEngineUrlRequestJob.Error.RequestDenied)
+            return
+
+        if not file_path.is_file():
+            job.fail(QWebEngineUrlRequestJob.Error.UrlNotFound)
+            return
+
+        try:
+            device = MappedFileDevice(file_path)
+            device.open(
+                QIODevice.OpenModeFlag.ReadOnly | QIODevice.OpenModeFlag.Unbuffered
+            )
+        except OSError as e:
+            logger.error(f"Không thể mở file media {file_path}: {e}")
+            job.fail(QWebEngineUrlRequestJob.Error.RequestFailed)
+            return
+
+        size = device.size()
+        range_header = _request_header(job, b"Range")
+        if range_header and parse_range(range_header, size) == ():
+            device.close()
+            logger.warning(f"Range không hợp lệ cho {file_path.name}: {range_header}")
+            if hasattr(job, "setAdditionalResponseHeaders"):
+                job.setAdditionalResponseHeaders(
+                    {b"Content-Range": f"bytes */{size}".encode()}
+                )
+            # Job không đặt được mã 416: báo lỗi để trình phát ngừng đọc tiếp
+            job.fail(QWebEngineUrlRequestJob.Error.RequestFailed)
+            return
+        # Khoảng hợp lệ do QtWebEngine tự seek() device và trả 206
+
+        # Device sống cùng job và được đóng khi job kết thúc
+        job.destroyed.connect(device.close)
+        device.setParent(job)
+
+        # Qt >= 6.6: báo cho trình phát biết có thể yêu cầu theo byte range
+        if hasattr(job, "setAdditionalResponseHeaders"):
+            job.setAdditionalResponseHeaders({b"Accept-Ranges": b"bytes"})
+
+        job.reply(guess_mime_type(file_path).encode(), device)
@@ -0,0 +1,122 @@
+import logging
+
+from PyQt6.QtWidgets import (
+    QDialog,
+    QVBoxLayout,
+    QHBoxLayout,
+    QLabel,
+    QTableWidget,
+    QTableWidgetItem,
+    QHeaderView,
+    QDoubleSpinBox,
+)
+from PyQt6.QtCore import Qt, QTimer
+
+from app_settings import settings_store
+from resource_monitor import ResourceMonitor
+
+logger = logging.getLogger(__name__)
+
+_GROUPS = [
+    ("ui", "Giao diện (UI)"),
+    ("backend", "Backend AI"),
+    ("chromium", "Chromium"),
+]
+_COLUMNS = ["Tiến trình", "Số process", "CPU (%)", "RAM (MB)", "Threads", "Handles"]
+
+
+class ResourceMonitorPanel(QDialog):
+    """Bảng theo dõi tài nguyên trực tiếp, đọc mẫu mới nhất từ ResourceMonitor"""
+
+    def __init__(self, monitor: ResourceMonitor, parent=None):
+        super().__init__(parent)
+        self.monitor = monitor
+        self.setWindowTitle("Giám sát tài nguyên")
+        self.resize(640, 360)
+
+        layout = QVBoxLayout(self)
+
+        # Chu kỳ lấy mẫu
+        interval_layout = QHBoxLayout()
+        interval_layout.addWidget(QLabel("Chu kỳ lấy mẫu (giây):"))
+        self.interval_spin = QDoubleSpinBox()
+        self.interval_spin.setRange(0.2, 60.0)
+        self.interval_spin.setSingleStep(0.5)
+        self.interval_spin.setValue(monitor.interval)
+        self.interval_spin.valueChanged.connect(self.on_interval_changed)
+        interval_layout.addWidget(self.interval_spin)
+        interval_layout.addStretch(1)
+        layout.addLayout(interval_layout)
+
+        # Bảng số liệu theo nhóm process
+        self.table = QTableWidget(len(_GROUPS), len(_COLUMNS))
+        self.table.setHorizontalHeaderLabels(_COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(
+            QHeaderView.ResizeMode.Stretch
+        )
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        for row, (_, title) in enumerate(_GROUPS):
+            self.table.setItem(row, 0, QTableWidgetItem(title))
+        layout.addWidget(self.table)
+
+        # Số liệu backend tự báo cáo + xu hướng RAM
+        self.backend_stats_label = QLabel("Backend chưa báo cáo số liệu")
+        self.backend_stats_label.setWordWrap(True)
+        layout.addWidget(self.backend_stats_label)
+
+        self.trend_label = QLabel()
+        layout.addWidget(self.trend_label)
+
+        self.metrics_label = QLabel(f"File metrics: {monitor.metrics_path}")
+        self.metrics_label.setTextInteractionFlags(
+            Qt.TextInteractionFlag.TextSelectableByMouse
+        )
+        layout.addWidget(self.metrics_label)
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.refresh_timer.start(int(monitor.interval * 1000))
+        self.refresh()
+
+    def on_interval_changed(self, value):
+        """Áp dụng chu kỳ lấy mẫu mới cho monitor và bảng (lưu vào settings)"""
+        settings_store.update(monitor_interval=value)
+        self.monitor.set_interval(value)
+        self.refresh_timer.setInterval(int(self.monitor.interval * 1000))
+
+    def refresh(self):
+        """Cập nhật bảng từ mẫu mới nhất"""
+        snapshot = self.monitor.latest()
+        if snapshot is None:
+            return
+
+        for row, (group, _) in enumerate(_GROUPS):
+            sample = getattr(snapshot, group)
+            values = [
+                str(len(sample.pids)),
+                f"{sample.cpu_percent:.1f}",
+                f"{sample.rss_bytes / (1024 * 1024):.1f}",
+                str(sample.threads),
+                str(sample.handles),
+            ]
+            for column, value in enumerate(values, start=1):
+                item = QTableWidgetItem(value)
+                item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
+                self.table.setItem(row, column, item)
+
+        if snapshot.backend_stats:
+            self.backend_stats_label.setText(
+                "Backend: "
+                + ", ".join(
+                    f"{k}={v}" for k, v in sorted(snapshot.backend_stats.items())
+                )
+            )
+        else:
+            self.backend_stats_label.setText("Backend chưa báo cáo số liệu")
+
+        trend_mb_per_hour = self.monitor.rss_trend("backend") * 3600 / (1024 * 1024)
+        self.trend_label.setText(
+            f"Xu hướng RAM backend: {trend_mb_per_hour:+.1f} MB/giờ "
+            f"({len(self.monitor.history)} mẫu)"
+        )
@@ -0,0 +1,153 @@
+import logging
+from dataclasses import asdict
+
+from PyQt6.QtWidgets import (
+    QDialog,
+    QVBoxLayout,
+    QHBoxLayout,
+    QFormLayout,
+    QWidget,
+    QTabWidget,
+    QLabel,
+    QLineEdit,
+    QSpinBox,
+    QDoubleSpinBox,
+    QComboBox,
+    QPushButton,
+    QDialogButtonBox,
+    QMessageBox,
+)
+from PyQt6.QtCore import pyqtSignal
+
+from app_settings import AppSettings, SettingsStore, SETTINGS_FIELDS
+from sampling_profiler import sampling_profiler
+
+logger = logging.getLogger(__name__)
+
+
+class SettingsDialog(QDialog):
+    """Hộp thoại cài đặt, sinh form từ metadata của AppSettings"""
+
+    monitor_requested = pyqtSignal()  # mở bảng giám sát tài nguyên
+    profiler_requested = pyqtSignal()  # bật/tắt sampling profiler
+
+    def __init__(self, store: SettingsStore, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.editors = {}
+        self.setWindowTitle("Cài đặt")
+        self.resize(560, 420)
+
+        layout = QVBoxLayout(self)
+
+        # Mỗi nhóm cấu hình một tab, giữ thứ tự khai báo trong AppSettings
+        tabs = QTabWidget()
+        forms = {}
+        for name, f in SETTINGS_FIELDS.items():
+            group = f.metadata["group"]
+            if group not in forms:
+                page = QWidget()
+                forms[group] = QFormLayout(page)
+                tabs.addTab(page, group)
+            label = f.metadata["label"]
+            if f.metadata["apply"] == "backend_restart":
+                label += " *"
+            editor = self._create_editor(f)
+            self.editors[name] = editor
+            forms[group].addRow(label, editor)
+        layout.addWidget(tabs)
+
+        note = QLabel("* Thay đổi sẽ khởi động lại backend nếu backend đang chạy")
+        note.setWordWrap(True)
+        layout.addWidget(note)
+
+        button_layout = QHBoxLayout()
+        monitor_button = QPushButton("Giám sát tài nguyên...")
+        monitor_button.clicked.connect(self.monitor_requested.emit)
+        button_layout.addWidget(monitor_button)
+        self.profiler_button = QPushButton()
+        self.profiler_button.clicked.connect(self.profiler_requested.emit)
+        self.profiler_button.clicked.connect(self.update_profiler_button)
+        self.update_profiler_button()
+        button_layout.addWidget(self.profiler_button)
+        button_layout.addStretch(1)
+
+        buttons = QDialogButtonBox(
+            QDialogButtonBox.StandardButton.RestoreDefaults
+            | QDialogButtonBox.StandardButton.Apply
+            | QDialogButtonBox.StandardButton.Ok
+            | QDialogButtonBox.StandardButton.Cancel
+        )
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        buttons.button(QDialogButtonBox.StandardButton.Apply).clicked.connect(
+            self.apply
+        )
+        buttons.button(QDialogButtonBox.StandardButton.RestoreDefaults).clicked.connect(
+            lambda: self.load(AppSettings())
+        )
+        button_layout.addWidget(buttons)
+        layout.addLayout(button_layout)
+
+        self.load(store.settings)
+
+    def update_profiler_button(self):
+        if sampling_profiler.is_running:
+            self.profiler_button.setText("Dừng profiler (Ctrl+Shift+P)")
+        else:
+            self.profiler_button.setText("Bật profiler (Ctrl+Shift+P)")
+
+    def _create_editor(self, f) -> QWidget:
+        meta = f.metadata
+        if "choices" in meta:
+            editor = QComboBox()
+            editor.addItems(meta["choices"])
+        elif f.type in (int, "int"):
+            editor = QSpinBox()
+            editor.setRange(meta.get("min", 0), meta.get("max", 2**31 - 1))
+        elif f.type in (float, "float"):
+            editor = QDoubleSpinBox()
+            editor.setDecimals(2)
+            editor.setRange(meta.get("min", 0.0), meta.get("max", 1e9))
+        else:
+            editor = QLineEdit()
+        return editor
+
+    def load(self, settings: AppSettings):
+        """Hiển thị giá trị của settings lên form (chưa lưu)"""
+        for name, value in asdict(settings).items():
+            editor = self.editors[name]
+            if isinstance(editor, QComboBox):
+                editor.setCurrentText(value)
+            elif isinstance(editor, (QSpinBox, QDoubleSpinBox)):
+                editor.setValue(value)
+            else:
+                editor.setText(value)
+
+    def values(self) -> dict:
+        result = {}
+        for name, editor in self.editors.items():
+            if isinstance(editor, QComboBox):
+                result[name] = editor.currentText()
+            elif isinstance(editor, (QSpinBox, QDoubleSpinBox)):
+                result[name] = editor.value()
+            else:
+                result[name] = editor.text()
+        return result
+
+    def apply(self) -> bool:
+        """Lưu và áp dụng cấu hình trên form"""
+        try:
+            self.store.update(**self.values())
+        except ValueError as e:
+            QMessageBox.warning(self, "Cấu hình không hợp lệ", str(e))
+            return False
+        except OSError as e:
+            logger.error(f"Không thể lưu cấu hình: {e}")
+            QMessageBox.critical(self, "Lỗi", f"Không thể lưu cấu hình: {e}")
+            return False
+        return True
+
+    def accept(self):
+        if self.apply():
+            super().accept()
@@ -0,0 +1,201 @@
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from PyQt6.QtCore import QObject, QUrl
+from PyQt6.QtWidgets import QStackedWidget
+from PyQt6.QtWebEngineWidgets import QWebEngineView
+from PyQt6.QtWebEngineCore import QWebEngineProfile, QWebEnginePage
+
+try:
+    import psutil
+except ImportError:  # psutil là tùy chọn, thiếu thì chỉ giới hạn theo số view
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+PROFILE_NAME = "ai_dubbing"
+
+_State = QWebEnginePage.LifecycleState
+# Các chuyển trạng thái pool được phép yêu cầu. Discarded chỉ quay lại Active
+# bằng cách nạp lại trang khi show(), không bao giờ sang Frozen.
+_ALLOWED_TRANSITIONS = {
+    (_State.Active, _State.Frozen),
+    (_State.Frozen, _State.Active),
+    (_State.Active, _State.Discarded),
+    (_State.Frozen, _State.Discarded),
+}
+
+
+def create_persistent_profile(
+    app_data_dir: Path, cache_size_mb: int = 256, parent: QObject = None
+) -> QWebEngineProfile:
+    """Tạo profile lưu cookie và HTTP cache trên đĩa, dùng chung cho mọi view"""
+    profile = QWebEngineProfile(PROFILE_NAME, parent)
+    profile.setPersistentStoragePath(str(app_data_dir / "web_profile"))
+    profile.setCachePath(str(app_data_dir / "web_cache"))
+    profile.setHttpCacheType(QWebEngineProfile.HttpCacheType.DiskHttpCache)
+    profile.setHttpCacheMaximumSize(cache_size_mb * 1024 * 1024)
+    profile.setPersistentCookiesPolicy(
+        QWebEngineProfile.PersistentCookiesPolicy.AllowPersistentCookies
+    )
+    logger.info(
+        f"Web profile: {profile.persistentStoragePath()} " f"(cache {cache_size_mb} MB)"
+    )
+    return profile
+
+
+class WebViewPool(QObject):
+    """Giữ sẵn một QWebEngineView cho mỗi đích đến của sidebar.
+
+    - View đang hiển thị: trạng thái Active
+    - max_frozen view dùng gần nhất: Frozen (giữ DOM, dừng JS/timer)
+    - Các view cũ hơn: Discarded (giải phóng renderer, giữ lịch sử)
+    - Quá max_views hoặc vượt memory_budget_mb: xóa view ít dùng nhất (LRU)
+    - View tạo bằng warmup() giữ Active và không bị xóa cho đến khi được show()
+    """
+
+    def __init__(
+        self,
+        container: QStackedWidget,
+        profile: QWebEngineProfile,
+        max_views: int = 4,
+        max_frozen: int = 1,
+        memory_budget_mb: int = 1024,
+        parent: QObject = None,
+    ):
+        super().__init__(parent)
+        self.container = container
+        self.profile = profile
+        self.max_views = max_views
+        self.max_frozen = max_frozen
+        self.memory_budget_mb = memory_budget_mb
+        # key -> view, phần tử cuối là view dùng gần nhất
+        self._views = OrderedDict()
+        # Key của các view warmup chưa từng hiển thị
+        self._warming = set()
+
+    def configure(self, max_views=None, max_frozen=None, memory_budget_mb=None):
+        """Cập nhật giới hạn của pool và áp dụng ngay"""
+        if max_views is not None:
+            self.max_views = max(1, max_views)
+        if max_frozen is not None:
+            self.max_frozen = max(0, max_frozen)
+        if memory_budget_mb is not None:
+            self.memory_budget_mb = memory_budget_mb
+        self._apply_lifecycle()
+
+    def current_view(self) -> Optional[QWebEngineView]:
+        """View đang hiển thị (None nếu chưa có)"""
+        view = self.container.currentWidget()
+        return view if view in self._views.values() else None
+
+    def show(self, url: str, key: str = None) -> QWebEngineView:
+        """Hiển thị view cho đích đến, tạo mới nếu chưa có trong pool"""
+        key = key or url
+        view = self._views.get(key)
+
+        if view is None:
+            view = self._create_view()
+            view.load(QUrl(url))
+            self._views[key] = view
+            logger.info(f"Tạo web view mới cho {key}")
+        else:
+            self._warming.discard(key)
+            self._views.move_to_end(key)
+            page = view.page()
+            if page.lifecycleState() != QWebEnginePage.LifecycleState.Active:
+                page.setLifecycleState(QWebEnginePage.LifecycleState.Active)
+
+        # Phải chuyển widget trước: Chromium không cho freeze/discard page đang hiển thị
+        self.container.setCurrentWidget(view)
+        self._apply_lifecycle()
+        return view
+
+    def warmup(self, url: str, key: str = None):
+        """Tạo trước view cho đích đến (chưa hiển thị) để renderer khởi động sớm"""
+        key = key or url
+        if key in self._views:
+            return
+        view = self._create_view()
+        view.load(QUrl(url))
+        current_key = self._current_key()
+        self._views[key] = view
+        self._warming.add(key)
+        # View mới là view dùng gần nhất sau view hiện tại, view hiện tại vẫn đứng cuối
+        if current_key is not None:
+            self._views.move_to_end(current_key)
+        logger.info(f"Warmup web view cho {key}")
+        self._apply_lifecycle()
+
+    def clear(self):
+        """Xóa tất cả view (gọi trước khi hủy profile)"""
+        for key in list(self._views):
+            self._evict(key)
+
+    def _create_view(self) -> QWebEngineView:
+        view = QWebEngineView()
+        page = QWebEnginePage(self.profile, view)
+        view.setPage(page)
+        self.container.addWidget(view)
+        return view
+
+    def _current_key(self) -> Optional[str]:
+        view = self.container.currentWidget()
+        for key, candidate in self._views.items():
+            if candidate is view:
+                return key
+        return None
+
+    def _apply_lifecycle(self):
+        """Đặt trạng thái Frozen/Discarded cho view không hoạt động và evict LRU"""
+        # Trừ view hiện tại (đứng cuối) và view warmup, ít dùng nhất đứng trước
+        inactive_keys = [k for k in list(self._views)[:-1] if k not in self._warming]
+
+        for index, key in enumerate(reversed(inactive_keys)):
+            if index < self.max_frozen:
+                target = QWebEnginePage.LifecycleState.Frozen
+            else:
+                target = QWebEnginePage.LifecycleState.Discarded
+            self._set_lifecycle(key, target)
+
+        while inactive_keys and len(self._views) > self.max_views:
+            self._evict(inactive_keys.pop(0))
+
+        while inactive_keys and self._memory_usage_mb() > self.memory_budget_mb:
+            self._evict(inactive_keys.pop(0))
+
+    def _set_lifecycle(self, key: str, target):
+        page = self._views[key].page()
+        state = page.lifecycleState()
+        if state == target:
+            return
+        if (state, target) not in _ALLOWED_TRANSITIONS:
+            # Vd. tăng max_frozen: view đã Discarded giữ nguyên cho đến khi show()
+            logger.debug(f"Bỏ qua chuyển {key}: {state.name} -> {target.name}")
+            return
+        page.setLifecycleState(target)
+
+    def _memory_usage_mb(self) -> float:
+        """Tổng RSS của các renderer process (0 nếu không có psutil)"""
+        if psutil is None:
+            return 0.0
+
+        pids = {view.page().renderProcessPid() for view in self._views.values()}
+        total = 0
+        for pid in pids:
+            if pid <= 0:
+                continue
+            try:
+                total += psutil.Process(pid).memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        return total / (1024 * 1024)
+
+    def _evict(self, key: str):
+        view = self._views.pop(key)
+        self._warming.discard(key)
+        self.container.removeWidget(view)
+        view.deleteLater()
+        logger.info(f"Đã giải phóng web view: {key}")